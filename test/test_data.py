@@ -1,9 +1,15 @@
 import sys
+import glob
 import os
+import tempfile
 import unittest
+import numpy as np
 import pandas as pd
 
-from tradegym.data.etl import ETL
+from tradegym.data import Data, Dataset, Storage, ColumnarStorage
+from tradegym.env import TradeEnv, EpisodeSampler
+from tradegym.engine import Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine
+from tradegym.data.etl import ETL, Segmenter
 
 CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(CUR_DIR)
@@ -12,7 +18,26 @@ import utils
 
 class TestData(unittest.TestCase):
     def test_segment(self) -> None:
-        pass
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+        dfs = ETL.segment(df, 60, num_gap_ticks=10)
+        self.assertEqual([len(df) for df in dfs], [20, 21])
+        self.assertEqual(dfs[1].loc[0, "datetime"], pd.Timestamp("2025-08-05 09:00:00"))
+        self.assertEqual(len(ETL.segment(df, 60, num_gap_ticks=10, min_segment=21)), 1)
+
+        # incremental
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+        segmenter = Segmenter(60, num_gap_ticks=10)
+        segments = []
+        for st in range(0, len(df), 7):
+            segments += segmenter.push(df.iloc[st:st+7].copy())
+            self.assertLessEqual(segmenter.num_pending, 21)
+        segments += segmenter.flush()
+        self.assertEqual(len(segments), 2)
+        for a, b in zip(segments, dfs):
+            self.assertTrue(a.equals(b))
+        with self.assertRaises(ValueError):
+            segmenter.push(df.iloc[30:].copy())
+            segmenter.push(df.iloc[:10].copy())
 
 
     def test_align_time(self) -> None:
@@ -37,6 +62,127 @@ class TestData(unittest.TestCase):
         self.assertEqual(df.iloc[3, 2], 3299)
         self.assertEqual(df.iloc[4, 0], "2025-08-05 09:00:02.000")
         self.assertEqual(df.iloc[4, 2], 3298)
+        self.assertEqual(df["padding"].tolist(), [False, True, True, False, False])
+
+        # datetime column of segmented data
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv")).drop([3, 4])
+        segment = ETL.segment(df, 0.5)[0]
+        df = ETL.padding(segment, 0.5)
+        self.assertEqual(len(df), 1200)
+        self.assertEqual(df.loc[4, "datetime"], pd.Timestamp("2025-08-05 09:00:02"))
+        self.assertEqual(df.loc[4, "last_price"], df.loc[2, "last_price"])
+        self.assertEqual(df["padding"].sum(), 2)
+
+        # unsorted rows are filled from the previous tick
+        unsorted = segment.iloc[[0, *range(len(segment) - 2, 0, -1), len(segment) - 1]]
+        pd.testing.assert_frame_equal(ETL.padding(unsorted, 0.5), df)
+
+
+    def test_storage(self) -> None:
+        input_path = os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dfs = {}
+            for format in ["hdf5", "npy"]:
+                output_path = os.path.join(tmp_dir, f"data_{format}")
+                Data.publish(input_path, output_path, tick=0.5, format=format)
+                Data.publish(input_path, output_path, tick=0.5)
+                self.assertEqual(Storage.detect(output_path), format)
+                with Storage.open(output_path) as storage:
+                    self.assertEqual(storage.num_chunks, 2)
+                    self.assertEqual(storage.read_metadata(1)["size"], 1200)
+                dfs[format] = Data.load(output_path, 1)
+
+                arrays = Data.load_arrays(output_path, 0, columns=["datetime", "last_price"])
+                self.assertEqual(list(arrays.keys()), ["datetime", "last_price"])
+                self.assertTrue(np.array_equal(arrays["last_price"], dfs[format]["last_price"].to_numpy()))
+
+                export_path = os.path.join(tmp_dir, f"chunk_{format}.csv")
+                Data.export(output_path, 0, export_path)
+                self.assertEqual(len(pd.read_csv(export_path)), 1200)
+
+            self.assertTrue(dfs["npy"].equals(dfs["hdf5"].reset_index(drop=True)))
+
+            # columnar manifests are written on close, not per chunk
+            output_path = os.path.join(tmp_dir, "data_manifest")
+            with Storage.open(output_path, mode="a", format="npy") as storage:
+                for index in range(3):
+                    storage.write_chunk(index, dfs["npy"], metadata={"size": len(dfs["npy"])})
+                    self.assertEqual(ColumnarStorage.read_manifest(output_path)["chunks"], [])
+            self.assertEqual(len(ColumnarStorage.read_manifest(output_path)["chunks"]), 3)
+            with self.assertRaises(ValueError):
+                Data.publish(input_path, os.path.join(tmp_dir, "data_npy"), tick=0.5, format="hdf5")
+
+
+    def test_dataset(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "data")
+            Data.publish(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"), output_path, tick=60, format="npy")
+            Data.publish(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"), output_path, tick=0.5)
+
+            with Dataset(output_path, cache_size=1) as dataset:
+                self.assertEqual(len(dataset), 2)
+                self.assertEqual(dataset.sizes.tolist(), [41, 1200])
+                self.assertEqual(dataset.query("2025-08-05 09:05:00", "2025-08-05 09:06:00").tolist(), [0, 1])
+                self.assertEqual(dataset.query("2025-08-04 23:00:00", "2025-08-04 23:30:00").tolist(), [0])
+                self.assertEqual(dataset.query(end="2025-08-04 21:00:00").tolist(), [])
+                self.assertEqual(dataset.query("2025-08-05 09:09:59.500").tolist(), [0, 1])
+                self.assertEqual(dataset.query("2025-08-05 09:15:00").tolist(), [0])
+                self.assertEqual(dataset.sample(np.random.default_rng(0), min_size=100), 1)
+
+                # lru cache
+                data = dataset[1]
+                self.assertIs(dataset[-1], data)
+                dataset.load(0)
+                self.assertIsNot(dataset[1], data)
+
+                env = TradeEnv(
+                    account=Account(wallet=Wallet(init_cash=10000)),
+                    contract=ContractManager([utils.CONTRACRS["rb2605"]]),
+                    kline=KLineManager([KLine(code="rb2605", timestep=0.5)]),
+                    trader=CTPTrader(last_price_key="last_price"),
+                )
+                env.reset(options={"dataframes": [dataset[1]]})
+                self.assertEqual(env.engine.clock.now, pd.Timestamp("2025-08-05 09:00:00"))
+                _, _, terminated, _, _ = env.step({"name": "noop"})
+                self.assertFalse(terminated)
+                self.assertEqual(env.engine.kline.klines[0].quote.last_price, dataset.load_dataframe(1).loc[1, "last_price"])
+
+                # episodes sampled from chunk sizes, too short chunks are skipped
+                sampler = EpisodeSampler(env.engine, dataset, length=100)
+                self.assertEqual(sampler.counts.tolist(), [0, 1100])
+                options = sampler.sample(np.random.default_rng(0))
+                env.reset(options=options)
+                self.assertEqual(env.engine.kline.klines[0].cursor, options["start"])
+
+
+    def test_stream_publish(self) -> None:
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+        # an integer column with a nan row in one batch only is float in every chunk
+        df_nan = df.astype({"volume": "Int64"})
+        df_nan.loc[30, "volume"] = pd.NA
+        for data, volume_dtype in [(df, np.int64), (df_nan, np.float64)]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                data.iloc[:15].to_csv(os.path.join(tmp_dir, "part_0.csv"), index=False)
+                data.iloc[15:].to_csv(os.path.join(tmp_dir, "part_1.csv"), index=False)
+                input_path = os.path.join(tmp_dir, "part_*.csv")
+
+                Data.publish(input_path, os.path.join(tmp_dir, "memory"), tick=60, segment=True, format="npy", num_workers=1)
+                Data.publish(input_path, os.path.join(tmp_dir, "parallel"), tick=60, segment=True, format="npy", num_workers=2)
+                Data.publish(input_path, os.path.join(tmp_dir, "stream"), tick=60, segment=True, format="npy", batch_size=4)
+                with Dataset(os.path.join(tmp_dir, "memory")) as memory:
+                    for name in ["parallel", "stream"]:
+                        with Dataset(os.path.join(tmp_dir, name)) as dataset:
+                            self.assertEqual(len(dataset), 2)
+                            self.assertEqual(memory.sizes.tolist(), dataset.sizes.tolist())
+                            for i in range(len(memory)):
+                                self.assertEqual(dataset.load_dataframe(i)["volume"].dtype, volume_dtype)
+                                self.assertTrue(memory.load_dataframe(i).equals(dataset.load_dataframe(i)))
+                                self.assertEqual(memory.metadata(i), dataset.metadata(i))
+
+                    # dtypes are sampled from the head of every file, nan rows past the sample are dropped
+                    chunks = list(Data.stream_chunks(sorted(glob.glob(input_path)), tick=60, batch_size=4, sample_rows=4))
+                    self.assertEqual([len(chunk) for chunk in chunks], memory.sizes.tolist())
+                    self.assertTrue(all(chunk["volume"].dtype == np.int64 for chunk in chunks))
 
 
 if __name__ == '__main__':
@@ -1,13 +1,15 @@
-from typing import Sequence
+from typing import Sequence, Optional
 import unittest
 import os
 import sys
 import math
+import gc
+import numpy as np
 from datetime import timedelta
 import pandas as pd
 import pandas_ta as ta
-from tradegym.env import TradeEnv
-from tradegym.engine import Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine
+from tradegym.env import TradeEnv, EpisodeSampler
+from tradegym.engine import Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine, Clock, MARKET_DATA
 
 CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(CUR_DIR)
@@ -84,12 +86,249 @@ class TestKline(unittest.TestCase):
             else:
                 self.assertTrue(terminated, f"env not stop")
 
-    def make_env(self, timesteps: Sequence[float]):
+    def test_kline_event_clock(self):
+        df_tick = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv")).drop([100, 101])
+        df_minute = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+
+        # every step moves to the next bar, over missing ticks and the overnight gap
+        env = self.make_env(timesteps=[60], clock=Clock(mode="event"))
+        env.reset(options={"dataframes": [df_minute]})
+        kline = env.engine.kline.klines[0]
+        for i in range(len(df_minute) - 1):
+            self.assertEqual(kline.cursor, i)
+            self.assertEqual(env.engine.clock.now, kline.quote.datetime)
+            _, _, terminated, _, _ = env.step({"name": "noop"})
+        self.assertTrue(terminated)
+
+        # the timeline merges all klines
+        env = self.make_env(timesteps=[0.5, 60], clock=Clock(mode="event"))
+        env.reset(options={"dataframes": [df_tick, df_minute]})
+        timeline = env.engine.clock.timeline
+        self.assertEqual(len(timeline), len(pd.Index(pd.to_datetime(df_tick["datetime"])).union(pd.to_datetime(df_minute["datetime"]))))
+        steps = 0
+        while not env.terminated:
+            env.step({"name": "noop"})
+            steps += 1
+        self.assertEqual(steps, len(df_tick) - 1)
+
+        # max skip caps a jump
+        env = self.make_env(timesteps=[60], clock=Clock(mode="event", max_skip=timedelta(seconds=30)))
+        env.reset(options={"dataframes": [df_minute.iloc[:3]]})
+        start = env.engine.clock.now
+        env.step({"name": "noop"})
+        self.assertEqual((env.engine.clock.now - start, env.engine.kline.klines[0].cursor), (timedelta(seconds=30), 0))
+        env.step({"name": "noop"})
+        self.assertEqual((env.engine.clock.now - start, env.engine.kline.klines[0].cursor), (timedelta(seconds=60), 1))
+
+    def test_kline_resample(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = TradeEnv(
+            account=Account(wallet=Wallet(init_cash=10000)),
+            contract=ContractManager([utils.CONTRACRS["rb2605"]]),
+            kline=KLineManager([
+                KLine(code="rb2605", timestep=60, source=0.5),
+                KLine(code="rb2605", timestep=0.5),
+                KLine(code="rb2605", timestep=5, source=0.5),
+            ]),
+            trader=CTPTrader(last_price_key="last_price"),
+        )
+        # one tick dataframe for all timesteps
+        env.reset(options={"dataframes": [df]})
+        tick, minute, second = env.engine.kline.get_kline("rb2605"), env.engine.kline.klines[0], env.engine.kline.klines[2]
+        self.assertEqual(tick.timestep, 0.5)
+
+        # completed bars match pandas resampling
+        ticks = df.assign(datetime=pd.to_datetime(df["datetime"])).set_index("datetime")
+        expect = ticks["last_price"].resample("60s").ohlc()
+        bars = minute.builder.resampler.bars
+        self.assertEqual(len(minute), len(expect))
+        for col in ["open", "high", "low", "close"]:
+            self.assertEqual(bars.column(col).tolist(), expect[col].tolist())
+        self.assertEqual(bars.column("volume").tolist(), ticks["volume"].diff().resample("60s").sum().tolist())
+        self.assertEqual(bars.column("close_oi").tolist(), ticks["open_interest"].resample("60s").last().tolist())
+
+        # the current bar holds only ticks up to the clock
+        for i in range(200):
+            seen = ticks["last_price"].iloc[:tick.cursor + 1]
+            for kline in [minute, second]:
+                start = kline.quote.datetime
+                self.assertEqual(start, env.engine.clock.now.replace(microsecond=0) - timedelta(seconds=env.engine.clock.now.second % kline.timestep))
+                self.assertEqual(kline.quote.high, seen[start:].max())
+                self.assertEqual(kline.quote.low, seen[start:].min())
+                self.assertEqual(kline.quote.close, seen.iloc[-1])
+            if 0 < minute.cursor:
+                self.assertEqual(minute[minute.cursor - 1].close, bars.column("close")[minute.cursor - 1])
+            env.step({"name": "noop"})
+
+        # reset rebuilds the live bar from the start
+        env.reset()
+        self.assertEqual((minute.cursor, minute.quote.high), (0, df.loc[0, "last_price"]))
+        self.assertEqual(minute[1].high, bars.column("high")[1])
+
+    def test_kline_window(self):
+        env = self.make_env(timesteps=[0.5, 60])
+        df_tick = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        df_minute = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+        env.reset(options={"dataframes": [df_tick, df_minute]})
+        kline = env.engine.kline.klines[0]
+
+        # shorter near the start
+        self.assertEqual(kline.window(10, "last_price").tolist(), [df_tick.loc[0, "last_price"]])
+        for _ in range(30):
+            env.step({"name": "noop"})
+
+        # zero-copy read-only views without lookahead
+        window = kline.window(10, "last_price")
+        self.assertEqual(window.tolist(), df_tick["last_price"].iloc[kline.cursor - 9:kline.cursor + 1].tolist())
+        self.assertTrue(np.shares_memory(window, kline.data.column("last_price")))
+        with self.assertRaises(ValueError):
+            window[0] = 0.0
+        window = kline.window(10, ["datetime", "volume"])
+        self.assertEqual(list(window.keys()), ["datetime", "volume"])
+        self.assertEqual(window["datetime"][-1], kline.quote.datetime)
+
+        # all klines
+        windows = env.engine.kline.windows(5)
+        self.assertEqual([len(w["datetime"]) for w in windows], [5, 5])
+        self.assertEqual(windows[1]["close"].tolist(), df_minute["close"].iloc[env.engine.kline.klines[1].cursor - 4:env.engine.kline.klines[1].cursor + 1].tolist())
+
+    def test_kline_registry(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        raw = df.copy()
+        shuffled = df.sample(frac=1.0, random_state=0)
+        envs = [self.make_env(timesteps=[0.5]) for _ in range(3)]
+
+        # one conversion for all engines, the caller's dataframe is left untouched
+        count = len(MARKET_DATA)
+        for env in envs:
+            env.reset(options={"dataframes": [shuffled]})
+        self.assertEqual(len(MARKET_DATA), count + 1)
+        datas = [env.engine.kline.klines[0].data for env in envs]
+        self.assertTrue(all(data is datas[0] for data in datas))
+        self.assertEqual(shuffled.index.tolist(), raw.sample(frac=1.0, random_state=0).index.tolist())
+        self.assertEqual(shuffled["datetime"].dtype, raw["datetime"].dtype)
+        self.assertEqual(datas[0].column("last_price").tolist(), raw["last_price"].tolist())
+
+        # identity keyed dataframes changed in place are converted again
+        shuffled.drop(index=shuffled.index[-10:], inplace=True)
+        envs[0].reset(options={"dataframes": [shuffled]})
+        self.assertEqual(len(MARKET_DATA), count + 1)
+        self.assertEqual(len(envs[0].engine.kline.klines[0].data), len(raw) - 10)
+        self.assertEqual(len(envs[1].engine.kline.klines[0].data), len(raw))
+
+        # entries of identity keyed dataframes go with the dataframe
+        del shuffled, datas, envs
+        gc.collect()
+        self.assertEqual(len(MARKET_DATA), count)
+        envs = [self.make_env(timesteps=[0.5]) for _ in range(3)]
+
+        # named chunks, later activations are a lookup
+        chunk = ("rb2605_0805_10m_tick.csv", 0)
+        try:
+            envs[0].reset(options={"dataframes": [df], "chunks": [chunk]})
+            envs[1].reset(options={"chunks": [chunk]})
+            self.assertIs(envs[1].engine.kline.klines[0].data, MARKET_DATA.get("rb2605", 0.5, chunk))
+            self.assertEqual(envs[1].engine.kline.klines[0].to_dataframe()["last_price"].tolist(), raw["last_price"].tolist())
+            with self.assertRaises(AssertionError):
+                envs[2].reset(options={"chunks": [("missing", 0)]})
+        finally:
+            MARKET_DATA.remove("rb2605", 0.5, chunk)
+
+    def test_kline_episode(self):
+        env = self.make_env(timesteps=[0.5, 60])
+        df_tick = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        df_minute = pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))
+        tick, minute = env.engine.kline.klines
+
+        # start at a row offset and stop after length bars
+        env.reset(options={"dataframes": [df_tick, df_minute], "start": 100, "length": 50})
+        self.assertEqual(tick.cursor, 100)
+        self.assertEqual(env.engine.clock.now, pd.Timestamp(df_tick.loc[100, "datetime"]))
+        self.assertEqual(minute.quote.datetime, minute.data.datetimes[minute.data.locate(tick.data.times[100])])
+        steps, terminated = 0, False
+        while not terminated:
+            _, _, terminated, _, _ = env.step({"name": "noop"})
+            steps += 1
+        self.assertEqual((steps, tick.cursor), (50, 150))
+
+        # datetimes, reset without options keeps the data and runs to its end
+        env.reset(options={"start": "2025-08-05 09:05:00"})
+        self.assertEqual(tick.quote.datetime, pd.Timestamp("2025-08-05 09:05:00"))
+        self.assertFalse(env.engine.terminated)
+        env.reset()
+        self.assertEqual((tick.cursor, env.engine.kline.end_ns), (0, tick.data.times[-1]))
+        self.assertEqual(env.engine.kline.terminals.tolist(), [len(df_tick) - 1, len(df_minute) - 1])
+        self.assertEqual(env.engine.kline.calc_latest_start_time(), pd.Timestamp(df_tick.loc[0, "datetime"]))
+        with self.assertRaises(ValueError):
+            env.reset(options={"start": "2025-08-05 08:00:00"})
+        with self.assertRaises(IndexError):
+            env.reset(options={"start": len(df_tick)})
+
+        # sampler starts leave at least length bars
+        sampler = EpisodeSampler(env.engine, [[df_tick.copy(), df_minute]], length=100)
+        self.assertEqual(sampler.counts.tolist(), [len(df_tick) - 100])
+        rng = np.random.default_rng(0)
+        for i in range(3):
+            # data is passed only while the chunk is not activated, later resets only seek
+            options = sampler.sample(rng)
+            if i == 0:
+                self.assertIs(options["dataframes"][0], sampler.chunks[0][0])
+            else:
+                self.assertNotIn("dataframes", options)
+            env.reset(options=options)
+            self.assertIs(tick.data, sampler.chunks[0][0])
+            self.assertEqual(tick.cursor, options["start"])
+            for _ in range(99):
+                _, _, terminated, _, _ = env.step({"name": "noop"})
+                self.assertFalse(terminated)
+            _, _, terminated, _, _ = env.step({"name": "noop"})
+            self.assertTrue(terminated)
+        with self.assertRaises(AssertionError):
+            EpisodeSampler(env.engine, [[df_tick, df_minute]], length=len(df_tick))
+
+    def test_kline_quote(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        kline = KLine(code="rb2605", timestep=0.5)
+        kline.setup(df.copy())
+
+        quote = kline[10]
+        self.assertEqual(quote.last_price, df.loc[10, "last_price"])
+        self.assertEqual(quote["bid_price1"], df.loc[10, "bid_price1"])
+        self.assertEqual(quote.datetime, pd.Timestamp(df.loc[10, "datetime"]))
+        self.assertEqual(kline[-1].datetime, pd.Timestamp(df.loc[len(df)-1, "datetime"]))
+        self.assertEqual(kline.quote.datetime, pd.Timestamp(df.loc[0, "datetime"]))
+        with self.assertRaises(AttributeError):
+            quote.last_price = 0.0
+        with self.assertRaises(ValueError):
+            kline.data.column("last_price")[0] = 0.0
+
+    def test_kline_advance(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        df = df.drop([100, 101])
+        kline = KLine(code="rb2605", timestep=0.5)
+        kline.setup(df)
+        start = kline.quote.datetime
+
+        kline.reset(start + timedelta(seconds=10.2))
+        self.assertEqual(kline.cursor, 20)
+        self.assertEqual(kline.advance_to((start + timedelta(seconds=50.5)).value), 79)
+        self.assertEqual(kline.cursor, 99)
+        self.assertEqual(kline.advance_to((start + timedelta(seconds=50.5)).value), 0)
+        kline.tick(start + timedelta(seconds=51))
+        self.assertEqual(kline.cursor, 100)
+        self.assertEqual(kline.quote.datetime, start + timedelta(seconds=51))
+        with self.assertRaises(ValueError):
+            kline.tick(start)
+        with self.assertRaises(ValueError):
+            kline.reset(start - timedelta(seconds=1))
+
+    def make_env(self, timesteps: Sequence[float], clock: Optional[Clock] = None):
         return TradeEnv(
             account=Account(wallet=Wallet(init_cash=10000)),
             contract=ContractManager([utils.CONTRACRS["rb2605"]]),
             kline=KLineManager([KLine(code="rb2605", timestep=ts) for ts in timesteps]),
             trader=CTPTrader(last_price_key="last_price"),
+            clock=clock,
         )
     
 
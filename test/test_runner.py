@@ -0,0 +1,136 @@
+import unittest
+import tempfile
+import os
+import sys
+import numpy as np
+import pandas as pd
+from tradegym.env import TradeEnv, TradeEnvRunner, EpisodeRecorder, EpisodeReplayer
+from tradegym.engine import Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine, SharedKLineData
+
+CUR_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(CUR_DIR)
+
+import utils
+
+
+def make_env() -> TradeEnv:
+    return TradeEnv(
+        account=Account(wallet=Wallet(init_cash=10000)),
+        contract=ContractManager([utils.CONTRACRS["rb2605"]]),
+        kline=KLineManager([KLine(code="rb2605", timestep=0.5)]),
+        trader=CTPTrader(last_price_key="last_price"),
+    )
+
+
+def open_once(env: TradeEnv, obs):
+    if env.engine.kline.klines[0].cursor == 0:
+        quote = env.engine.kline.get_kline("rb2605").quote
+        return {"name": "open", "code": "rb2605", "side": "long", "price": float(quote.last_price), "volume": 1}
+    return {"name": "noop"}
+
+
+class TestRunner(unittest.TestCase):
+
+    def test_shared_kline(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        with SharedKLineData.from_dataframe(df.copy()) as shared:
+            data = SharedKLineData.attach(shared.handle)
+            kline = KLine(code="rb2605", timestep=0.5)
+            kline.attach(data)
+            self.assertEqual(len(kline), len(df))
+            self.assertEqual(kline[5].last_price, df.loc[5, "last_price"])
+            self.assertEqual(kline[5].datetime, pd.Timestamp(df.loc[5, "datetime"]))
+            del kline, data
+
+    def test_runner_run(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        market = [SharedKLineData.from_dataframe(df)]
+        with TradeEnvRunner(make_env, open_once, market, num_workers=2, context="fork", own_market=True) as runner:
+            records = runner.run(num_episodes=3)
+        self.assertEqual(len(records), 3 * (len(df) - 1))
+        for episode in range(3):
+            steps = records[records["episode"] == episode]
+            np.testing.assert_array_equal(steps["step"], np.arange(len(df) - 1))
+            self.assertTrue(steps["terminated"][-1])
+            self.assertEqual(steps["terminated"].sum(), 1)
+            self.assertGreater(steps["margin"][0], 0)
+        np.testing.assert_array_equal(records["datetime"][:len(df) - 1], records["datetime"][len(df) - 1:2 * (len(df) - 1)])
+
+    def test_runner_options(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        market = [SharedKLineData.from_dataframe(df)]
+        starts = pd.to_datetime(df["datetime"]).to_numpy().astype("datetime64[ns]").astype(np.int64)
+        with TradeEnvRunner(make_env, open_once, market, num_workers=2, context="fork", own_market=True) as runner:
+            records = runner.run(num_episodes=2, options={"start": 100, "length": 50})
+            self.assertEqual(len(records), 2 * 50)
+            self.assertEqual(records["datetime"][0], starts[101])
+            records = runner.run(num_episodes=2, options=[{"start": 10, "length": 5}, None])
+        self.assertEqual(records["episode"].tolist(), [2] * 5 + [3] * (len(df) - 1))
+        self.assertEqual(records["datetime"][0], starts[11])
+
+
+    def test_recorder(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = EpisodeRecorder(make_env(), tmp_dir, capacity=16, checkpoint_every=10)
+            engine = env.engine
+            states = []
+            for episode in range(2):
+                env.reset(options={"dataframes": [df], "start": 0, "length": 40})
+                states.append((engine.account.wallet.cash, engine.kline.cursors().tolist()))
+                terminated, step = False, 0
+                while not terminated:
+                    price = float(engine.kline.get_kline("rb2605").quote.last_price)
+                    if step == 20:
+                        action = {"name": "batch", "orders": [{"code": "rb2605", "type": "open", "side": "short", "price": price, "volume": 1}]}
+                    elif step % 7 == 3:
+                        action = {"name": "open", "code": "rb2605", "side": "long", "price": price, "volume": 1}
+                    elif step % 7 == 6:
+                        action = {"name": "close", "code": "rb2605", "side": "long", "price": price}
+                    else:
+                        action = {"name": "noop"}
+                    _, _, terminated, _, _ = env.step(action)
+                    states.append((engine.account.wallet.cash, engine.kline.cursors().tolist()))
+                    step += 1
+            env.close()
+
+            replayer = EpisodeReplayer(tmp_dir)
+            self.assertEqual((len(replayer), replayer.num_episodes), (82, 2))
+            self.assertEqual(os.path.getsize(os.path.join(tmp_dir, "records.bin")), 82 * replayer.dtype.itemsize)
+            records = replayer.episode(1)
+            self.assertEqual(records["step"].tolist(), list(range(41)))
+            self.assertEqual([(cash, cursors.tolist()) for cash, cursors in zip(replayer.records["wallet_cash"], replayer.records["cursors"])], states)
+            self.assertTrue(records["terminated"][-1])
+
+            # fills
+            opens = records[records["action"] == 2]
+            # the open after the batch short lacks cash
+            self.assertEqual(opens["trade_success"].tolist(), [True, True, True, False, True, True])
+            filled = opens[opens["trade_success"]]
+            self.assertTrue(np.all(filled["trade_margin"] > 0))
+            self.assertTrue(np.all(filled["trade_commission"] > 0))
+            self.assertTrue(np.isnan(records["trade_price"][records["action"] == 1]).all())
+
+            # table export without simulation
+            table = replayer.to_dataframe()
+            self.assertEqual(len(table), 82)
+            self.assertEqual(table["action"].iloc[0], "reset")
+            self.assertEqual(table["action"].iloc[21], "batch")
+            self.assertEqual(table["datetime"].iloc[1], pd.Timestamp(df.loc[1, "datetime"]))
+            self.assertIn("unrealized_pnl.0", table.columns)
+
+            # seek rebuilds the engine from checkpoints
+            target = make_env().engine
+            target.activate([df])
+            target.reset()
+            for index in [0, 5, 19, 25, 40, 45, 81, 33]:
+                replayer.seek(target, index)
+                record = replayer.records[index]
+                self.assertEqual(target.kline.cursors().tolist(), record["cursors"].tolist())
+                self.assertAlmostEqual(target.account.wallet.cash, record["wallet_cash"])
+                self.assertAlmostEqual(target.account.wallet.margin, record["wallet_margin"])
+                self.assertAlmostEqual(target.account.wallet.unrealized_pnl, record["unrealized_pnl"].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
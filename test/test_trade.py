@@ -1,10 +1,14 @@
-from typing import Sequence, Optional
+from typing import Sequence, Optional, ClassVar
 import unittest
+import copy
 import os
 import sys
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
 import pandas as pd
 from tradegym.env import TradeEnv, Observation
-from tradegym.engine import Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine
+from tradegym.engine import Account, Wallet, ContractManager, KLineManager, Trader, CTPTrader, KLine, TradeInfo, CommisionInfo, Commission, FreeCommission, Formula, Order, SIDE_CODES, TYPE_CODES
 
 CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(CUR_DIR)
@@ -57,13 +61,406 @@ class TestTrade(unittest.TestCase):
         self.assertTrue(obs.success, "slippage price is not correct")
             
     
+    def test_trade_close(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = self.make_env(timesteps=[0.5], init_cash=100000)
+        env.reset(options={"dataframes": [df]})
+        portfolio, wallet = env.engine.account.portfolio, env.engine.account.wallet
+
+        for side, volume in [("long", 1), ("long", 2), ("short", 1)]:
+            price = env.engine.kline.get_kline("rb2605").quote.last_price
+            obs, _, _, _, _ = env.step({"name": "open", "code": "rb2605", "side": side, "price": price, "volume": volume})
+            self.assertTrue(obs.success, obs.trade_info.error)
+        first, second, short = portfolio.positions
+        self.assertEqual(len(portfolio.opened_positions), 3)
+        self.assertEqual(portfolio.get_opened_positions("rb2605", "long"), [first, second])
+
+        # net position book
+        book = portfolio.book.get("rb2605", "long")
+        self.assertEqual(book.volume, 3)
+        self.assertAlmostEqual(book.avg_price, (first.price + second.price * 2) / 3)
+        last_price = env.engine.kline.get_kline("rb2605").quote.last_price
+        multiplier = utils.CONTRACRS["rb2605"].multiplier
+        expect = sum(
+            Formula.position_unrealized_pnl(p.price, p.current_volume, p.side, multiplier, last_price)
+            for p in portfolio.opened_positions
+        )
+        self.assertAlmostEqual(wallet.unrealized_pnls["rb2605"], expect)
+
+        # close first in first out
+        cash, margin = wallet.cash, wallet.margin
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price, "volume": 2})
+        info = obs.trade_info
+        self.assertTrue(info.success, info.error)
+        self.assertEqual(info.type, "close")
+        self.assertEqual(info.positions, [first.id, second.id])
+        self.assertEqual(info.volumes, [1, 1])
+        self.assertTrue(first.closed)
+        self.assertEqual((second.current_volume, second.closed_volume), (1, 1))
+        self.assertEqual(portfolio.query(code="rb2605", side="long", status="opened"), [second])
+        self.assertEqual(portfolio.query(status="closed"), [first])
+        self.assertEqual(portfolio.query(id=[short.id, first.id]), [short, first])
+
+        released = first.margin + second.released_margin
+        pnl = sum(close.realized_pnl for close in first.closes + second.closes)
+        commission = sum(c.total_fee for c in info.commissions)
+        self.assertAlmostEqual(info.margin, released)
+        self.assertAlmostEqual(wallet.margin, margin - released)
+        self.assertAlmostEqual(wallet.cash, cash + released + pnl - commission)
+
+        # close the rest
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price, "volume": 2})
+        self.assertFalse(obs.trade_info.success)
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price})
+        self.assertTrue(obs.trade_info.success, obs.trade_info.error)
+        self.assertAlmostEqual(second.position_margin, 0.0)
+        self.assertEqual(portfolio.opened_positions, [short])
+        self.assertIsNone(portfolio.book.get("rb2605", "long"))
+        self.assertEqual(portfolio.book.get("rb2605", "short").volume, 1)
+        self.assertAlmostEqual(wallet.margin, short.margin)
+
+        # ledger
+        df = env.engine.account.ledger.to_dataframe()
+        self.assertEqual(df["type"].tolist(), ["open"] * 3 + ["close"] * 3)
+        self.assertEqual(df["position"].tolist(), [0, 1, 2, 0, 1, 1])
+        self.assertEqual(df["volume"].tolist(), [1, 2, 1, 1, 1, 1])
+        self.assertEqual(df.loc[0, "datetime"], first.date)
+        self.assertAlmostEqual(df["realized_pnl"].sum(), sum(c.realized_pnl for p in portfolio.positions for c in p.closes))
+        self.assertAlmostEqual(df["commission"].sum(), sum(p.total_commission for p in portfolio.positions))
+        margins = df["margin"].to_numpy() * (1 - 2 * df["type"].cat.codes.to_numpy())
+        self.assertAlmostEqual(margins.sum(), wallet.margin)
+
+        # indexes are rebuilt on deserialize
+        copied = type(portfolio).deserialize(portfolio.model_dump())
+        self.assertEqual([p.id for p in copied.opened_positions], [short.id])
+        self.assertEqual(copied.positions[1].closed_volume, 2)
+
+    def test_trade_batch(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = self.make_env(timesteps=[0.5], init_cash=100000)
+        env.reset(options={"dataframes": [df]})
+        portfolio, wallet = env.engine.account.portfolio, env.engine.account.wallet
+
+        # all orders fill in the same tick
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        now, cash = env.engine.clock.now, wallet.cash
+        orders = [
+            {"code": "rb2605", "type": "open", "side": "long", "price": price, "volume": 2},
+            {"code": "rb2605", "type": "open", "side": "short", "price": price, "volume": 1},
+        ]
+        obs, _, _, _, _ = env.step({"name": "batch", "orders": orders})
+        batch = obs.batch_info
+        self.assertTrue(obs.success, obs.error)
+        self.assertEqual(batch.date, now)
+        self.assertEqual([p.date for p in portfolio.positions], [now, now])
+        self.assertAlmostEqual(batch.margin, wallet.margin)
+        self.assertAlmostEqual(wallet.cash, cash - batch.margin - batch.commission)
+
+        # all or nothing, the second close exceeds the volume left by the first
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        orders = [
+            {"code": "rb2605", "type": "close", "side": "long", "price": price, "volume": 1},
+            {"code": "rb2605", "type": "close", "side": "long", "price": price, "volume": 2},
+        ]
+        cash, margin = wallet.cash, wallet.margin
+        obs, _, _, _, _ = env.step({"name": "batch", "orders": orders})
+        self.assertFalse(obs.success)
+        self.assertTrue(obs.error.startswith("Order 1"), obs.error)
+        self.assertEqual(len(env.engine.account.ledger), 2)
+        self.assertEqual((wallet.cash, wallet.margin), (cash, margin))
+
+        # margin released by a close funds an open of the same batch
+        long, short = portfolio.positions
+        with wallet.writable():
+            wallet.cash = long.margin / 4
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        orders = [
+            {"code": "rb2605", "type": "close", "side": "long", "price": price},
+            {"code": "rb2605", "type": "open", "side": "long", "price": price, "volume": 1},
+        ]
+        self.assertFalse(env.engine.trader.try_submit_batch([Order.deserialize(orders[1])]).success)
+        obs, _, _, _, _ = env.step({"name": "batch", "orders": orders})
+        self.assertTrue(obs.success, obs.error)
+        self.assertTrue(long.closed)
+        self.assertEqual([p.id for p in portfolio.opened_positions], [short.id, portfolio.positions[-1].id])
+        self.assertEqual(env.engine.account.ledger.column("type").tolist(), [0, 0, 1, 0])
+
+        # realized losses of closes count against the cash of the batch
+        long = portfolio.positions[-1]
+        with wallet.writable():
+            wallet.cash = long.margin / 4
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        orders = [
+            {"code": "rb2605", "type": "close", "side": "long", "price": price - 500},
+            {"code": "rb2605", "type": "open", "side": "long", "price": price, "volume": 1},
+        ]
+        obs, _, _, _, _ = env.step({"name": "batch", "orders": orders})
+        self.assertFalse(obs.success)
+        self.assertTrue(obs.error.startswith("Not enough available cash"), obs.error)
+        self.assertTrue(long.opened)
+
+        # opens without volume are rejected, not raised
+        orders = [{"code": "rb2605", "type": "open", "side": "long", "price": price + 100}]
+        obs, _, _, _, _ = env.step({"name": "batch", "orders": orders})
+        self.assertFalse(obs.success)
+        self.assertTrue(obs.error.startswith("Order 0"), obs.error)
+        info = env.engine.trader.try_open("rb2605", "long", price + 100, 0)
+        self.assertFalse(info.success)
+
+        # traders without a batch implementation run the orders one by one
+        self.assertEqual(Trader.__abstractmethods__, {"try_open", "try_close", "open", "close"})
+        trader = env.engine.trader
+        with wallet.writable():
+            wallet.cash = 100000
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        open_order = Order(code="rb2605", type="open", side="short", price=price, volume=1)
+        close_order = Order(code="rb2605", type="close", side="short", price=price, volume=2)
+        self.assertTrue(Trader.try_submit_batch(trader, [open_order, close_order.model_copy(update={"volume": 1})]).success)
+        count = len(portfolio.opened_positions)
+        batch = Trader.submit_batch(trader, [open_order])
+        self.assertTrue(batch.success, batch.error)
+        self.assertEqual(len(portfolio.opened_positions), count + 1)
+        self.assertAlmostEqual(batch.margin, portfolio.positions[-1].margin)
+        self.assertAlmostEqual(batch.commission, batch.infos[0].commissions[0].total_fee)
+        # fills before the failed order are kept
+        batch = Trader.submit_batch(trader, [close_order, close_order])
+        self.assertFalse(batch.success)
+        self.assertTrue(batch.error.startswith("Order 1"), batch.error)
+        self.assertEqual(len(portfolio.opened_positions), count - 1)
+
+    def test_commission_batch(self):
+        contract = utils.CONTRACRS["rb2605"]
+        commission = contract.commission.model_copy(update={"ex_close_fee_rate": 0.0, "bk_close_fee_adv": 0.02})
+        now = datetime(2025, 8, 5, 14)
+        engine = SimpleNamespace(clock=SimpleNamespace(now=now))
+        prices = [3296.0, 3300.0, 3301.0, 3290.0]
+        volumes = [1, 2, 3, 4]
+        types = ["open", "close", "close", "close"]
+        open_dates = [None, datetime(2025, 8, 5, 9), datetime(2025, 8, 4, 21), datetime(2025, 7, 5, 9)]
+
+        exchange_fees, broker_fees = commission.batch(contract, prices, volumes, types, open_dates, now)
+        for i in range(len(prices)):
+            position = None if open_dates[i] is None else SimpleNamespace(date=open_dates[i])
+            info = commission(engine=engine, contract=contract, price=prices[i], volume=volumes[i], type=types[i], side="long", position=position)
+            self.assertAlmostEqual(exchange_fees[i], info.exchange_fee)
+            self.assertAlmostEqual(broker_fees[i], info.broker_fee)
+        # overnight rates apply to positions opened on any earlier date
+        self.assertEqual(broker_fees.tolist()[1:], [0.02, 0.06, 0.08])
+
+        exchange_fees, broker_fees = FreeCommission().batch(contract, prices, 1, "open")
+        self.assertEqual((exchange_fees.shape, broker_fees.sum()), ((4,), 0.0))
+
+        # subclasses without a vectorized batch fall back to calling each fill
+        class PerFillCommission(Commission):
+            Name: ClassVar[str] = "test_per_fill"
+
+            def __call__(self, engine, contract, price, volume, type, side, position=None):
+                overnight = position is not None and position.date.date() < engine.clock.now.date()
+                return CommisionInfo(exchange_fee=price * volume * 1e-4, broker_fee=float(overnight) if side == "long" else 0.0)
+
+        exchange_fees, broker_fees = PerFillCommission().batch(contract, prices, volumes, types, open_dates, now, "long")
+        self.assertEqual(exchange_fees.tolist(), [p * v * 1e-4 for p, v in zip(prices, volumes)])
+        self.assertEqual(broker_fees.tolist(), [0.0, 0.0, 1.0, 1.0])
+        exchange_fees, broker_fees = PerFillCommission().batch(contract, np.array(prices), 1, "open", sides="short")
+        self.assertEqual((exchange_fees.shape, broker_fees.sum()), ((4,), 0.0))
+
+    def test_commission_custom(self):
+        # closes give the real engine and positions to commissions without a vectorized batch
+        class PositionCommission(Commission):
+            Name: ClassVar[str] = "test_position"
+
+            def __call__(self, engine, contract, price, volume, type, side, position=None):
+                opened = 0.0 if position is None else position.price * position.volume
+                return CommisionInfo(exchange_fee=1e-4 * opened, broker_fee=1e-6 * engine.kline.get_kline(contract.code).quote.last_price)
+
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        contract = utils.CONTRACRS["rb2605"].model_copy(update={"commission": PositionCommission()})
+        env = TradeEnv(
+            account=Account(wallet=Wallet(init_cash=100000)),
+            contract=ContractManager([contract]),
+            kline=KLineManager([KLine(code="rb2605", timestep=0.5)]),
+            trader=CTPTrader(last_price_key="last_price"),
+        )
+        env.reset(options={"dataframes": [df]})
+        for volume in [1, 2]:
+            price = env.engine.kline.get_kline("rb2605").quote.last_price
+            obs, _, _, _, _ = env.step({"name": "open", "code": "rb2605", "side": "long", "price": price, "volume": volume})
+            self.assertTrue(obs.success, obs.trade_info.error)
+        prices = [position.price for position in env.engine.account.portfolio.positions]
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price, "volume": 3})
+        self.assertTrue(obs.success, obs.trade_info.error)
+        fees = [c.exchange_fee for c in obs.trade_info.commissions]
+        self.assertEqual(len(fees), 2)
+        for fee, expected in zip(fees, [1e-4 * prices[0] * 1, 1e-4 * prices[1] * 2]):
+            self.assertAlmostEqual(fee, expected)
+        self.assertEqual([c.broker_fee for c in obs.trade_info.commissions], [1e-6 * price] * 2)
+
+    def test_pricing_kernel(self):
+        contract = utils.CONTRACRS["rb2605"]
+        kernel = ContractManager([contract]).get_contract("rb2605").kernel
+        multiplier, margin_rate, tick_size = contract.multiplier, contract.margin_rate, contract.tick_size
+
+        prices, volumes, last_prices = [3296.0, 3301.5, 3288.0, 3310.0], [1, 2, 3, 4], [3300.0, 3299.0, 3290.5, 3305.0]
+        sides, types = ["long", "short", "long", "short"], ["open", "open", "close", "close"]
+        side_codes = np.array([SIDE_CODES[side] for side in sides])
+        type_codes = np.array([TYPE_CODES[type] for type in types])
+        for i in range(len(prices)):
+            price, volume, last_price, side, type = prices[i], volumes[i], last_prices[i], sides[i], types[i]
+            self.assertEqual(kernel.margin(price, volume), Formula.contract_margin(price, volume, multiplier, margin_rate))
+            self.assertEqual(kernel.notional_value(price, volume), Formula.contract_notional_value(price, volume, multiplier))
+            self.assertEqual(
+                kernel.unrealized_pnl(price, volume, side_codes[i], last_price),
+                Formula.position_unrealized_pnl(price, volume, side, multiplier, last_price)
+            )
+            self.assertEqual(
+                kernel.net_unrealized_pnl(price * volume, volume, side_codes[i], last_price),
+                Formula.net_position_unrealized_pnl(price * volume, volume, side, multiplier, last_price)
+            )
+            self.assertEqual(
+                kernel.realized_pnl(price, last_price, volume, side_codes[i]),
+                Formula.position_realized_pnl(price, last_price, volume, side, multiplier)
+            )
+            self.assertEqual(
+                kernel.slippage_price(last_price, type_codes[i], side_codes[i], 2),
+                Formula.trade_slippage_price(2, last_price, type, side, tick_size)
+            )
+
+        # vectorized kernels match the scalar ones
+        prices, volumes, last_prices = np.array(prices), np.array(volumes), np.array(last_prices)
+        np.testing.assert_allclose(kernel.margins(prices, volumes), [kernel.margin(p, v) for p, v in zip(prices, volumes)])
+        np.testing.assert_allclose(
+            kernel.unrealized_pnls(prices, volumes, side_codes, last_prices),
+            [kernel.unrealized_pnl(*args) for args in zip(prices, volumes, side_codes, last_prices)]
+        )
+        np.testing.assert_allclose(
+            kernel.realized_pnls(prices, last_prices, volumes, side_codes),
+            [kernel.realized_pnl(*args) for args in zip(prices, last_prices, volumes, side_codes)]
+        )
+        np.testing.assert_allclose(
+            kernel.slippage_prices(last_prices, type_codes, side_codes, 2),
+            [kernel.slippage_price(p, t, s, 2) for p, t, s in zip(last_prices, type_codes, side_codes)]
+        )
+
+    def test_trade_snapshot(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = self.make_env(timesteps=[0.5], init_cash=100000)
+        env.reset(options={"dataframes": [df]})
+        engine = env.engine
+        portfolio, wallet, ledger = engine.account.portfolio, engine.account.wallet, engine.account.ledger
+
+        for side, volume in [("long", 2), ("short", 1)]:
+            price = engine.kline.get_kline("rb2605").quote.last_price
+            obs, _, _, _, _ = env.step({"name": "open", "code": "rb2605", "side": side, "price": price, "volume": volume})
+            self.assertTrue(obs.success, obs.trade_info.error)
+        price = engine.kline.get_kline("rb2605").quote.last_price
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price, "volume": 1})
+        self.assertTrue(obs.success, obs.trade_info.error)
+
+        snapshot = engine.snapshot()
+        state = (engine.clock.now, engine.kline.cursors().tolist(), wallet.cash, wallet.margin, dict(wallet.unrealized_pnls), len(ledger))
+        opened = [(p.id, p.side, p.price, p.current_volume, p.position_margin) for p in portfolio.opened_positions]
+        self.assertEqual(len(snapshot), 2)
+
+        # diverge
+        for _ in range(3):
+            price = engine.kline.get_kline("rb2605").quote.last_price
+            env.step({"name": "close", "code": "rb2605", "side": "short", "price": price})
+            env.step({"name": "open", "code": "rb2605", "side": "long", "price": price, "volume": 1})
+        self.assertNotEqual(engine.kline.cursors().tolist(), state[1])
+
+        engine.restore(snapshot)
+        self.assertEqual(
+            (engine.clock.now, engine.kline.cursors().tolist(), wallet.cash, wallet.margin, dict(wallet.unrealized_pnls), len(ledger)),
+            state,
+        )
+        self.assertEqual([(p.id, p.side, p.price, p.current_volume, p.position_margin) for p in portfolio.opened_positions], opened)
+        self.assertEqual(portfolio.book.get("rb2605", "long").volume, 1)
+        self.assertEqual(portfolio.book.get("rb2605", "short").volume, 1)
+
+        # restored positions close like the originals
+        long = portfolio.get_opened_positions("rb2605", "long")[0]
+        cash, margin = wallet.cash, wallet.margin
+        price = engine.kline.get_kline("rb2605").quote.last_price
+        obs, _, _, _, _ = env.step({"name": "close", "code": "rb2605", "side": "long", "price": price})
+        info = obs.trade_info
+        self.assertTrue(info.success, info.error)
+        self.assertTrue(long.closed)
+        self.assertAlmostEqual(info.margin, opened[0][4])
+        pnl = sum(c.realized_pnl for c in long.closes)
+        commission = sum(c.total_fee for c in info.commissions)
+        self.assertAlmostEqual(wallet.margin, margin - info.margin)
+        self.assertAlmostEqual(wallet.cash, cash + info.margin + pnl - commission)
+        self.assertEqual(ledger.to_dataframe()["position"].tolist()[-1], long.ledger_id)
+
+    def test_trade_snapshot_fork(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = self.make_env(timesteps=[0.5], init_cash=100000)
+        env.reset(options={"dataframes": [df], "start": 0, "length": 10})
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        env.step({"name": "open", "code": "rb2605", "side": "long", "price": price, "volume": 1})
+        snapshot = env.engine.snapshot()
+
+        # the source engine moves on and starts a new episode, overwriting its ledger
+        env.reset(options={"start": 100})
+        env.step({"name": "open", "code": "rb2605", "side": "short", "price": price, "volume": 2})
+
+        # fork into a separate engine keeps the episode length and the ledger rows of the snapshot
+        fork = self.make_env(timesteps=[0.5], init_cash=100000)
+        fork.reset(options={"dataframes": [df]})
+        fork.engine.restore(snapshot)
+        ledger = fork.engine.account.ledger
+        self.assertEqual(len(ledger), 1)
+        position = fork.engine.account.portfolio.opened_positions[0]
+        self.assertEqual((ledger.column("side")[position.ledger_id], ledger.column("volume")[position.ledger_id]), (0, 1))
+
+        steps, terminated = 0, False
+        while not terminated:
+            price = fork.engine.kline.get_kline("rb2605").quote.last_price
+            action = {"name": "close", "code": "rb2605", "side": "long", "price": price} if steps == 0 else {"name": "noop"}
+            obs, _, terminated, _, _ = fork.step(action)
+            steps += 1
+        self.assertEqual(steps, 9)
+        df_ledger = ledger.to_dataframe()
+        self.assertEqual(df_ledger["type"].tolist(), ["open", "close"])
+        self.assertEqual(df_ledger["position"].tolist(), [0, 0])
+
+    def test_trade_trusted(self):
+        kwargs = {
+            "date": datetime(2025, 8, 5, 9), "code": "rb2605", "type": "open", "side": "long", "price": 3296.0,
+            "success": True, "volume": 1, "commissions": [CommisionInfo.trusted(exchange_fee=3.296, broker_fee=0.01)],
+        }
+        trusted, validated = TradeInfo.trusted(**kwargs), TradeInfo(**kwargs)
+        self.assertEqual(trusted.serialize(), validated.serialize())
+        self.assertEqual(TradeInfo.deserialize(trusted.serialize()), validated)
+        self.assertIsNone(trusted.margin)
+        with self.assertRaises(AttributeError):
+            trusted.price = 0.0
+        with trusted.writable():
+            with trusted.writable():
+                trusted.price = 1.0
+            trusted.volume = 2
+        with self.assertRaises(AttributeError):
+            trusted.price = 0.0
+        self.assertEqual((trusted.price, trusted.volume), (1.0, 2))
+
+        # copies of an object whose writable context was used get their own
+        for copied in [trusted.model_copy(), copy.copy(trusted), copy.deepcopy(trusted)]:
+            with copied.writable():
+                copied.price = 5.0
+            with self.assertRaises(AttributeError):
+                copied.price = 0.0
+            self.assertEqual((copied.price, trusted.price), (5.0, 1.0))
+
     def make_env(
         self, 
         timesteps: Sequence[float], 
-        slippage: Optional[float] = None
+        slippage: Optional[float] = None,
+        init_cash: float = 10000,
     ):
         return TradeEnv(
-            account=Account(wallet=Wallet(init_cash=10000)),
+            account=Account(wallet=Wallet(init_cash=init_cash)),
             contract=ContractManager([utils.CONTRACRS["rb2605"]]),
             kline=KLineManager([KLine(code="rb2605", timestep=ts) for ts in timesteps]),
             trader=CTPTrader(last_price_key="last_price", slippage=slippage),
@@ -0,0 +1,145 @@
+from typing import Sequence, Optional
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+from gymnasium.vector.utils import batch_space
+from tradegym.env import TradeVectorEnv, TradeEnv, EncodeObservation
+from tradegym.engine import TradeEngine, Account, Wallet, ContractManager, KLineManager, CTPTrader, KLine
+
+CUR_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(CUR_DIR)
+
+import utils
+
+
+class TestVector(unittest.TestCase):
+
+    def test_vector_run(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        num_envs = 4
+        env = TradeVectorEnv(lambda: self.make_engine(timesteps=[0.5, 60]), num_envs)
+        obs, _ = env.reset(options={"dataframes": [df, pd.read_csv(os.path.join(CUR_DIR, "data", "rb605_0804_0805_minute.csv"))]})
+        self.assertEqual(obs["last_price"].shape, (num_envs, 1))
+
+        # open long in env 1 only
+        actions = self.noop(num_envs)
+        actions["type"][1] = 1
+        actions["price"][:] = obs["last_price"][:, 0]
+        actions["volume"][:] = 2
+        obs, rewards, terminated, _, _ = env.step(actions)
+        self.assertEqual(obs["position"][1, 0, 0], 2)
+        self.assertEqual(obs["position"][0].sum(), 0)
+        self.assertTrue(np.all(obs["success"] == 1))
+
+        steps = 1
+        while not terminated.any():
+            obs, rewards, terminated, _, _ = env.step(self.noop(num_envs))
+            steps += 1
+        self.assertEqual(steps, len(df) - 1)
+        self.assertTrue(terminated.all())
+
+        # vectorized state matches the engine computation
+        engine = env.sync(1)
+        self.assertEqual(engine.kline.klines[0].cursor, len(df) - 1)
+        engine.update_unrealized_pnls()
+        self.assertAlmostEqual(engine.account.wallet.unrealized_pnl, obs["unrealized_pnl"][1].sum())
+        self.assertEqual(obs["unrealized_pnl"][0].sum(), 0.0)
+
+        # autoreset
+        obs, rewards, terminated, _, _ = env.step(self.noop(num_envs))
+        self.assertFalse(terminated.any())
+        self.assertTrue(np.all(obs["cash"] == 10000))
+        self.assertTrue(np.all(rewards == 0))
+
+    def test_vector_episode(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        num_envs = 2
+        env = TradeVectorEnv(lambda: self.make_engine(timesteps=[0.5]), num_envs)
+        obs, _ = env.reset(options={"dataframes": [df], "start": 10, "length": 20})
+        self.assertTrue(np.all(obs["datetime"] == pd.Timestamp(df.loc[10, "datetime"]).value))
+
+        steps, terminated = 0, np.zeros(num_envs, dtype=np.bool_)
+        while not terminated.any():
+            obs, _, terminated, _, _ = env.step(self.noop(num_envs))
+            steps += 1
+        self.assertEqual(steps, 20)
+        self.assertTrue(terminated.all())
+
+        # autoreset goes back to the start
+        obs, _, _, _, _ = env.step(self.noop(num_envs))
+        self.assertTrue(np.all(obs["datetime"] == pd.Timestamp(df.loc[10, "datetime"]).value))
+
+    def test_vector_sync_resampled(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        klines = lambda: [KLine(code="rb2605", timestep=0.5), KLine(code="rb2605", timestep=60, source=0.5)]
+        env = TradeVectorEnv(lambda: self.make_engine(timesteps=[], klines=klines()), 2)
+        env.reset(options={"dataframes": [df]})
+        serial = self.make_engine(timesteps=[], klines=klines())
+        serial.activate([df])
+        serial.reset()
+        for _ in range(150):
+            env.step(self.noop(2))
+            serial.tick()
+
+        # the live bar holds only ticks up to the clock
+        engine = env.sync(0)
+        minute, expect = engine.kline.klines[1], serial.kline.klines[1]
+        self.assertEqual(engine.kline.cursors().tolist(), serial.kline.cursors().tolist())
+        self.assertEqual(minute.builder.row, expect.builder.row)
+        for key in ["open", "high", "low", "close", "volume"]:
+            self.assertEqual(minute.quote[key], expect.quote[key])
+        self.assertEqual(minute.quote.close, engine.kline.klines[0].quote.last_price)
+        with self.assertRaises(ValueError):
+            minute.seek(0)
+
+    def test_encoder(self):
+        df = pd.read_csv(os.path.join(CUR_DIR, "data", "rb2605_0805_10m_tick.csv"))
+        env = TradeEnv(engine=self.make_engine(timesteps=[0.5]))
+        wrapped = EncodeObservation(env, copy=False, window=4, columns=["last_price", "volume"])
+        obs, _ = wrapped.reset(options={"dataframes": [df]})
+        self.assertTrue(wrapped.observation_space.contains(obs))
+        self.assertEqual(obs["window"].shape, (1, 4, 2))
+        # padded with the first row
+        self.assertEqual(obs["window"][0, :, 0].tolist(), [df.loc[0, "last_price"]] * 4)
+
+        price = env.engine.kline.get_kline("rb2605").quote.last_price
+        buffers, (obs, _, _, _, info) = obs, wrapped.step({"name": "open", "code": "rb2605", "side": "long", "price": price, "volume": 2})
+        self.assertIs(obs["window"], buffers["window"])
+        self.assertTrue(info["observation"].success)
+        self.assertEqual(obs["window"][0, :, 0].tolist(), [df.loc[0, "last_price"]] * 3 + [df.loc[1, "last_price"]])
+        self.assertEqual((obs["position"][0, 0], obs["avg_price"][0, 0]), (2, price))
+        self.assertEqual(float(obs["cash"]), env.engine.account.wallet.cash)
+        self.assertEqual(float(obs["unrealized_pnl"][0]), env.engine.account.wallet.unrealized_pnl)
+        self.assertEqual(int(obs["success"]), 1)
+        obs, _, _, _, _ = wrapped.step({"name": "close", "code": "rb2605", "side": "short", "price": price})
+        self.assertEqual(int(obs["success"]), 0)
+
+        # rows of batched buffers
+        batch = wrapped.encoder.allocate(3)
+        wrapped.encoder.encode(out=batch, index=1)
+        self.assertTrue(batch_space(wrapped.observation_space, 3).contains(batch))
+        self.assertEqual(batch["cash"].tolist(), [0.0, env.engine.account.wallet.cash, 0.0])
+        self.assertEqual(batch["window"][1].tolist(), obs["window"].tolist())
+
+    def noop(self, num_envs: int):
+        return {
+            "type": np.zeros(num_envs, dtype=np.int64),
+            "code": np.zeros(num_envs, dtype=np.int64),
+            "side": np.zeros(num_envs, dtype=np.int64),
+            "price": np.zeros(num_envs, dtype=np.float64),
+            "volume": np.zeros(num_envs, dtype=np.int64),
+        }
+
+    def make_engine(self, timesteps: Sequence[float], klines: Optional[Sequence[KLine]] = None):
+        return TradeEngine(
+            account=Account(wallet=Wallet(init_cash=10000)),
+            contract=ContractManager([utils.CONTRACRS["rb2605"]]),
+            kline=KLineManager([KLine(code="rb2605", timestep=ts) for ts in timesteps] + list(klines or [])),
+            trader=CTPTrader(last_price_key="last_price"),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import argparse
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tradegym.data import ETL
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='bench_etl', description="benchmark ETL.align_time and ETL.padding against the row-wise implementations")
+    parser.add_argument('-n', '--rows', type=int, default=1_000_000, help='number of tick rows')
+    parser.add_argument('-t', '--tick', type=float, default=0.5, help='tick in seconds')
+    parser.add_argument('--legacy-rows', type=int, default=None, help='rows for the row-wise implementations, timings are scaled to --rows (default --rows)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--target', type=float, default=50.0, help='required speedup over the row-wise implementations')
+    return parser.parse_args()
+
+
+def make_ticks(rows: int, tick: float, seed: int) -> pd.DataFrame:
+    """Ticks on a 0.1s grid with ~10% rows off the tick grid and random missing ticks"""
+    rng = np.random.default_rng(seed)
+    steps = np.cumsum(rng.choice([1, 2, 3], size=rows, p=[0.8, 0.15, 0.05])) * int(tick * 1e9)
+    jitter = np.where(rng.random(rows) < 0.1, rng.integers(1, int(tick * 10), size=rows) * 100_000_000, 0)
+    times = np.datetime64('2025-08-05T09:00:00', 'ns') + (steps - jitter).astype('timedelta64[ns]')
+    datetimes = pd.DatetimeIndex(times).strftime("%Y-%m-%d %H:%M:%S.%f").str[:-3]
+    return pd.DataFrame({
+        'datetime': datetimes,
+        'last_price': 3300 + rng.integers(-50, 50, size=rows).astype(np.float64),
+        'volume': rng.integers(0, 100, size=rows),
+    })
+
+
+def legacy_align_time(df: pd.DataFrame, tick: float, dt_col: str = 'datetime') -> pd.DataFrame:
+    df = df.sort_values(dt_col).reset_index(drop=True)
+    full_range = pd.date_range(start=df[dt_col].iloc[0], end=df[dt_col].iloc[-1], freq=f'{tick}s')
+    for row in df.itertuples():
+        curr_time = datetime.strptime(row.datetime, "%Y-%m-%d %H:%M:%S.%f")
+        if curr_time.microsecond % int(tick * 1e6) == 0:
+            continue
+        idx = full_range.get_indexer([curr_time], method='backfill')[0]
+        df.at[row.Index, 'datetime'] = full_range[idx].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return df.drop_duplicates(subset='datetime', keep='last')
+
+
+def legacy_padding(df: pd.DataFrame, tick: float, dt_col: str = 'datetime') -> pd.DataFrame:
+    full_range = pd.date_range(start=df[dt_col].iloc[0], end=df[dt_col].iloc[-1], freq=f'{tick}s')
+    filled = pd.DataFrame({dt_col: full_range})
+    filled[dt_col] = filled[dt_col].apply(lambda x: x.to_pydatetime().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3])
+    merged = filled.merge(df, on=dt_col, how='left')
+    merged = merged.sort_values(dt_col).reset_index(drop=True)
+    merged['padding'] = ~merged[dt_col].isin(df[dt_col])
+    for col in merged.columns:
+        if col != dt_col and col != 'padding' and merged[col].isna().any():
+            merged[col] = merged[col].ffill()
+    return merged
+
+
+def timeit(fn, *args):
+    st = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - st
+
+
+def main():
+    args = parse_args()
+    legacy_rows = args.rows if args.legacy_rows is None else min(args.legacy_rows, args.rows)
+    df = make_ticks(args.rows, args.tick, args.seed)
+
+    aligned, t_align = timeit(ETL.align_time, df.copy(), args.tick)
+    padded, t_padding = timeit(ETL.padding, aligned.copy(), args.tick)
+
+    legacy_df = df.iloc[:legacy_rows]
+    legacy_aligned, t_legacy_align = timeit(legacy_align_time, legacy_df.copy(), args.tick)
+    legacy_padded, t_legacy_padding = timeit(legacy_padding, legacy_aligned.copy(), args.tick)
+    scale = args.rows / legacy_rows
+    t_legacy_align, t_legacy_padding = t_legacy_align * scale, t_legacy_padding * scale
+
+    # check results on the legacy rows
+    expect = ETL.padding(ETL.align_time(legacy_df.copy(), args.tick), args.tick)
+    assert (expect.astype(str).to_numpy() == legacy_padded.astype(str).to_numpy()).all(), "results differ from the row-wise implementations"
+
+    print(f"rows: {args.rows}, legacy rows: {legacy_rows}, tick: {args.tick}")
+    print(f"{'':12}{'vectorized':>14}{'row-wise':>14}{'speedup':>10}  target {args.target:.0f}x")
+    for name, t, t_legacy in [("align_time", t_align, t_legacy_align), ("padding", t_padding, t_legacy_padding)]:
+        speedup = t_legacy / t
+        print(f"{name:12}{t:>13.3f}s{t_legacy:>13.3f}s{speedup:>9.1f}x  {'met' if speedup >= args.target else 'NOT MET'}")
+
+
+if __name__ == '__main__':
+    main()
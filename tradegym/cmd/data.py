@@ -1,5 +1,5 @@
 import argparse
-from tradegym.data import Data
+from tradegym.data import Data, Storage
 
 
 __all__ = ['add_parser']
@@ -27,6 +27,8 @@ def add_parser(sparser: argparse._SubParsersAction):
     parser.add_argument('--num-workers', type=int, default=None, help='number of workers to processing log data')
     parser.add_argument('--complib', type=str, default='blosc', help='compression library')
     parser.add_argument('--complevel', type=int, default=9, help='compression level')
+    parser.add_argument('--format', type=str, default=None, choices=Storage.formats(), help='storage format of a new output (default hdf5)')
+    parser.add_argument('--batch-size', type=int, default=None, help='stream input csv in batches of rows (requires --segment)')
     
     # show
     parser = sparser.add_parser('show', help='show metadata of published data')
@@ -55,6 +57,8 @@ async def async_publush(args):
         num_workers=args.num_workers,
         complib=args.complib,
         complevel=args.complevel,
+        format=args.format,
+        batch_size=args.batch_size,
     )
 
 
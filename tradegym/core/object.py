@@ -1,5 +1,6 @@
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Tuple, Type
 from functools import wraps
+from pydantic_core import PydanticUndefined
 from pydantic import BaseModel, field_validator, Field, PrivateAttr, computed_field, ConfigDict
 
 
@@ -18,34 +19,85 @@ __all__ = [
 def writable(func: Callable) -> Callable:
     @wraps(func)
     def wrapper(self: "TObject", *args, **kwargs):
-        with self.writable():
+        private = self.__pydantic_private__
+        private["_writable_"] += 1
+        try:
             return func(self, *args, **kwargs)
+        finally:
+            private["_writable_"] -= 1
     return wrapper
 
 
+
+class _Writable(object):
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: "TObject"):
+        self.obj = obj
+
+    def __enter__(self) -> "TObject":
+        self.obj.__pydantic_private__["_writable_"] += 1
+        return self.obj
+
+    def __exit__(self, *args):
+        self.obj.__pydantic_private__["_writable_"] -= 1
+
+
+
+class _TrustedSpec(object):
+    """Per class defaults used by trusted construction"""
+
+    __slots__ = ("fields", "field_factories", "private", "private_factories", "post_init")
+
+    def __init__(self, cls: Type["TObject"]):
+        self.fields, self.field_factories = self._defaults(cls.__pydantic_fields__)
+        self.private, self.private_factories = self._defaults(cls.__private_attributes__)
+        mro = cls.__mro__
+        self.post_init = any("model_post_init" in vars(klass) for klass in mro[:mro.index(TObject)])
+
+    @staticmethod
+    def _defaults(attrs: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[str, Callable]]]:
+        static, factories = {}, []
+        for name, attr in attrs.items():
+            if attr.default_factory is not None:
+                factories.append((name, attr.default_factory))
+            elif attr.default is not PydanticUndefined:
+                static[name] = attr.default
+        return static, factories
+
+
+
+_TRUSTED_SPECS: Dict[Type["TObject"], _TrustedSpec] = {}
+
+
+
 class TObject(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    _writable_: bool = PrivateAttr(default=False)
+    _writable_: int = PrivateAttr(default=0)
+    _writable_ctx_: Any = PrivateAttr(default=None)
 
 
     def __getitem__(self, key):
         return getattr(self, key)
 
     def __setattr__(self, key: str, value: Any):
-        if key in type(self).model_fields and not self._writable_:
-            raise AttributeError(f"Cannot modify read-only attribute '{key}'")
+        if key in type(self).__pydantic_fields__:
+            if not self.__pydantic_private__["_writable_"]:
+                raise AttributeError(f"Cannot modify read-only attribute '{key}'")
+            self.__dict__[key] = value
+            self.__pydantic_fields_set__.add(key)
+            return
         super().__setattr__(key, value)
 
-    def writable(self):
-        class _Writable(object):
-            def __enter__(inner_self):
-                self._writable_ = True
-                return self
-            def __exit__(inner_self, *args):
-                self._writable_ = False
-        return _Writable()
+    def writable(self) -> _Writable:
+        private = self.__pydantic_private__
+        ctx = private["_writable_ctx_"]
+        # copies carry the private attributes of their original
+        if ctx is None or ctx.obj is not self:
+            ctx = private["_writable_ctx_"] = _Writable(self)
+        return ctx
 
     def serialize(self) -> Dict:
         return self.model_dump(exclude_unset=True, by_alias=True)
@@ -54,6 +106,35 @@ class TObject(BaseModel):
     def deserialize(cls, data: Dict) -> "TObject":
         return cls.model_validate(data)
     
+    @classmethod
+    def trusted(cls, **data) -> "TObject":
+        """
+        Construct without validation, for engine-internal objects built from already typed values.
+        Like `model_construct`, keys must be field names and custom `__init__` is not called.
+        """
+        spec = _TRUSTED_SPECS.get(cls)
+        if spec is None:
+            spec = _TRUSTED_SPECS[cls] = _TrustedSpec(cls)
+
+        values = spec.fields.copy()
+        for name, factory in spec.field_factories:
+            if name not in data:
+                values[name] = factory()
+        values.update(data)
+
+        private = spec.private.copy()
+        for name, factory in spec.private_factories:
+            private[name] = factory()
+
+        obj = cls.__new__(cls)
+        object.__setattr__(obj, "__dict__", values)
+        object.__setattr__(obj, "__pydantic_fields_set__", set(data))
+        object.__setattr__(obj, "__pydantic_extra__", None)
+        object.__setattr__(obj, "__pydantic_private__", private)
+        if spec.post_init:
+            obj.model_post_init(None)
+        return obj
+    
     def copy(self) -> "TObject":
         return self.deserialize(self.serialize())
         
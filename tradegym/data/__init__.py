@@ -1,2 +1,4 @@
 from .data import *
-from .etl import *
\ No newline at end of file
+from .dataset import *
+from .etl import *
+from .storage import *
@@ -1,11 +1,13 @@
-from typing import Optional
+from typing import Optional, Sequence, Dict, List, Iterator
 import yaml
 from datetime import datetime
 import os
 import glob
+import numpy as np
 import pandas as pd
 from tradegym.core import logging
-from .etl import ETL
+from .etl import ETL, Segmenter
+from .storage import Storage
 
 
 __all__ = ['Data']
@@ -35,83 +37,157 @@ class Data(object):
         num_workers: Optional[int] = None,
         complib: str = 'blosc',
         complevel: int = 9,
+
+        # storage
+        format: Optional[str] = None,
+
+        # streaming
+        batch_size: Optional[int] = None,
     ) -> None:
+        """
+        Publish csv files into chunks of training data.
+        With `batch_size`, input files are read in batches of rows and chunks are written as soon as their
+        segment closes, peak memory is bounded by the batch size plus the largest segment.
+        Streaming requires input ordered by datetime across files and batches.
+        """
 
         # load input files
-        input_files = [os.path.abspath(path) for path in glob.glob(input_path)]
+        input_files = [os.path.abspath(path) for path in sorted(glob.glob(input_path))]
         logging.info(f"Loaded {len(input_files)} files from {input_path}")
-        df = pd.concat([
-            pd.read_csv(file_path)
-            for file_path in input_files
-        ])
-        logging.info(f"Loaded {len(df)} rows from {len(input_files)} files")
-
-        # normalize columns
-        df = ETL.normalize_columns(df)
-        logging.info(f"Normalized columns: {df.columns}")
-
-        # drop nan
-        df_dropped = df.dropna()
-        logging.info(f"Dropped {len(df) - len(df_dropped)} rows with nan")
-        df = df_dropped
-
-        # segment
-        if segment:
-            dfs = ETL.segment(df, tick, num_gap_ticks, min_segment, dt_col)
+        if batch_size is None:
+            dfs = Data.load_chunks(input_files, tick, segment, min_segment, num_gap_ticks, padding, dt_col, num_workers)
         else:
-            dfs = [df]
-        logging.info(f"Segmented {len(dfs)} chunks")
-
-        # padding
-        if padding:
-            dfs = ETL.paddings(dfs, tick, dt_col, num_workers)
-        logging.info(f"Padded {len(dfs)} chunks")
+            assert segment, ValueError("Streaming publish requires segment, an unsegmented output is a single chunk")
+            dfs = Data.stream_chunks(input_files, tick, batch_size, min_segment, num_gap_ticks, padding, dt_col)
 
         # save output file
         output_path = os.path.abspath(output_path)
-        mode = "a" if os.path.exists(output_path) else "w"
-        with pd.HDFStore(output_path, mode=mode) as store:
+        with Storage.open(output_path, mode="a", format=format, complib=complib, complevel=complevel) as storage:
             # load metadata
-            config = getattr(store.root._v_attrs, "config", {})
+            config = storage.read_config()
             num_chunks = config.get(f'num_chunks', 0)
 
-            # save chunks
-            for i, df in enumerate(dfs):
-                chunk_name = f'chunk/df_{num_chunks + i}'
-                store.put(chunk_name, df, format='table', complib=complib, complevel=complevel)
-                store.get_storer(chunk_name).attrs.metadata = {
+            # save chunks as soon as they are produced
+            num_published = 0
+            for df in dfs:
+                storage.write_chunk(num_chunks + num_published, df, metadata={
                     'tick': tick,
-                    'start_datetime': df[dt_col].iloc[0].strftime('%Y-%m-%d %H:%M:%S'),
-                    'end_datetime': df[dt_col].iloc[-1].strftime('%Y-%m-%d %H:%M:%S'),
+                    'start_datetime': pd.Timestamp(df[dt_col].iloc[0]).strftime('%Y-%m-%d %H:%M:%S'),
+                    'end_datetime': pd.Timestamp(df[dt_col].iloc[-1]).strftime('%Y-%m-%d %H:%M:%S'),
                     'size': len(df),
-                    "complib": complib,
-                    "complevel": complevel,
-                }
+                    "complib": storage.complib,
+                    "complevel": storage.complevel,
+                })
+                num_published += 1
+                config["num_chunks"] = num_chunks + num_published
 
             # update metadata
-            config["num_chunks"] = num_chunks + len(dfs)
             config.setdefault("logs", [])
             config["logs"].append({
                 "datetime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 "tick": tick,
-                "num_chunks": len(dfs),
+                "num_chunks": num_published,
             })
-            store.root._v_attrs.config = config
+            storage.write_config(config)
 
         logging.info(f"Published to {output_path}")
 
     
+    @staticmethod
+    def load_chunks(
+        input_files: Sequence[str],
+        tick: float,
+        segment: bool = False,
+        min_segment: int = 0,
+        num_gap_ticks: int = 10,
+        padding: bool = False,
+        dt_col: str = 'datetime',
+        num_workers: Optional[int] = None,
+    ) -> List[pd.DataFrame]:
+        # read, normalize columns and drop nan in parallel, segmented data is sorted per file as well
+        df, num_rows = ETL.load_csvs(input_files, dt_col, parse_dates=segment, num_workers=num_workers)
+        logging.info(f"Loaded {num_rows} rows from {len(input_files)} files")
+        logging.info(f"Normalized columns: {df.columns}")
+        logging.info(f"Dropped {num_rows - len(df)} rows with nan")
+
+        # segment
+        if segment:
+            dfs = ETL.segment(df, tick, num_gap_ticks, min_segment, dt_col)
+        else:
+            dfs = [df]
+        logging.info(f"Segmented {len(dfs)} chunks")
+
+        # padding
+        if padding:
+            dfs = ETL.paddings(dfs, tick, dt_col, num_workers)
+        logging.info(f"Padded {len(dfs)} chunks")
+        return dfs
+
+    @staticmethod
+    def stream_chunks(
+        input_files: Sequence[str],
+        tick: float,
+        batch_size: int,
+        min_segment: int = 0,
+        num_gap_ticks: int = 10,
+        padding: bool = False,
+        dt_col: str = 'datetime',
+        sample_rows: int = 100_000,
+    ) -> Iterator[pd.DataFrame]:
+        assert batch_size > 0, ValueError(f"batch_size must be positive, got {batch_size}")
+        segmenter = Segmenter(tick, num_gap_ticks, min_segment, dt_col)
+        num_rows, num_dropped, num_segments = 0, 0, 0
+
+        def produce(segments: List[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+            for df in segments:
+                yield ETL.padding(df, tick, dt_col) if padding else df
+
+        # batches infer dtypes on their own rows, pin the dtypes of the first `sample_rows` rows of every file.
+        # integer and bool columns are read nullable so nan rows past the sample still parse, they are dropped below
+        dtypes = ETL.infer_csv_dtypes(input_files, sample_rows)
+        nullable = {
+            col: 'Int64' if pd.api.types.is_integer_dtype(dtype) else 'boolean'
+            for col, dtype in dtypes.items() if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+        }
+        for file_path in input_files:
+            columns = pd.read_csv(file_path, nrows=0).columns
+            norms = ETL.normalize_columns(pd.DataFrame(columns=columns)).columns
+            dtype = {col: nullable.get(norm, dtypes[norm]) for col, norm in zip(columns, norms)}
+            for df in pd.read_csv(file_path, chunksize=batch_size, dtype=dtype):
+                num_rows += len(df)
+                df = ETL.normalize_columns(df)
+                df_dropped = df.dropna().astype({col: dtypes[col] for col in nullable})
+                num_dropped += len(df) - len(df_dropped)
+                segments = segmenter.push(df_dropped)
+                num_segments += len(segments)
+                yield from produce(segments)
+
+        segments = segmenter.flush()
+        num_segments += len(segments)
+        yield from produce(segments)
+        logging.info(f"Streamed {num_rows} rows from {len(input_files)} files, dropped {num_dropped} rows with nan, segmented {num_segments} chunks")
+
     @staticmethod
     def show(input_path: str, index: Optional[int] = None) -> None:
-        with pd.HDFStore(input_path, 'r') as store:
+        with Storage.open(input_path, 'r') as storage:
             if index is None:
-                config = getattr(store.root._v_attrs, "config", {})
+                config = storage.read_config()
                 logging.info("\n" + yaml.dump(config, sort_keys=False))
             else:
-                chunk_name = f'chunk/df_{index}'
-                metadata = store.get_storer(chunk_name).attrs.metadata
+                metadata = storage.read_metadata(index)
                 logging.info("\n" + yaml.dump(metadata, sort_keys=False))
 
+    @staticmethod
+    def load(input_path: str, index: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        with Storage.open(input_path, 'r') as storage:
+            return storage.read_chunk(index, columns)
+
+    @staticmethod
+    def load_arrays(input_path: str, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Columns of a chunk as numpy arrays, memory-mapped when the storage format allows it"""
+        with Storage.open(input_path, 'r') as storage:
+            return storage.read_arrays(index, columns)
+
     @staticmethod
     def export(
         input_path: str, 
@@ -123,10 +199,8 @@ class Data(object):
             output_path = f'chunk_{index}.csv'
         output_path = os.path.abspath(output_path)
 
-        with pd.HDFStore(input_path, 'r') as store:
-            chunk_name = f'chunk/df_{index}'
-            df = store.get(chunk_name)
-            df.to_csv(output_path, index=False)
+        df = Data.load(input_path, index)
+        df.to_csv(output_path, index=False)
         logging.info(f"Exported chunk {index} to {output_path}")
 
             
\ No newline at end of file
@@ -0,0 +1,128 @@
+from typing import Optional, Dict, Any, Sequence, Union, List
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tradegym.engine import KLineData, to_nanoseconds
+from .storage import Storage
+
+
+__all__ = ['Dataset']
+
+
+# chunk metadata keeps datetimes at second resolution
+ONE_SECOND_NS = 1_000_000_000
+
+
+
+class Dataset(object):
+    """
+    Lazy reader of a `Data.publish` output.
+
+    Only the chunk index (tick, start/end datetime and size of every chunk) is read when opened,
+    chunks are decoded into `KLineData` on demand and kept in an LRU cache of `cache_size` chunks.
+    Decoded chunks can be passed directly to `TradeEngine.activate` or `TradeEnv.reset`:
+
+        env.reset(options={"dataframes": [dataset[i]]})
+    """
+
+    def __init__(self, path: str, cache_size: int = 16, columns: Optional[Sequence[str]] = None):
+        assert cache_size >= 0, ValueError(f"cache_size must be non-negative, got {cache_size}")
+        assert columns is None or "datetime" in columns, ValueError("Column 'datetime' is required")
+        self.path = path
+        self.cache_size = cache_size
+        self.columns = None if columns is None else list(columns)
+        self._storage: Optional[Storage] = Storage.open(path, 'r')
+        self._cache: "OrderedDict[int, KLineData]" = OrderedDict()
+
+        # chunk index
+        metadatas = [self._storage.read_metadata(i) for i in range(self._storage.num_chunks)]
+        self.ticks: np.ndarray = np.array([m['tick'] for m in metadatas], dtype=np.float64)
+        self.sizes: np.ndarray = np.array([m['size'] for m in metadatas], dtype=np.int64)
+        self.starts: np.ndarray = self._parse_times([m['start_datetime'] for m in metadatas])
+        # widen truncated end datetimes to the end of their second
+        self.ends: np.ndarray = self._parse_times([m['end_datetime'] for m in metadatas]) + (ONE_SECOND_NS - 1)
+
+        # interval index: chunks sorted by start, running max of their ends
+        self._order: np.ndarray = np.argsort(self.starts, kind="stable")
+        self._sorted_starts: np.ndarray = self.starts[self._order]
+        self._max_ends: np.ndarray = np.maximum.accumulate(self.ends[self._order]) if len(self) > 0 else self.ends
+
+    def __enter__(self) -> "Dataset":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __getitem__(self, index: int) -> KLineData:
+        return self.load(index)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self)
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        return self._storage.read_metadata(index)
+
+    def query(
+        self,
+        start: Optional[Union[datetime, str, pd.Timestamp]] = None,
+        end: Optional[Union[datetime, str, pd.Timestamp]] = None,
+    ) -> np.ndarray:
+        """Indices of chunks overlapping [start, end] in publish order"""
+        lo, hi = 0, len(self)
+        if start is not None:
+            lo = int(np.searchsorted(self._max_ends, to_nanoseconds(start), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(self._sorted_starts, to_nanoseconds(end), side='right'))
+        indices = self._order[lo:hi]
+        if start is not None:
+            indices = indices[self.ends[indices] >= to_nanoseconds(start)]
+        return np.sort(indices)
+
+    def load(self, index: int) -> KLineData:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(f"chunk index {index} out of range, num_chunks: {len(self)}")
+
+        data = self._cache.get(index, None)
+        if data is not None:
+            self._cache.move_to_end(index)
+            return data
+
+        data = KLineData.from_arrays(self._storage.read_arrays(index, self.columns))
+        if self.cache_size > 0:
+            self._cache[index] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def load_dataframe(self, index: int) -> pd.DataFrame:
+        return self._storage.read_chunk(index, self.columns)
+
+    def sample(self, rng: Optional[np.random.Generator] = None, min_size: int = 0, indices: Optional[Sequence[int]] = None) -> int:
+        """Random chunk index with at least `min_size` rows, optionally among `indices`"""
+        rng = np.random.default_rng() if rng is None else rng
+        candidates = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        candidates = candidates[self.sizes[candidates] >= min_size]
+        assert len(candidates) > 0, ValueError(f"No chunk with at least {min_size} rows")
+        return int(rng.choice(candidates))
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def close(self):
+        self._cache.clear()
+        if self._storage is not None:
+            self._storage.close()
+            self._storage = None
+
+    @staticmethod
+    def _parse_times(values: List[str]) -> np.ndarray:
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return pd.to_datetime(pd.Index(values)).to_numpy().astype("datetime64[ns]").view(np.int64)
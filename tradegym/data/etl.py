@@ -1,15 +1,20 @@
 from concurrent.futures import as_completed
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union, Sequence, Dict, Any
 from concurrent.futures import ProcessPoolExecutor
 import os
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from datetime import datetime, timedelta
 
 
-__all__ = ['ETL']
+__all__ = ['ETL', 'Segmenter']
 
 
+# zero padded digits of 0-99 and 0-999
+DIGITS3 = np.array([f"{i:03d}" for i in range(1000)], dtype='S3').view(np.uint8).reshape(-1, 3)
+DIGITS2 = np.ascontiguousarray(DIGITS3[:100, 1:])
+
 class ETL(object):
 
     @staticmethod
@@ -18,6 +23,64 @@ class ETL(object):
         return df
 
 
+    @staticmethod
+    def infer_csv_dtypes(file_paths: Sequence[str], nrows: int) -> Dict[str, Any]:
+        """
+        Dtypes of normalized columns as `load_csvs` infers them, sampled from the first `nrows` rows of every file.
+        Pins the dtypes of batched reads, which otherwise infer them per batch.
+        """
+        schema: Optional[pd.DataFrame] = None
+        for file_path in file_paths:
+            df = ETL.normalize_columns(pd.read_csv(file_path, nrows=nrows).iloc[:0])
+            schema = df if schema is None else pd.concat([schema, df])
+        return {} if schema is None else schema.dtypes.to_dict()
+
+
+    @staticmethod
+    def load_csv(
+        file_path: str,
+        dt_col: str = 'datetime',
+        parse_dates: bool = False,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Read, normalize and drop nan rows of a csv file, optionally parse and stable sort datetimes. Returns rows before dropna as well"""
+        df = pd.read_csv(file_path)
+        num_rows = len(df)
+        df = ETL.normalize_columns(df).dropna()
+        if parse_dates:
+            df[dt_col] = pd.to_datetime(df[dt_col])
+            df = df.sort_values(dt_col, kind='stable')
+        return df, num_rows
+
+
+    @staticmethod
+    def load_csvs(
+        file_paths: List[str],
+        dt_col: str = 'datetime',
+        parse_dates: bool = False,
+        num_workers: Optional[int] = None,
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        `load_csv` over a process pool, frames are concatenated in file order.
+        Each file is sorted in its worker, so a following stable sort by datetime only merges presorted runs
+        and gives the same order as sorting all rows at once.
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        num_workers = max(1, min(num_workers, len(file_paths)))
+        results: List[Tuple[pd.DataFrame, int]] = [None] * len(file_paths)
+        if num_workers == 1:
+            for i, file_path in enumerate(tqdm(file_paths, desc='Loading')):
+                results[i] = ETL.load_csv(file_path, dt_col, parse_dates)
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(ETL.load_csv, file_path, dt_col, parse_dates): i for i, file_path in enumerate(file_paths)}
+                for future in tqdm(as_completed(futures), total=len(file_paths), desc='Loading'):
+                    idx = futures[future]
+                    results[idx] = future.result()
+        df = pd.concat([df for df, _ in results])
+        return df, sum(num_rows for _, num_rows in results)
+
+
     @staticmethod
     def segment(
         df: pd.DataFrame,
@@ -31,21 +94,31 @@ class ETL(object):
         df[dt_col] = pd.to_datetime(df[dt_col])
 
         # sort
-        df = df.sort_values(dt_col).reset_index(drop=True)
+        df = df.sort_values(dt_col, kind='stable').reset_index(drop=True)
 
         # find segments
-        time_diffs = df[dt_col].diff()
-        gap_mask = time_diffs > pd.Timedelta(seconds=tick * num_gap_ticks)
-        segment_starts = [0] + df.index[gap_mask].tolist()
         segments: List[pd.DataFrame] = []
-        for i in range(1, len(segment_starts), 1):
-            st, ed = segment_starts[i-1], segment_starts[i]
+        for st, ed in ETL.segment_bounds(df, tick, num_gap_ticks, dt_col):
             if ed - st < min_segment:
                 continue 
             segments.append(df.iloc[st:ed].reset_index(drop=True))
         return segments
 
 
+    @staticmethod
+    def segment_bounds(
+        df: pd.DataFrame,
+        tick: float,
+        num_gap_ticks: int = 10,
+        dt_col: str = 'datetime',
+    ) -> List[Tuple[int, int]]:
+        """[start, end) row ranges of a sorted dataframe split at gaps longer than num_gap_ticks"""
+        time_diffs = df[dt_col].diff()
+        gap_mask = time_diffs > pd.Timedelta(seconds=tick * num_gap_ticks)
+        bounds = [0] + np.flatnonzero(gap_mask.to_numpy()).tolist() + [len(df)]
+        return [(bounds[i-1], bounds[i]) for i in range(1, len(bounds), 1) if bounds[i] > bounds[i-1]]
+
+
     @staticmethod
     def paddings(
         dfs: List[pd.DataFrame],
@@ -70,19 +143,60 @@ class ETL(object):
         tick: float,
         dt_col: str = 'datetime',
     ) -> pd.DataFrame:
-        # padding
-        full_range = pd.date_range(start=df[dt_col].iloc[0], end=df[dt_col].iloc[-1], freq=f'{tick}s')
-        filled = pd.DataFrame({dt_col: full_range})
-        filled[dt_col] = filled[dt_col].apply(lambda x : x.to_pydatetime().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3])
-        merged = filled.merge(df, on=dt_col, how='left')
-        # add padding flag
-        merged = merged.sort_values(dt_col).reset_index(drop=True)
-        merged['padding'] = ~merged[dt_col].isin(df[dt_col])
-
-        # fill missing values
-        for col in merged.columns:
-            if col != dt_col and col != 'padding' and merged[col].isna().any():
-                merged[col] = merged[col].ffill()
+        """Fill missing ticks with the previous row, rows off the tick grid are dropped"""
+        is_string = ETL.is_string_datetime(df[dt_col])
+        values = np.asarray(df[dt_col]) if is_string else df[dt_col]
+        times = ETL.parse_datetimes(values).view(np.int64)
+        tick_ns = int(round(tick * 1e9))
+        start = times[0]
+        size = (times[-1] - start) // tick_ns + 1
+
+        # position of every row on the full tick range
+        offsets = times - start
+        on_grid = np.flatnonzero((offsets % tick_ns == 0) & (offsets >= 0) & (offsets < size * tick_ns))
+        ticks = offsets[on_grid] // tick_ns
+        if not (ticks[1:] > ticks[:-1]).all():
+            # unsorted or duplicated ticks, the last row wins on duplicates
+            rows = np.full(size, -1, dtype=np.int64)
+            rows[ticks] = on_grid
+            ticks = np.flatnonzero(rows >= 0)
+            on_grid = rows[ticks]
+
+        # every existing tick is repeated over the gap up to the next one
+        filled = np.repeat(on_grid, np.diff(ticks, append=size))
+        padding = np.ones(size, dtype=bool)
+        padding[ticks] = False
+        has_padding = len(ticks) < size
+
+        columns = {}
+        for col in df.columns:
+            if col == dt_col:
+                continue
+            column = df[col].array
+            missing = column.isna()
+            if missing.any():
+                # forward fill in output order, rows take the last filled row with a value and keep their own before it
+                last = np.maximum.accumulate(np.where(missing[filled], -1, np.arange(size, dtype=np.int64)))
+                column = column.take(np.where(last >= 0, filled[last], filled))
+            else:
+                column = column.take(filled)
+            # padded columns become float as they would be with nan + ffill
+            if has_padding and pd.api.types.is_integer_dtype(column.dtype):
+                column = column.astype(np.float64)
+            columns[col] = column
+
+        # datetime column, existing rows keep their values
+        if is_string:
+            dts = values.take(filled)
+            if has_padding:
+                gaps = np.flatnonzero(padding)
+                dts[gaps] = ETL.format_datetimes((start + gaps * tick_ns).view('datetime64[ns]'))
+            dts = pd.Series(dts, dtype=df[dt_col].dtype, copy=False)
+        else:
+            dts = (start + np.arange(size, dtype=np.int64) * tick_ns).view('datetime64[ns]')
+
+        merged = pd.DataFrame({dt_col: dts, **columns}, copy=False)
+        merged['padding'] = padding
         return merged
 
 
@@ -92,15 +206,124 @@ class ETL(object):
         tick: float,
         dt_col: str = 'datetime'
     ) -> pd.DataFrame:
-        df: pd.DataFrame = df.sort_values(dt_col).reset_index(drop=True)
-        full_range = pd.date_range(start=df[dt_col].iloc[0], end=df[dt_col].iloc[-1], freq=f'{tick}s')
-        for row in df.itertuples():
-            curr_time: datetime = datetime.strptime(row.datetime, "%Y-%m-%d %H:%M:%S.%f")
-            if curr_time.microsecond == 0 or curr_time.microsecond == 50000:
-                continue
-            idx: int = full_range.get_indexer([curr_time], method='backfill')[0]
-            close_time: datetime = full_range[idx]
-            df.at[row.Index, 'datetime'] = close_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        df = df.drop_duplicates(subset='datetime', keep='last')
+        """Move rows off the tick grid up to the next tick, keep the last row of each tick"""
+        df: pd.DataFrame = df.sort_values(dt_col, kind='stable').reset_index(drop=True)
+
+        # round up to tick grid
+        times = ETL.parse_datetimes(df[dt_col]).view(np.int64)
+        tick_ns = int(round(tick * 1e9))
+        aligned = -(-times // tick_ns) * tick_ns
+        moved = aligned != times
+
+        # write back moved rows only
+        if moved.any():
+            if ETL.is_string_datetime(df[dt_col]):
+                values = df[dt_col].to_numpy(dtype=object, copy=True)
+                values[moved] = ETL.format_datetimes(aligned[moved].view('datetime64[ns]'))
+            else:
+                values = aligned.view('datetime64[ns]')
+            df[dt_col] = values
+        df = df[~pd.Series(aligned).duplicated(keep='last').to_numpy()]
         return df
 
+
+    @staticmethod
+    def is_string_datetime(values: Union[pd.Series, np.ndarray]) -> bool:
+        return not pd.api.types.is_datetime64_any_dtype(values)
+
+
+    @staticmethod
+    def parse_datetimes(values: Union[pd.Series, np.ndarray]) -> np.ndarray:
+        """datetime64[ns] array, ISO strings are parsed by numpy and other formats fall back to pandas"""
+        if not ETL.is_string_datetime(values):
+            return np.asarray(values).astype('datetime64[ns]')
+        try:
+            return np.asarray(values, dtype=object).astype('datetime64[ns]')
+        except ValueError:
+            return pd.to_datetime(pd.Series(values)).to_numpy().astype('datetime64[ns]')
+
+
+    @staticmethod
+    def format_datetimes(values: np.ndarray) -> np.ndarray:
+        """'%Y-%m-%d %H:%M:%S.%f' truncated to milliseconds, digits are written into a byte buffer instead of per row strftime"""
+        ms = values.astype('datetime64[ms]').view(np.int64)
+        if len(ms) == 0:
+            return np.empty(0, dtype=object)
+        days, tod = np.divmod(ms, 86_400_000)
+        first = days.min()
+        days -= first
+        dates = np.arange(first, first + days.max() + 1).astype('datetime64[D]')
+        dates = np.datetime_as_string(dates).astype('S10').view(np.uint8).reshape(-1, 10)
+        seconds, millis = np.divmod(tod.astype(np.int32), 1000)
+        minutes, seconds = np.divmod(seconds, 60)
+        hours, minutes = np.divmod(minutes, 60)
+        buf = np.empty((len(ms), 24), dtype=np.uint8)
+        buf[:, :10] = dates.take(days, axis=0)
+        buf[:, 10] = ord(' ')
+        buf[:, [13, 16]] = ord(':')
+        buf[:, 19] = ord('.')
+        buf[:, 11:13] = DIGITS2.take(hours, axis=0)
+        buf[:, 14:16] = DIGITS2.take(minutes, axis=0)
+        buf[:, 17:19] = DIGITS2.take(seconds, axis=0)
+        buf[:, 20:23] = DIGITS3.take(millis, axis=0)
+        # one decode and split is much faster than converting each row to str
+        buf[:, 23] = ord('\n')
+        return np.array(buf.tobytes().decode('ascii').splitlines(), dtype=object)
+
+
+
+class Segmenter(object):
+    """
+    Incremental `ETL.segment` over batches of rows ordered by datetime.
+
+    The trailing segment of each batch stays open and is carried into the next batch, segments are
+    returned as soon as a gap closes them. Rows may be out of order inside the open segment, but a
+    row earlier than the open segment can not be placed any more and raises ValueError.
+    """
+
+    def __init__(
+        self,
+        tick: float,
+        num_gap_ticks: int = 10,
+        min_segment: int = 0,
+        dt_col: str = 'datetime',
+    ):
+        self.tick = tick
+        self.num_gap_ticks = num_gap_ticks
+        self.min_segment = min_segment
+        self.dt_col = dt_col
+        self.pending: Optional[pd.DataFrame] = None
+
+    @property
+    def num_pending(self) -> int:
+        return 0 if self.pending is None else len(self.pending)
+
+    def push(self, df: pd.DataFrame) -> List[pd.DataFrame]:
+        if len(df) == 0:
+            return []
+        df[self.dt_col] = pd.to_datetime(df[self.dt_col])
+
+        # merge with open segment
+        if self.pending is not None:
+            first = self.pending[self.dt_col].iloc[0]
+            if df[self.dt_col].min() < first:
+                raise ValueError(f"Rows earlier than the open segment starting at '{first}' can not be segmented incrementally, input must be ordered by '{self.dt_col}'")
+            df = pd.concat([self.pending, df])
+        df = df.sort_values(self.dt_col, kind='stable').reset_index(drop=True)
+
+        # close all segments but the last one
+        bounds = ETL.segment_bounds(df, self.tick, self.num_gap_ticks, self.dt_col)
+        segments = [
+            df.iloc[st:ed].reset_index(drop=True)
+            for st, ed in bounds[:-1]
+            if ed - st >= self.min_segment
+        ]
+        st, _ = bounds[-1]
+        self.pending = df.iloc[st:].reset_index(drop=True)
+        return segments
+
+    def flush(self) -> List[pd.DataFrame]:
+        pending, self.pending = self.pending, None
+        if pending is None or len(pending) < self.min_segment:
+            return []
+        return [pending]
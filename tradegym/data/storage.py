@@ -0,0 +1,252 @@
+from typing import Optional, Dict, Any, ClassVar, Type, Sequence, List
+from abc import ABC, abstractmethod
+import os
+import yaml
+import numpy as np
+import pandas as pd
+
+
+__all__ = ['Storage', 'HDFStorage', 'ColumnarStorage', 'NumpyStorage', 'FeatherStorage']
+
+
+
+class Storage(ABC):
+    """
+    Chunk store behind published data. `config` holds the store level metadata (num_chunks, logs),
+    every chunk carries its own metadata (tick, start/end datetime, size, complib, ...).
+    """
+
+    Name: ClassVar[str]
+
+    __STORAGES__: ClassVar[Dict[str, Type["Storage"]]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, "Name", None) is not None:
+            Storage.__STORAGES__[cls.Name] = cls
+
+    def __init__(self, path: str, mode: str = 'r', complib: Optional[str] = None, complevel: Optional[int] = None):
+        self.path = os.path.abspath(path)
+        self.mode = mode
+        self.complib = complib
+        self.complevel = complevel
+
+    def __enter__(self) -> "Storage":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def num_chunks(self) -> int:
+        return self.read_config().get('num_chunks', 0)
+
+    @abstractmethod
+    def read_config(self) -> Dict[str, Any]: pass
+
+    @abstractmethod
+    def write_config(self, config: Dict[str, Any]) -> None: pass
+
+    @abstractmethod
+    def read_metadata(self, index: int) -> Dict[str, Any]: pass
+
+    @abstractmethod
+    def write_chunk(self, index: int, df: pd.DataFrame, metadata: Dict[str, Any]) -> None: pass
+
+    @abstractmethod
+    def read_chunk(self, index: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame: pass
+
+    def read_arrays(self, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        df = self.read_chunk(index, columns)
+        return {col: df[col].to_numpy() for col in df.columns}
+
+    def close(self) -> None: pass
+
+    @staticmethod
+    def detect(path: str) -> Optional[str]:
+        if os.path.isdir(path):
+            return ColumnarStorage.read_manifest(path)['format']
+        if os.path.exists(path):
+            return HDFStorage.Name
+        return None
+
+    @staticmethod
+    def open(path: str, mode: str = 'r', format: Optional[str] = None, **kwargs) -> "Storage":
+        detected = Storage.detect(path)
+        if detected is None:
+            if mode == 'r':
+                raise FileNotFoundError(f"Published data '{path}' not found")
+            detected = HDFStorage.Name if format is None else format
+        elif format is not None and format != detected:
+            raise ValueError(f"Published data '{path}' is stored as '{detected}', can not write it as '{format}'")
+        cls = Storage.__STORAGES__.get(detected, None)
+        assert cls is not None, ValueError(f"Storage format '{detected}' is not found")
+        return cls(path, mode=mode, **kwargs)
+
+    @staticmethod
+    def formats() -> List[str]:
+        return list(Storage.__STORAGES__.keys())
+
+
+
+class HDFStorage(Storage):
+    """All chunks in one PyTables HDF5 file"""
+
+    Name: ClassVar[str] = 'hdf5'
+
+    def __init__(self, path: str, mode: str = 'r', complib: Optional[str] = 'blosc', complevel: Optional[int] = 9):
+        super().__init__(path, mode, complib, complevel)
+        if mode != 'r':
+            mode = "a" if os.path.exists(self.path) else "w"
+        self.store = pd.HDFStore(self.path, mode=mode)
+
+    def read_config(self) -> Dict[str, Any]:
+        return getattr(self.store.root._v_attrs, "config", {})
+
+    def write_config(self, config: Dict[str, Any]) -> None:
+        self.store.root._v_attrs.config = config
+
+    def read_metadata(self, index: int) -> Dict[str, Any]:
+        return self.store.get_storer(self.chunk_name(index)).attrs.metadata
+
+    def write_chunk(self, index: int, df: pd.DataFrame, metadata: Dict[str, Any]) -> None:
+        chunk_name = self.chunk_name(index)
+        self.store.put(chunk_name, df, format='table', complib=self.complib, complevel=self.complevel)
+        self.store.get_storer(chunk_name).attrs.metadata = metadata
+
+    def read_chunk(self, index: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return self.store.select(self.chunk_name(index), columns=None if columns is None else list(columns))
+
+    def close(self) -> None:
+        self.store.close()
+
+    @staticmethod
+    def chunk_name(index: int) -> str:
+        return f'chunk/df_{index}'
+
+
+
+class ColumnarStorage(Storage):
+    """
+    A directory of per-chunk columnar files plus a yaml manifest:
+
+        manifest.yaml   {format, config, chunks: [metadata, ...]}
+        chunk_<i>...    chunk files of the concrete format
+    """
+
+    Name: ClassVar[Optional[str]] = None
+
+    MANIFEST: ClassVar[str] = 'manifest.yaml'
+
+    def __init__(self, path: str, mode: str = 'r', complib: Optional[str] = None, complevel: Optional[int] = None):
+        super().__init__(path, mode, complib, complevel)
+        # chunks written since the manifest was last written
+        self.dirty = False
+        if os.path.isdir(self.path):
+            self.manifest = self.read_manifest(self.path)
+        else:
+            assert mode != 'r', FileNotFoundError(f"Published data '{self.path}' not found")
+            os.makedirs(self.path)
+            self.manifest = {'format': self.Name, 'config': {}, 'chunks': []}
+            self.flush()
+
+    def read_config(self) -> Dict[str, Any]:
+        return self.manifest['config']
+
+    def write_config(self, config: Dict[str, Any]) -> None:
+        self.manifest['config'] = config
+        self.flush()
+
+    def read_metadata(self, index: int) -> Dict[str, Any]:
+        return self.manifest['chunks'][index]
+
+    def write_chunk(self, index: int, df: pd.DataFrame, metadata: Dict[str, Any]) -> None:
+        chunks = self.manifest['chunks']
+        assert index == len(chunks), ValueError(f"Chunks must be appended in order, expect index {len(chunks)}, got {index}")
+        self.write_columns(self.chunk_path(index), df)
+        chunks.append(dict(metadata, columns=[str(col) for col in df.columns]))
+        # the manifest is written once by `write_config` or `close`, not per chunk
+        self.dirty = True
+
+    def read_chunk(self, index: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return pd.DataFrame(self.read_arrays(index, columns))
+
+    def chunk_path(self, index: int) -> str:
+        return os.path.join(self.path, f'chunk_{index}')
+
+    def flush(self) -> None:
+        with open(os.path.join(self.path, self.MANIFEST), 'w') as f:
+            yaml.safe_dump(self.manifest, f, sort_keys=False)
+        self.dirty = False
+
+    def close(self) -> None:
+        if self.dirty:
+            self.flush()
+
+    @staticmethod
+    def read_manifest(path: str) -> Dict[str, Any]:
+        with open(os.path.join(path, ColumnarStorage.MANIFEST), 'r') as f:
+            return yaml.safe_load(f)
+
+    @abstractmethod
+    def write_columns(self, chunk_path: str, df: pd.DataFrame) -> None: pass
+
+
+
+class NumpyStorage(ColumnarStorage):
+    """Uncompressed `.npy` file per column, read back memory-mapped"""
+
+    Name: ClassVar[str] = 'npy'
+
+    def __init__(self, path: str, mode: str = 'r', complib: Optional[str] = None, complevel: Optional[int] = None):
+        super().__init__(path, mode, None, None)
+
+    def write_columns(self, chunk_path: str, df: pd.DataFrame) -> None:
+        os.makedirs(chunk_path, exist_ok=True)
+        for col in df.columns:
+            arr = df[col].to_numpy()
+            if arr.dtype.hasobject:
+                arr = arr.astype(str)
+            np.save(os.path.join(chunk_path, f'{col}.npy'), arr, allow_pickle=False)
+
+    def read_arrays(self, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        chunk_path = self.chunk_path(index)
+        columns = self.read_metadata(index)['columns'] if columns is None else columns
+        return {
+            col: np.load(os.path.join(chunk_path, f'{col}.npy'), mmap_mode='r', allow_pickle=False)
+            for col in columns
+        }
+
+
+
+class FeatherStorage(ColumnarStorage):
+    """Arrow IPC (feather v2) file per chunk, requires pyarrow"""
+
+    Name: ClassVar[str] = 'feather'
+
+    def __init__(self, path: str, mode: str = 'r', complib: Optional[str] = 'lz4', complevel: Optional[int] = None):
+        # hdf5 defaults (blosc, blosc:lz4, ...) are not arrow codecs
+        if complib is not None and complib.startswith('blosc'):
+            complib = 'lz4'
+        super().__init__(path, mode, complib, complevel)
+
+    def chunk_path(self, index: int) -> str:
+        return os.path.join(self.path, f'chunk_{index}.feather')
+
+    def write_columns(self, chunk_path: str, df: pd.DataFrame) -> None:
+        from pyarrow import feather
+        feather.write_feather(
+            df.reset_index(drop=True), chunk_path,
+            compression='uncompressed' if self.complib is None else self.complib,
+            compression_level=self.complevel,
+        )
+
+    def read_chunk(self, index: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        from pyarrow import feather
+        table = feather.read_table(self.chunk_path(index), columns=None if columns is None else list(columns), memory_map=True)
+        return table.to_pandas()
+
+    def read_arrays(self, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        from pyarrow import feather
+        table = feather.read_table(self.chunk_path(index), columns=None if columns is None else list(columns), memory_map=True)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
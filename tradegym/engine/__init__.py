@@ -4,4 +4,5 @@ from .core import *
 from .kline import *
 from .trader import *
 from .utility import *
-from .engine import *
\ No newline at end of file
+from .engine import *
+from .snapshot import *
\ No newline at end of file
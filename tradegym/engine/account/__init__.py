@@ -1,4 +1,6 @@
 from .account import *
+from .book import *
+from .ledger import *
 from .portfolio import *
 from .position import *
 from .wallet import *
\ No newline at end of file
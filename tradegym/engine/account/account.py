@@ -1,5 +1,6 @@
 from typing import Optional, ClassVar
 from tradegym.engine.core import Plugin, Field
+from .ledger import Ledger
 from .portfolio import Portfolio
 from .wallet import Wallet
 
@@ -12,9 +13,11 @@ class Account(Plugin):
     
     wallet: Wallet = Field(default_factory=lambda: Wallet(0.0))
     portfolio: Portfolio = Field(default_factory=lambda: Portfolio())
+    ledger: Ledger = Field(default_factory=Ledger, exclude=True)
     
     def reset(self) -> None:
         self.wallet.reset()
         self.portfolio.reset()
+        self.ledger.reset()
     
    
@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional, Tuple
+from tradegym.engine.core import Formula
+from tradegym.engine.contract.pricing import PricingKernel, SIDE_CODES
+
+
+__all__ = ["NetPosition", "PositionBook"]
+
+
+
+class NetPosition(object):
+    """Opened volume and entry cost (sum of price * volume) of all positions of a code and side"""
+
+    __slots__ = ("code", "side", "side_code", "volume", "cost", "last_price")
+
+    def __init__(self, code: str, side: str):
+        self.code = code
+        self.side = side
+        self.side_code = SIDE_CODES[side]
+        self.volume: float = 0
+        self.cost: float = 0.0
+        self.last_price: Optional[float] = None
+
+    @property
+    def avg_price(self) -> float:
+        return self.cost / self.volume if self.volume > 0 else 0.0
+
+    def unrealized_pnl(self, multiplier: int, last_price: Optional[float] = None) -> float:
+        if last_price is None:
+            last_price = self.last_price
+        return Formula.net_position_unrealized_pnl(self.cost, self.volume, self.side, multiplier, last_price)
+
+
+
+class PositionBook(object):
+    """
+    Net positions per (code, side), updated incrementally on every open and close,
+    so marking to market costs one multiply per (code, side) however many positions are held.
+    """
+
+    __slots__ = ("positions", "code_positions")
+
+    def __init__(self):
+        self.positions: Dict[Tuple[str, str], NetPosition] = {}
+        self.code_positions: Dict[str, List[NetPosition]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def codes(self) -> List[str]:
+        return list(self.code_positions.keys())
+
+    def get(self, code: str, side: str) -> Optional[NetPosition]:
+        return self.positions.get((code, side), None)
+
+    def add(self, code: str, side: str, price: float, volume: float):
+        key = (code, side)
+        position = self.positions.get(key, None)
+        if position is None:
+            position = self.positions[key] = NetPosition(code, side)
+            self.code_positions.setdefault(code, []).append(position)
+        position.volume += volume
+        position.cost += price * volume
+
+    def remove(self, code: str, side: str, price: float, volume: float):
+        key = (code, side)
+        position = self.positions.get(key, None)
+        assert position is not None and position.volume >= volume, ValueError(f"Not enough volume of '{code}' {side} in position book")
+        position.volume -= volume
+        position.cost -= price * volume
+        if position.volume <= 0:
+            del self.positions[key]
+            positions = self.code_positions[code]
+            positions.remove(position)
+            if len(positions) == 0:
+                del self.code_positions[code]
+
+    def mark(self, code: str, last_price: float, kernel: PricingKernel) -> float:
+        """Cache last price of a code and return unrealized pnl of both sides"""
+        pnl = 0.0
+        net_unrealized_pnl = kernel.net_unrealized_pnl
+        for position in self.code_positions.get(code, ()):
+            position.last_price = last_price
+            pnl += net_unrealized_pnl(position.cost, position.volume, position.side_code, last_price)
+        return pnl
+
+    def clear(self):
+        self.positions = {}
+        self.code_positions = {}
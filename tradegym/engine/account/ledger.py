@@ -0,0 +1,149 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+__all__ = ["Ledger"]
+
+
+
+class Ledger(object):
+    """
+    Columnar record of every fill, one row per open and per position closed.
+
+    Columns are preallocated numpy arrays grown by doubling, appending creates no objects.
+    Row ids increase monotonically, close rows refer to the row that opened their position.
+    `column`, `to_dict` and `to_dataframe` return views of the filled rows, valid until the next append.
+    """
+
+    SIDES: Tuple[str, ...] = ("long", "short")
+    TYPES: Tuple[str, ...] = ("open", "close")
+
+    COLUMNS: Tuple[Tuple[str, type], ...] = (
+        ("datetime", np.int64),
+        ("code", np.int32),
+        ("side", np.int8),
+        ("type", np.int8),
+        ("price", np.float64),
+        ("volume", np.float64),
+        ("commission", np.float64),
+        ("margin", np.float64),
+        ("realized_pnl", np.float64),
+        ("position", np.int64),
+    )
+
+    __slots__ = ("size", "codes", "code_index", "arrays")
+
+    def __init__(self, capacity: int = 1024):
+        self.size: int = 0
+        self.codes: List[str] = []
+        self.code_index: Dict[str, int] = {}
+        self.arrays: Dict[str, np.ndarray] = {name: np.zeros(max(capacity, 1), dtype=dtype) for name, dtype in self.COLUMNS}
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.arrays["datetime"])
+
+    @property
+    def columns(self) -> List[str]:
+        return [name for name, _ in self.COLUMNS]
+
+    def code_id(self, code: str) -> int:
+        idx = self.code_index.get(code, None)
+        if idx is None:
+            idx = self.code_index[code] = len(self.codes)
+            self.codes.append(code)
+        return idx
+
+    def append(
+        self,
+        datetime: int,
+        code: str,
+        side: str,
+        type: str,
+        price: float,
+        volume: float,
+        commission: float,
+        margin: float,
+        realized_pnl: float = 0.0,
+        position: int = -1,
+    ) -> int:
+        """Record a fill with datetime in nanoseconds, returns its row id. Open rows refer to themselves as position, -1 for unknown"""
+        idx = self.size
+        if idx == self.capacity:
+            self.reserve(idx * 2)
+        arrays = self.arrays
+        arrays["datetime"][idx] = datetime
+        arrays["code"][idx] = self.code_id(code)
+        arrays["side"][idx] = 0 if side == "long" else 1
+        arrays["type"][idx] = 0 if type == "open" else 1
+        arrays["price"][idx] = price
+        arrays["volume"][idx] = volume
+        arrays["commission"][idx] = commission
+        arrays["margin"][idx] = margin
+        arrays["realized_pnl"][idx] = realized_pnl
+        arrays["position"][idx] = idx if type == "open" else position
+        self.size = idx + 1
+        return idx
+
+    def reserve(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        for name, arr in self.arrays.items():
+            grown = np.zeros(capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.arrays[name] = grown
+
+    def reset(self):
+        """Drop all rows, allocated arrays are reused"""
+        self.size = 0
+        self.codes = []
+        self.code_index = {}
+
+    def export(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Codes and copies of the filled rows, see `load`"""
+        return list(self.codes), {name: arr[:self.size].copy() for name, arr in self.arrays.items()}
+
+    def load(self, codes: Sequence[str], arrays: Dict[str, np.ndarray]):
+        """Replace all rows by rows of `export`, allocated arrays are reused"""
+        size = len(arrays["datetime"])
+        self.reserve(size)
+        for name, arr in arrays.items():
+            self.arrays[name][:size] = arr
+        self.size = size
+        self.codes = list(codes)
+        self.code_index = {code: i for i, code in enumerate(self.codes)}
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[name][:self.size]
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        return {name: arr[:self.size] for name, arr in self.arrays.items()}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Numeric columns are views, code/side/type are decoded into categoricals over the stored integer codes"""
+        data = self.to_dict()
+        data["datetime"] = data["datetime"].view("datetime64[ns]")
+        data["code"] = pd.Categorical.from_codes(data["code"], categories=self.codes)
+        data["side"] = pd.Categorical.from_codes(data["side"], categories=self.SIDES)
+        data["type"] = pd.Categorical.from_codes(data["type"], categories=self.TYPES)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Zero-copy arrow table, requires pyarrow"""
+        import pyarrow as pa
+
+        data = self.to_dict()
+        columns = {}
+        for name, arr in data.items():
+            if name == "datetime":
+                columns[name] = pa.array(arr.view("datetime64[ns]"))
+            elif name in ("code", "side", "type"):
+                categories = {"code": self.codes, "side": self.SIDES, "type": self.TYPES}[name]
+                columns[name] = pa.DictionaryArray.from_arrays(pa.array(arr), pa.array(list(categories), type=pa.string()))
+            else:
+                columns[name] = pa.array(arr)
+        return pa.table(columns)
@@ -1,5 +1,9 @@
-from typing import Optional, Sequence, Union, List
+from typing import Optional, Sequence, Union, List, Dict, Tuple, Any, ClassVar
+import numpy as np
 from tradegym.engine.core import TObject, Field, writable
+from tradegym.engine.contract import SIDE_CODES
+from tradegym.engine.utility import to_nanoseconds, from_nanoseconds
+from .book import PositionBook
 from .position import Position
 
 
@@ -8,11 +12,35 @@ __all__ = ["Portfolio"]
 
 class Portfolio(TObject):
 
+    # numeric state of an opened position, see `export_opened`
+    OPENED_DTYPE: ClassVar[np.dtype] = np.dtype([
+        ("side", np.int8),
+        ("price", np.float64),
+        ("volume", np.float64),
+        ("commission", np.float64),
+        ("margin", np.float64),
+        ("date", np.int64),
+        ("ledger_id", np.int64),
+        ("closed_volume", np.float64),
+        ("closed_commission", np.float64),
+        ("released_margin", np.float64),
+    ])
+
     positions: List[Position] = Field(default_factory=list)
 
+    # indexes, opened positions are kept in open order
+    position_map: Dict[str, Position] = Field(default_factory=dict, exclude=True)
+    open_positions: Dict[str, Position] = Field(default_factory=dict, exclude=True)
+    side_positions: Dict[Tuple[str, str], Dict[str, Position]] = Field(default_factory=dict, exclude=True)
+    book: PositionBook = Field(default_factory=PositionBook, exclude=True)
+
+    def model_post_init(self, context: Any):
+        for position in self.positions:
+            self._index(position)
+
     @property
     def opened_positions(self) -> List[Position]:
-        return [p for p in self.positions if p.opened]
+        return list(self.open_positions.values())
     
     @property
     def closed_positions(self) -> List[Position]:
@@ -21,18 +49,59 @@ class Portfolio(TObject):
     @writable
     def reset(self):
         self.positions = []
+        self.position_map = {}
+        self.open_positions = {}
+        self.side_positions = {}
+        self.book = PositionBook()
+
+    def export_opened(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """Ids, codes and `OPENED_DTYPE` records of opened positions in open order"""
+        positions = self.open_positions.values()
+        records = np.array([
+            (
+                SIDE_CODES[p.side], p.price, p.volume, p.commission, p.margin, to_nanoseconds(p.date),
+                -1 if p.ledger_id is None else p.ledger_id, p.closed_volume, p.closed_commission, p.released_margin,
+            )
+            for p in positions
+        ], dtype=self.OPENED_DTYPE)
+        return [p.id for p in positions], [p.code for p in positions], records
 
     @writable
+    def restore_opened(self, ids: Sequence[str], codes: Sequence[str], records: np.ndarray):
+        """Replace all positions by the opened positions of `export_opened`, closes are not restored"""
+        self.reset()
+        sides = ("long", "short")
+        for id, code, record in zip(ids, codes, records.tolist()):
+            side, price, volume, commission, margin, date, ledger_id, closed_volume, closed_commission, released_margin = record
+            position = Position.trusted(
+                id=id, code=code, side=sides[side], price=price, volume=volume, commission=commission, margin=margin,
+                date=from_nanoseconds(date).to_pydatetime(warn=False), ledger_id=None if ledger_id < 0 else ledger_id,
+                closed_volume=int(closed_volume), closed_commission=closed_commission, released_margin=released_margin,
+            )
+            self.positions.append(position)
+            self._index(position)
+
+    def get_position(self, id: str) -> Position:
+        position = self.position_map.get(id, None)
+        assert position is not None, ValueError(f"position '{id}' not found")
+        return position
+
+    def get_opened_positions(self, code: str, side: str) -> List[Position]:
+        positions = self.side_positions.get((code, side), None)
+        return [] if positions is None else list(positions.values())
+
     def open(self, **kwargs) -> str:
-        position = Position(**kwargs)
+        position = Position.trusted(**kwargs)
         self.positions.append(position)
+        self._index(position)
         return position.id
 
-    def close(self, id: str, *args, **kwargs) -> str:
-        idx = next((i for i, pos in enumerate(self.positions) if pos.id == id), -1)
-        assert idx < 0, f"position '{id}' not found"
-        pos = self.positions[idx]
-        close = pos.close(*args, **kwargs)
+    def close(self, id: str, **kwargs) -> str:
+        position = self.get_position(id)
+        close = position.close(**kwargs)
+        self.book.remove(position.code, position.side, position.price, close.volume)
+        if position.closed:
+            self._unindex_opened(position)
         return close.id
 
     def query(
@@ -42,10 +111,10 @@ class Portfolio(TObject):
         side: Optional[Union[str, Sequence[str]]] = None,
         status: Optional[Union[str, Sequence[str]]] = None
     ) -> Sequence[Position]:
-        ids = set()
+        ids = []
         if id is not None:
             assert isinstance(id, (str, tuple, list)), f"id must be str or Sequence[str]"
-            ids = {id} if isinstance(id, str) else set(id)
+            ids = [id] if isinstance(id, str) else list(dict.fromkeys(id))
 
         codes = set()
         if code is not None:
@@ -62,10 +131,18 @@ class Portfolio(TObject):
             assert isinstance(status, (str, tuple, list)), f"status must be str or Sequence[str]"
             statuses = {status} if isinstance(status, str) else set(status)
 
+        # narrow candidates with indexes
+        if len(ids) > 0:
+            candidates = [self.position_map[i] for i in ids if i in self.position_map]
+        elif statuses == {"opened"}:
+            if len(codes) == 1 and len(sides) == 1:
+                return self.get_opened_positions(next(iter(codes)), next(iter(sides)))
+            candidates = self.open_positions.values()
+        else:
+            candidates = self.positions
+
         positions = []
-        for pos in self.positions:
-            if len(ids) > 0 and pos.id not in ids:
-                continue
+        for pos in candidates:
             if len(codes) > 0 and pos.code not in codes:
                 continue
             if len(sides) > 0 and pos.side not in sides:
@@ -75,4 +152,19 @@ class Portfolio(TObject):
             positions.append(pos)
 
         return positions
-    
+
+    def _index(self, position: Position):
+        self.position_map[position.id] = position
+        if position.opened:
+            self.open_positions[position.id] = position
+            self.side_positions.setdefault((position.code, position.side), {})[position.id] = position
+            self.book.add(position.code, position.side, position.price, position.current_volume)
+
+    def _unindex_opened(self, position: Position):
+        self.open_positions.pop(position.id, None)
+        key = (position.code, position.side)
+        positions = self.side_positions.get(key, None)
+        if positions is not None:
+            positions.pop(position.id, None)
+            if len(positions) == 0:
+                del self.side_positions[key]
@@ -1,7 +1,7 @@
-from typing import Optional, Sequence, List, Literal
+from typing import Optional, Sequence, List, Literal, Any
 from datetime import datetime
 import secrets
-from tradegym.engine.core import TObject, Field
+from tradegym.engine.core import TObject, Field, writable
 from tradegym.engine.contract import Contract
 
 
@@ -22,46 +22,57 @@ class Position(TObject):
 
     contract: Optional[Contract] = Field(None, exclude=True)
 
+    # ledger row of the open fill
+    ledger_id: Optional[int] = Field(None, exclude=True)
+
+    # running aggregates of closes
+    closed_volume: int = Field(0, exclude=True)
+    closed_commission: float = Field(0.0, exclude=True)
+    released_margin: float = Field(0.0, exclude=True)
+
+    def model_post_init(self, context: Any):
+        if len(self.closes) == 0:
+            return
+        with self.writable():
+            self.closed_volume = sum(close.volume for close in self.closes)
+            self.closed_commission = sum(close.commission for close in self.closes)
+            self.released_margin = sum(close.released_margin for close in self.closes)
+
     @property
     def status(self) -> str:
         return "opened" if self.current_volume > 0 else "closed"
     
     @property
     def opened(self) -> bool:
-        return self.status == "opened"
+        return self.current_volume > 0
     
     @property
     def closed(self) -> bool:
-        return self.status == "closed"
-    
-    @property
-    def closed_commission(self) -> float:
-        return sum(close.commission for close in self.closes)
+        return self.current_volume <= 0
 
     @property
     def total_commission(self) -> float:
         return self.commission + self.closed_commission
 
-    @property
-    def closed_volume(self) -> int:
-        return sum(close.volume for close in self.closes)
-
     @property
     def current_volume(self) -> int:
         return self.volume - self.closed_volume
     
-    @property
-    def released_margin(self) -> float:
-        return sum(close.released_margin for close in self.closes)
-    
     @property
     def position_margin(self) -> float:
         return self.margin - self.released_margin
 
-    def close(self, price: float, volume: int, commission: float, realized_pnl: float, date: datetime) -> "Close":
-        assert self.current_volume >= volume, f"cannot close more than current quantity {self.current_volume}"
-        close = Close(price, volume, commission, realized_pnl, date)
+    @writable
+    def close(self, price: float, volume: int, commission: float, released_margin: float, realized_pnl: float, date: datetime) -> "Close":
+        assert self.current_volume >= volume, ValueError(f"cannot close more than current quantity {self.current_volume}")
+        close = Close.trusted(
+            price=price, volume=volume, commission=commission, 
+            released_margin=released_margin, realized_pnl=realized_pnl, date=date
+        )
         self.closes.append(close)
+        self.closed_volume += volume
+        self.closed_commission += commission
+        self.released_margin += released_margin
         return close
     
     
@@ -74,4 +85,3 @@ class Close(TObject):
     realized_pnl: float = Field()
     date: datetime = Field()
     id: str = Field(default_factory=lambda: secrets.token_urlsafe(8))
-    
\ No newline at end of file
@@ -36,6 +36,12 @@ class Wallet(TObject):
         self.margin = 0.0
         self.unrealized_pnls = {}
 
+    @writable
+    def restore(self, cash: float, margin: float, unrealized_pnls: Dict[str, float]):
+        self.cash = cash
+        self.margin = margin
+        self.unrealized_pnls = dict(unrealized_pnls)
+
     def has_enough_available_cash(self, amount: float) -> bool:
         return self.cash + self.unrealized_loss >= amount
     
@@ -51,6 +57,7 @@ class Wallet(TObject):
 
     @writable
     def update_unrealized_pnl(self, code: str, pnl: float):
-        self.unrealized_pnls[code] = pnl
         if pnl == 0:
-            del self.unrealized_pnls[code]
\ No newline at end of file
+            self.unrealized_pnls.pop(code, None)
+        else:
+            self.unrealized_pnls[code] = pnl
\ No newline at end of file
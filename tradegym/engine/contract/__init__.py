@@ -1,3 +1,4 @@
 from .commision import *
 from .contract import *
-from .manager import *
\ No newline at end of file
+from .manager import *
+from .pricing import *
\ No newline at end of file
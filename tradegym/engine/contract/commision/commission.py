@@ -1,5 +1,8 @@
-from typing import Optional, Dict, ClassVar, Type
+from typing import Optional, Dict, ClassVar, Type, Tuple, Union, Sequence
 from abc import ABC, abstractmethod
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
 from tradegym.engine.core import TObject, Field, computed_field
 
 
@@ -43,6 +46,51 @@ class Commission(TObject, ABC):
     ) -> CommisionInfo:
         pass
 
+    def batch(
+        self,
+        contract: "Contract",
+        prices: Union[float, Sequence[float], np.ndarray],
+        volumes: Union[int, Sequence[int], np.ndarray],
+        types: Union[str, Sequence[str], np.ndarray],      # open/close
+        open_dates: Optional[Union[Sequence[datetime], np.ndarray]] = None,
+        now: Optional[datetime] = None,
+        sides: Optional[Union[str, Sequence[str], np.ndarray]] = None,
+        engine: Optional["TradeEngine"] = None,
+        positions: Optional[Sequence["Position"]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fees of many fills at once, returns (exchange_fees, broker_fees) as float64 arrays.
+        Arguments broadcast against each other, `open_dates` (position open date per fill) and `now` are required for closes.
+        The default calls `__call__` per fill with `engine` and the closed `positions` when given, otherwise with
+        stand-ins holding only `clock.now` and the open date. Override it with a vectorized version.
+        """
+        if engine is None:
+            engine = SimpleNamespace(clock=SimpleNamespace(now=now))
+        if positions is None:
+            open_dates = np.asarray(open_dates, dtype=object)
+            closed = np.empty(open_dates.shape, dtype=object)
+            for i in np.ndindex(open_dates.shape):
+                open_date = open_dates[i]
+                if isinstance(open_date, np.datetime64):
+                    open_date = open_date.astype("datetime64[us]").item()
+                closed[i] = None if open_date is None else SimpleNamespace(date=open_date)
+        else:
+            # positions are iterable models, fill the object array without numpy unpacking them
+            closed = np.empty(len(positions), dtype=object)
+            for i, position in enumerate(positions):
+                closed[i] = position
+        prices, volumes, types, closed, sides = np.broadcast_arrays(
+            np.asarray(prices, dtype=np.float64), np.asarray(volumes), np.asarray(types, dtype=object),
+            closed, np.asarray(sides, dtype=object),
+        )
+        exchange_fees = np.zeros(prices.shape, dtype=np.float64)
+        broker_fees = np.zeros(prices.shape, dtype=np.float64)
+        for i in np.ndindex(prices.shape):
+            info = self(engine, contract, float(prices[i]), int(volumes[i]), types[i], sides[i], closed[i])
+            exchange_fees[i] = info.exchange_fee or 0.0
+            broker_fees[i] = info.broker_fee or 0.0
+        return exchange_fees, broker_fees
+
     @computed_field
     @property
     def name(self) -> str:
@@ -60,7 +108,11 @@ class FreeCommission(Commission):
     Name: ClassVar[str] = "free"
 
     def __call__(self, *args, **kwargs) -> CommisionInfo:
-        return CommisionInfo(total_fee=0)
+        return CommisionInfo.trusted()
+
+    def batch(self, contract: "Contract", prices, volumes, types, open_dates=None, now=None, sides=None, engine=None, positions=None) -> Tuple[np.ndarray, np.ndarray]:
+        shape = np.broadcast_shapes(np.shape(prices), np.shape(volumes), np.shape(types))
+        return np.zeros(shape, dtype=np.float64), np.zeros(shape, dtype=np.float64)
     
 
 
@@ -1,5 +1,7 @@
-from typing import ClassVar, Optional
-from tradegym.engine.core import Field
+from typing import ClassVar, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from tradegym.engine.core import Field, Formula
 from tradegym.engine.contract.contract import Contract
 from .commission import Commission, CommisionInfo
 
@@ -47,14 +49,14 @@ class CTPCommission(Commission):
         if type == "open":
             exchange_fee = self.ex_open_fee * volume + notional * self.ex_open_fee_rate
             broker_fee = self.bk_open_fee * volume + notional * self.bk_open_fee_rate
-            return CommisionInfo(
+            return CommisionInfo.trusted(
                 exchange_fee=exchange_fee,
                 broker_fee=broker_fee,
             )
         
         assert position is not None, ValueError("position is None for close")
-        # close
-        if engine.clock.now.day == position.date.day:
+        # close, intraday when the position is opened on the same date
+        if engine.clock.now.date() == position.date.date():
             ex_close_fee = self.ex_close_fee
             bk_close_fee = self.bk_close_fee
             ex_close_rate = self.ex_close_fee_rate
@@ -67,8 +69,42 @@ class CTPCommission(Commission):
 
         exchange_fee = ex_close_fee * volume + notional * ex_close_rate
         broker_fee = bk_close_fee * volume + notional * bk_close_rate
-        return CommisionInfo(
+        return CommisionInfo.trusted(
             exchange_fee=exchange_fee,
             broker_fee=broker_fee,
         )
-    
+
+    def batch(
+        self,
+        contract: Contract,
+        prices,
+        volumes,
+        types,
+        open_dates=None,
+        now: Optional[datetime] = None,
+        sides=None,
+        engine=None,
+        positions=None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        is_open = np.asarray(types) == "open"
+        notional = Formula.contract_notional_value(prices, volumes, contract.multiplier)
+
+        # intraday closes
+        if is_open.all():
+            intraday = True
+        else:
+            assert open_dates is not None and now is not None, ValueError("open_dates and now are required for close")
+            open_days = np.asarray(open_dates, dtype="datetime64[ns]").astype("datetime64[D]")
+            intraday = open_days == np.datetime64(now, "D")
+
+        # select fee and rate per fill
+        ex_fee = np.where(is_open, self.ex_open_fee, np.where(intraday, self.ex_close_fee, self.ex_close_fee_adv))
+        ex_rate = np.where(is_open, self.ex_open_fee_rate, np.where(intraday, self.ex_close_fee_rate, self.ex_close_fee_rate_adv))
+        bk_fee = np.where(is_open, self.bk_open_fee, np.where(intraday, self.bk_close_fee, self.bk_close_fee_adv))
+        bk_rate = np.where(is_open, self.bk_open_fee_rate, np.where(intraday, self.bk_close_fee_rate, self.bk_close_fee_rate_adv))
+
+        exchange_fees = ex_fee * volumes + notional * ex_rate
+        broker_fees = bk_fee * volumes + notional * bk_rate
+        return np.asarray(exchange_fees, dtype=np.float64), np.asarray(broker_fees, dtype=np.float64)
@@ -1,6 +1,7 @@
 from typing import Optional, Dict, TypeVar, Any
 from tradegym.engine.core import TObject, Field, field_validator, Formula
 from .commision import Commission, FreeCommission
+from .pricing import PricingKernel
 
 
 __all__ = ["Contract"]
@@ -18,6 +19,8 @@ class Contract(TObject):
     margin_rate: float = Field()
     tick_size: float = Field()
     commission: CommissionType = Field(default_factory=FreeCommission)
+    # built by `compile` when added to ContractManager
+    kernel: Optional[PricingKernel] = Field(None, exclude=True)
     
     
     @field_validator('commission', mode='plain')
@@ -33,3 +36,9 @@ class Contract(TObject):
     
     def calculate_margin(self, price: float, volume: int) -> float:
         return Formula.contract_margin(price, volume, self.multiplier, self.margin_rate)
+
+    def compile(self) -> PricingKernel:
+        """Build and cache the pricing kernels of this contract"""
+        with self.writable():
+            self.kernel = PricingKernel(self.multiplier, self.margin_rate, self.tick_size)
+        return self.kernel
@@ -22,6 +22,7 @@ class ContractManager(Plugin):
     
     def add_contract(self, contract: Contract) -> None:
         assert contract.code not in self.contract_map, ValueError(f"Contract code '{contract.code}' already exists")
+        contract.compile()
         self.contracts.append(contract)
         self.contract_map[contract.code] = contract
 
@@ -0,0 +1,96 @@
+from typing import Dict, Tuple, Callable
+import numpy as np
+
+
+__all__ = ["PricingKernel", "SIDE_CODES", "TYPE_CODES"]
+
+
+SIDES: Tuple[str, ...] = ("long", "short")
+TYPES: Tuple[str, ...] = ("open", "close")
+SIDE_CODES: Dict[str, int] = {side: i for i, side in enumerate(SIDES)}
+TYPE_CODES: Dict[str, int] = {type: i for i, type in enumerate(TYPES)}
+LONG, SHORT = SIDE_CODES["long"], SIDE_CODES["short"]
+OPEN, CLOSE = TYPE_CODES["open"], TYPE_CODES["close"]
+
+# price direction per side code
+_DIRECTIONS = (1, -1)
+_DIRECTION_ARRAY = np.array(_DIRECTIONS, dtype=np.float64)
+
+
+
+class PricingKernel(object):
+    """
+    Pricing formulas of one contract with multiplier, margin rate and tick size bound in closures.
+    Side and type are the int codes of `SIDE_CODES` and `TYPE_CODES`.
+
+    Scalar kernels give the same results as `Formula`, plural kernels take numpy arrays (or scalars) and broadcast.
+    """
+
+    __slots__ = (
+        "multiplier", "margin_rate", "tick_size",
+        "notional_value", "margin", "unrealized_pnl", "net_unrealized_pnl", "realized_pnl", "slippage_price",
+        "notional_values", "margins", "unrealized_pnls", "net_unrealized_pnls", "realized_pnls", "slippage_prices",
+    )
+
+    def __init__(self, multiplier: int, margin_rate: float, tick_size: float):
+        self.multiplier = multiplier
+        self.margin_rate = margin_rate
+        self.tick_size = tick_size
+
+        directions = _DIRECTIONS
+        direction_array = _DIRECTION_ARRAY
+
+        # scalar
+        def notional_value(price: float, volume: int) -> float:
+            return price * volume * multiplier
+
+        def margin(price: float, volume: int) -> float:
+            return round(price * volume * multiplier * margin_rate, 2)
+
+        def unrealized_pnl(open_price: float, volume: int, side: int, last_price: float) -> float:
+            return directions[side] * (last_price - open_price) * volume * multiplier
+
+        def net_unrealized_pnl(cost: float, volume: int, side: int, last_price: float) -> float:
+            return directions[side] * (last_price * volume - cost) * multiplier
+
+        def realized_pnl(open_price: float, close_price: float, volume: int, side: int) -> float:
+            return directions[side] * (close_price - open_price) * volume * multiplier
+
+        def slippage_price(last_price: float, type: int, side: int, slippage: float) -> float:
+            # open long and close short pay up, the others pay down
+            if type == side:
+                return last_price + tick_size * slippage
+            return last_price - tick_size * slippage
+
+        # vectorized
+        def notional_values(prices: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+            return np.multiply(prices, volumes, dtype=np.float64) * multiplier
+
+        def margins(prices: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+            return np.round(notional_values(prices, volumes) * margin_rate, 2)
+
+        def unrealized_pnls(open_prices: np.ndarray, volumes: np.ndarray, sides: np.ndarray, last_prices: np.ndarray) -> np.ndarray:
+            return direction_array[sides] * np.subtract(last_prices, open_prices, dtype=np.float64) * volumes * multiplier
+
+        def net_unrealized_pnls(costs: np.ndarray, volumes: np.ndarray, sides: np.ndarray, last_prices: np.ndarray) -> np.ndarray:
+            return direction_array[sides] * (np.multiply(last_prices, volumes, dtype=np.float64) - costs) * multiplier
+
+        def realized_pnls(open_prices: np.ndarray, close_prices: np.ndarray, volumes: np.ndarray, sides: np.ndarray) -> np.ndarray:
+            return direction_array[sides] * np.subtract(close_prices, open_prices, dtype=np.float64) * volumes * multiplier
+
+        def slippage_prices(last_prices: np.ndarray, types: np.ndarray, sides: np.ndarray, slippage: float) -> np.ndarray:
+            signs = np.where(np.equal(types, sides), 1.0, -1.0)
+            return np.add(last_prices, signs * (tick_size * slippage), dtype=np.float64)
+
+        self.notional_value: Callable[..., float] = notional_value
+        self.margin: Callable[..., float] = margin
+        self.unrealized_pnl: Callable[..., float] = unrealized_pnl
+        self.net_unrealized_pnl: Callable[..., float] = net_unrealized_pnl
+        self.realized_pnl: Callable[..., float] = realized_pnl
+        self.slippage_price: Callable[..., float] = slippage_price
+        self.notional_values: Callable[..., np.ndarray] = notional_values
+        self.margins: Callable[..., np.ndarray] = margins
+        self.unrealized_pnls: Callable[..., np.ndarray] = unrealized_pnls
+        self.net_unrealized_pnls: Callable[..., np.ndarray] = net_unrealized_pnls
+        self.realized_pnls: Callable[..., np.ndarray] = realized_pnls
+        self.slippage_prices: Callable[..., np.ndarray] = slippage_prices
@@ -24,6 +24,12 @@ class Formula(object):
         direction = +1 if side == "long" else -1
         return direction * (last_price - open_price) * volume * multiplier
     
+    @staticmethod
+    def net_position_unrealized_pnl(cost: float, volume: int, side: str, multiplier: int, last_price: float) -> float:
+        """unrealized pnl of positions aggregated into total volume and cost (sum of open price * volume)"""
+        direction = +1 if side == "long" else -1
+        return direction * (last_price * volume - cost) * multiplier
+    
     @staticmethod
     def position_realized_pnl(open_price: float, close_price: float, volume: int, side: str, multiplier: int) -> float:
         direction = +1 if side == "long" else -1
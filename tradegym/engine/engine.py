@@ -1,11 +1,13 @@
-from typing import Optional, Sequence
+from typing import Optional, Sequence, Union, Dict, Hashable
+from datetime import datetime
 import pandas as pd
 from .core import PluginManager, Plugin, Formula
 from .account import Account
 from .contract import ContractManager
-from .kline import KLineManager
-from .trader import Trader, TradeInfo
+from .kline import KLineManager, KLineData
+from .trader import Trader, TradeInfo, Order, BatchTradeInfo
 from .utility import Clock
+from .snapshot import EngineSnapshot
 
 
 __all__ = ["TradeEngine"]
@@ -54,15 +56,17 @@ class TradeEngine(PluginManager):
     def terminated(self) -> bool:
         return self.kline.terminated
 
-    def activate(self, dataframes: Sequence[pd.DataFrame]):
-        self.kline.activate(dataframes)
+    def activate(self, dataframes: Optional[Sequence[Union[pd.DataFrame, KLineData, None]]] = None, chunks: Optional[Sequence[Hashable]] = None):
+        self.kline.activate(dataframes, chunks)
 
-    def reset(self):
+    def reset(self, start: Optional[Union[int, datetime, str, pd.Timestamp]] = None, length: Optional[int] = None):
+        """Start at the first common bar or `start` (see `KLineManager.resolve_start`), ending after `length` bars if given"""
         # reset clock
-        self.clock.set_now(self.kline.calc_latest_start_time())
+        self.clock.set_now(self.kline.resolve_start(start))
 
         # reset plugins
         super().reset()
+        self.kline.limit(length)
 
     def tick(self):
         self.clock.tick()
@@ -75,15 +79,50 @@ class TradeEngine(PluginManager):
     def close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> TradeInfo:
         return self.trader.close(code, side, price, volume)
 
+    def submit_batch(self, orders: Sequence[Union[Order, Dict]]) -> BatchTradeInfo:
+        orders = [Order.deserialize(order) if isinstance(order, dict) else order for order in orders]
+        return self.trader.submit_batch(orders)
+
+    def snapshot(self) -> EngineSnapshot:
+        """Mutable state only, market data stays shared with the klines"""
+        wallet = self.account.wallet
+        ids, codes, positions = self.account.portfolio.export_opened()
+        ledger_codes, ledger = self.account.ledger.export()
+        return EngineSnapshot(
+            now=self.clock.now,
+            span=self.kline.span(),
+            cursors=self.kline.cursors(),
+            cash=wallet.cash,
+            margin=wallet.margin,
+            unrealized_pnls=dict(wallet.unrealized_pnls),
+            position_ids=ids,
+            position_codes=codes,
+            positions=positions,
+            ledger_codes=ledger_codes,
+            ledger=ledger,
+        )
+
+    def restore(self, snapshot: EngineSnapshot):
+        """
+        Roll back to a snapshot of this engine, or fork one of another engine with the same klines activated on the same data.
+        The episode span and ledger rows are those of the snapshot, so `ledger_id` of restored positions stays valid.
+        """
+        self.clock.set_now(snapshot.now)
+        self.kline.restore_span(snapshot.span)
+        self.kline.seek(snapshot.cursors)
+        self.account.wallet.restore(snapshot.cash, snapshot.margin, snapshot.unrealized_pnls)
+        self.account.portfolio.restore_opened(snapshot.position_ids, snapshot.position_codes, snapshot.positions)
+        self.account.ledger.load(snapshot.ledger_codes, snapshot.ledger)
+
     def update_unrealized_pnls(self):
-        # calculate unrealized pnls
-        unrealized_pnls = {}
-        for position in self.account.portfolio.opened_positions:
-            contract = self.contract.get_contract(position.code)
-            last_price = self.kline.get_kline(position.code).quote.last_price
-            unrealized_pnls.setdefault(position.code, 0.0)
-            unrealized_pnls[position.code] += Formula.position_unrealized_pnl(position.price, position.volume, position.side, contract.multiplier, last_price)
+        # mark net positions to market
+        wallet = self.account.wallet
+        book = self.account.portfolio.book
+        unrealized_pnls = dict.fromkeys(wallet.unrealized_pnls, 0.0)
+        for code in book.code_positions:
+            last_price = self.kline.get_kline(code).quote.last_price
+            unrealized_pnls[code] = book.mark(code, last_price, self.contract.get_contract(code).kernel)
         
-        # update
+        # update, codes without opened positions are cleared
         for code, pnl in unrealized_pnls.items():
-            self.account.wallet.update_unrealized_pnl(code, pnl)
+            wallet.update_unrealized_pnl(code, pnl)
@@ -1,3 +1,7 @@
+from .data import *
 from .kline import *
 from .manager import *
-from .quote import *
\ No newline at end of file
+from .quote import *
+from .registry import *
+from .resample import *
+from .shared import *
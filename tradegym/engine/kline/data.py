@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+
+__all__ = ["KLineData"]
+
+
+
+class KLineData(object):
+    """
+    Read-only columnar storage of a kline, one contiguous numpy array per column.
+    The 'datetime' column is kept as datetime64[ns] and doubles as the index.
+    """
+
+    __slots__ = ("columns", "column_index", "arrays", "datetimes", "times", "buffers")
+
+    def __init__(self, columns: Sequence[str], arrays: Sequence[np.ndarray], buffers: Optional[Sequence[Any]] = None):
+        assert len(columns) == len(arrays), ValueError("Length of columns and arrays must be equal")
+        assert "datetime" in columns, ValueError("Column 'datetime' is required")
+        self.columns: List[str] = list(columns)
+        self.column_index: Dict[str, int] = {col: i for i, col in enumerate(self.columns)}
+        self.arrays: List[np.ndarray] = []
+        for arr in arrays:
+            arr = np.ascontiguousarray(arr)
+            arr.flags.writeable = False
+            self.arrays.append(arr)
+        self.datetimes: np.ndarray = self.arrays[self.column_index["datetime"]]
+        self.times: np.ndarray = self.datetimes.view(np.int64)
+        # keeps external memory (e.g. shared memory blocks) backing the arrays alive
+        self.buffers: List[Any] = [] if buffers is None else list(buffers)
+
+    def __len__(self) -> int:
+        return len(self.datetimes)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[self.column_index[name]]
+
+    def locate(self, time_ns: int) -> int:
+        """Index of the last bar at or before time_ns, -1 if time_ns precedes the first bar"""
+        return int(np.searchsorted(self.times, time_ns, side='right')) - 1
+
+    @staticmethod
+    def from_dataframe(df: pd.DataFrame) -> "KLineData":
+        columns = [str(col) for col in df.columns]
+        arrays = [df[col].to_numpy() for col in df.columns]
+        dt_idx = columns.index("datetime")
+        arrays[dt_idx] = arrays[dt_idx].astype("datetime64[ns]")
+        return KLineData(columns, arrays)
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray]) -> "KLineData":
+        """
+        Build from raw columns (e.g. memory-mapped published chunks) without a dataframe round trip.
+        Column prefixes are stripped and rows are sorted by datetime only if they are out of order.
+        """
+        columns = [str(col).rsplit('.', 1)[-1] for col in arrays.keys()]
+        values = list(arrays.values())
+        dt_idx = columns.index("datetime")
+        datetimes = values[dt_idx]
+        if datetimes.dtype != np.dtype("datetime64[ns]"):
+            datetimes = pd.to_datetime(datetimes).to_numpy().astype("datetime64[ns]")
+        values[dt_idx] = datetimes
+        times = datetimes.view(np.int64)
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            values = [arr[order] for arr in values]
+        return KLineData(columns, values)
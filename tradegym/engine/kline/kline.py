@@ -1,9 +1,13 @@
-from typing import Optional, Sequence, Union
+from typing import Optional, Sequence, Union, Dict, Hashable
 import numpy as np
 from datetime import datetime
 import pandas as pd
 from tradegym.engine.core import TObject, Field, writable
+from tradegym.engine.utility import to_nanoseconds, from_nanoseconds
+from .data import KLineData
 from .quote import Quote
+from .resample import Resampler, BarBuilder
+from .registry import MARKET_DATA, MarketDataRegistry
 
 
 __all__ = ["KLine"]
@@ -15,65 +19,136 @@ class KLine(TObject):
     code: str = Field()
     timestep: float = Field()
     cursor: int = Field(0)
+    # timestep of the kline of the same code this one is resampled from, None if it is supplied on activate
+    source: Optional[float] = Field(None)
 
-    dataframe: pd.DataFrame = Field(None, exclude=True)
-
-    @property
-    def dataframe(self) -> pd.DataFrame:
-        return self.dataframe
+    # references the market data registry entry when set up from a dataframe
+    data: Optional[KLineData] = Field(None, exclude=True)
+    builder: Optional[BarBuilder] = Field(None, exclude=True)
 
     @property
     def columns(self) -> Sequence[str]:
-        return self.dataframe.columns
+        return self.data.columns
+
+    def to_dataframe(self) -> Optional[pd.DataFrame]:
+        """Market data copied into a new dataframe, None before activation"""
+        if self.data is None:
+            return None
+        return pd.DataFrame(dict(zip(self.data.columns, self.data.arrays)))
 
     @property
     def quote(self) -> Quote:
-        return Quote.deserialize(self.dataframe.iloc[self.cursor].to_dict())
+        return Quote(self.data, self.cursor)
     
     @property
     def terminated(self) -> bool:
-        return self.cursor + 1 >= len(self.dataframe)
+        return self.cursor + 1 >= len(self.data)
     
     def __len__(self) -> int:
-        return len(self.dataframe)
+        return len(self.data)
     
-    def __getitem__(self, index: int) -> pd.Series:
-        return self.dataframe.iloc[index]
+    def __getitem__(self, index: int) -> Quote:
+        size = len(self.data)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError(f"kline index {index} out of range, code: '{self.code}' timestep: '{self.timestep}'")
+        return Quote(self.data, index)
+
+    def window(self, n: int, columns: Optional[Union[str, Sequence[str]]] = None) -> Union[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Read-only views of the last n rows up to and including `cursor`, fewer near the start of the data.
+        A column name gives one array, a sequence of names (default all columns) gives a dict of arrays.
+        The current row of a resampled kline is its live bar and changes in place as the clock ticks.
+        """
+        assert n > 0, ValueError(f"Window size must be positive, got {n}")
+        data = self.data
+        stop = self.cursor + 1
+        start = max(stop - n, 0)
+        if isinstance(columns, str):
+            return data.arrays[data.column_index[columns]][start:stop]
+        columns = data.columns if columns is None else columns
+        return {col: data.arrays[data.column_index[col]][start:stop] for col in columns}
 
     @writable    
-    def setup(self, dataframe: pd.DataFrame):
-        self.dataframe = self.normalize_dataframe(dataframe)
-        td = self.dataframe.iloc[1]["datetime"] - self.dataframe.iloc[0]["datetime"]
-        assert td.total_seconds() == self.timestep, ValueError(f"timestep mismatch for code '{self.code}', expect {self.timestep}, got {td.total_seconds()}")
+    def setup(self, dataframe: Optional[pd.DataFrame], chunk: Optional[Hashable] = None):
+        """Use the registered market data of `chunk`, converted from `dataframe` once per process"""
+        self.attach(MARKET_DATA.load(self.code, self.timestep, dataframe, chunk))
+
+    @writable
+    def attach(self, data: KLineData):
+        """Use already converted market data, e.g. shared by another kline or mapped from shared memory"""
+        td = (data.datetimes[1] - data.datetimes[0]) / np.timedelta64(1, 's')
+        assert td == self.timestep, ValueError(f"timestep mismatch for code '{self.code}', expect {self.timestep}, got {td}")
+        self.data = data
     
     @writable
     def reset(self, datetime: Union[datetime, str, pd.Timestamp]):
-        ctime = pd.to_datetime(datetime)
-        exact_match = self.dataframe.index[self.dataframe['datetime'] == ctime]
-        if len(exact_match) > 0:
-            self.cursor = exact_match[0]
-            return
-        mask = (self.dataframe['datetime'] < ctime)
-        if not mask.any():
+        cursor = self.data.locate(to_nanoseconds(datetime))
+        if cursor < 0:
             raise ValueError(f"datetime '{datetime}' is out of range in kline, code: '{self.code}' timestep: '{self.timestep}'")
-        self.cursor = self.dataframe.loc[mask, 'datetime'].idxmax()
+        self.cursor = cursor
 
     @writable
-    def tick(self, datetime: Union[datetime, str, pd.Timestamp]):
-        ctime = pd.to_datetime(datetime)
-        if ctime < self.dataframe.iloc[self.cursor]['datetime']:
-            raise ValueError(f"Try to locate a previous datetime '{ctime}', current datetime '{self.dataframe[self.cursor]['datetime']}'")
-        elif ctime == self.dataframe.iloc[self.cursor]['datetime']:
+    def seek(self, cursor: int):
+        if self.builder is not None:
+            raise ValueError(f"Can not seek resampled kline '{self.code}' ({self.timestep}), seek its source and follow it")
+        if cursor < 0 or cursor >= len(self.data):
+            raise IndexError(f"kline cursor {cursor} out of range, code: '{self.code}' timestep: '{self.timestep}'")
+        self.cursor = cursor
+
+    @writable
+    def share(self, kline: "KLine"):
+        """Reference the market data of an activated kline instead of converting a dataframe again"""
+        assert kline.code == self.code and kline.timestep == self.timestep, ValueError(f"Can not share kline '{kline.code}' ({kline.timestep}) with '{self.code}' ({self.timestep})")
+        if kline.builder is not None:
+            # resampled bars are shared, the live bar is per kline
+            self._build(kline.builder.resampler)
             return
+        self.attach(kline.data)
+
+    @writable
+    def resample(self, source: "KLine"):
+        """Derive bars of this timestep from the ticks of an activated kline of the same code"""
+        assert source.code == self.code and source.timestep < self.timestep, ValueError(f"Can not resample kline '{self.code}' ({self.timestep}) from '{source.code}' ({source.timestep})")
+        self._build(Resampler(source.data, self.timestep))
+
+    @writable
+    def follow(self, tick_cursor: int):
+        """Move a resampled kline to the bar of its source tick at `tick_cursor`, built from ticks up to it"""
+        self.cursor = self.builder.update(tick_cursor)
+
+    @writable
+    def _build(self, resampler: Resampler):
+        self.builder = BarBuilder(resampler)
+        self.data = self.builder.data
+
+    def tick(self, datetime: Union[datetime, str, pd.Timestamp]):
+        self.advance_to(to_nanoseconds(datetime))
+
+    def advance_to(self, time_ns: int) -> int:
+        """
+        Move cursor to the last bar at or before time_ns, holding the current bar on missing data.
+        Returns the number of bars advanced.
+        """
+        times = self.data.times
+        cursor = self.cursor
+        if time_ns < times[cursor]:
+            raise ValueError(f"Try to locate a previous datetime '{from_nanoseconds(time_ns)}', current datetime '{self.quote.datetime}'")
+
+        # common cases: hold or step one bar
+        nxt = cursor + 1
+        if nxt >= len(times) or times[nxt] > time_ns:
+            return 0
+        if nxt + 1 >= len(times) or times[nxt + 1] > time_ns:
+            new_cursor = nxt
         else:
-            if self.cursor + 1 >= len(self.dataframe):
-                return
-            if ctime == self.dataframe.iloc[self.cursor+1]['datetime']:
-                self.cursor += 1
+            new_cursor = self.data.locate(time_ns)
+
+        with self.writable():
+            self.cursor = new_cursor
+        return new_cursor - cursor
 
     @staticmethod
     def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df = df.sort_values('datetime', ascending=True)
-        df.columns = df.columns.str.split('.').str[-1]
-        return df
+        return MarketDataRegistry.normalize_dataframe(df)
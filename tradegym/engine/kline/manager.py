@@ -1,8 +1,10 @@
-from typing import Optional, List, Dict, ClassVar, Union, Sequence
+from typing import Optional, List, Dict, ClassVar, Union, Sequence, Hashable, Tuple
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from tradegym.engine.core import Plugin, Field, writable
-from tradegym.engine.utility import Clock
+from tradegym.engine.utility import Clock, to_nanoseconds, from_nanoseconds
+from .data import KLineData
 from .kline import KLine
 
 
@@ -17,6 +19,15 @@ class KLineManager(Plugin):
     klines: List[KLine] = Field(default_factory=list)
     code_klines: Dict[str, List[KLine]] = Field(default_factory=dict, exclude=True)
 
+    # span of the klines driving each code, computed on activation
+    start_time: Optional[datetime] = Field(None, exclude=True)
+    start_ns: int = Field(0, exclude=True)
+    last_ns: int = Field(0, exclude=True)
+    # last cursor of each kline
+    terminals: Optional[np.ndarray] = Field(None, exclude=True)
+    # clock time ending the episode, the last common bar or the end of a limited length
+    end_ns: int = Field(0, exclude=True)
+
     def __init__(self, klines: Optional[List[Union[KLine, Dict]]] = None):
         super().__init__()
         if klines is not None:
@@ -25,28 +36,122 @@ class KLineManager(Plugin):
     
     @property
     def activated(self) -> bool:
-        return all(kline.dataframe is not None for kline in self.klines)
+        return all(kline.data is not None for kline in self.klines)
     
     @property
     def terminated(self) -> bool:
-        return any(klines[0].terminated for _, klines in self.code_klines.items())
+        return to_nanoseconds(self.clock.now) >= self.end_ns
     
     @property
     def clock(self) -> Clock:
         return self.manager.clock
         
-    def activate(self, dataframes: Sequence[pd.DataFrame]):
-        assert len(dataframes) == len(self.klines), ValueError("Length of klines and dataframes must be equal")
-        for kline, df in zip(self.klines, dataframes):
-            kline.setup(df)
+    @property
+    def source_klines(self) -> List[KLine]:
+        """Klines supplied with market data, the others are resampled from them"""
+        return [kline for kline in self.klines if kline.source is None]
+
+    @property
+    def resampled_klines(self) -> List[KLine]:
+        return [kline for kline in self.klines if kline.source is not None]
 
+    def activate(self, dataframes: Optional[Sequence[Union[pd.DataFrame, KLineData, None]]] = None, chunks: Optional[Sequence[Hashable]] = None):
+        """
+        Activate source klines on dataframes or converted data. With `chunks`, dataframes are registered under
+        these keys and may be None once registered, see `MarketDataRegistry`.
+        """
+        klines = self.source_klines
+        dataframes = [None] * len(klines) if dataframes is None else dataframes
+        assert len(dataframes) == len(klines), ValueError("Length of source klines and dataframes must be equal")
+        assert chunks is None or len(chunks) == len(klines), ValueError("Length of source klines and chunks must be equal")
+        for i, (kline, df) in enumerate(zip(klines, dataframes)):
+            if isinstance(df, KLineData) and chunks is None:
+                kline.attach(df)
+            else:
+                kline.setup(df, None if chunks is None else chunks[i])
+        self._resample()
+        self._update_span()
+        self._update_timeline()
+
+    def attach(self, datas: Sequence[KLineData]):
+        klines = self.source_klines
+        assert len(datas) == len(klines), ValueError("Length of source klines and datas must be equal")
+        for kline, data in zip(klines, datas):
+            kline.attach(data)
+        self._resample()
+        self._update_span()
+        self._update_timeline()
+
+    def share(self, manager: "KLineManager"):
+        assert len(manager.klines) == len(self.klines), ValueError("Length of klines must be equal")
+        for kline, source in zip(self.klines, manager.klines):
+            kline.share(source)
+        self._update_span()
+        self._update_timeline(manager.clock.timeline)
+
+    @writable
     def reset(self):
-        for kline in self.klines:
+        self.end_ns = self.last_ns
+        for kline in self.source_klines:
             kline.reset(self.clock.now)
+        self._follow()
+
+    @writable
+    def limit(self, length: Optional[int]):
+        """End the episode `length` bars of the first kline of any code after the current cursors, None for the end of data"""
+        assert length is None or length > 0, ValueError(f"Episode length must be positive, got {length}")
+        if length is None:
+            self.end_ns = self.last_ns
+            return
+        end = self.last_ns
+        for klines in self.code_klines.values():
+            kline = klines[0]
+            end = min(end, int(kline.data.times[min(kline.cursor + length, len(kline) - 1)]))
+        self.end_ns = end
+
+    def resolve_start(self, start: Optional[Union[int, datetime, str, pd.Timestamp]] = None) -> datetime:
+        """
+        Episode start datetime, the first common bar by default. An int is a row offset of the first source kline.
+        Starts before the first common bar are rejected.
+        """
+        if start is None:
+            return self.start_time
+        if isinstance(start, (int, np.integer)):
+            data = self.source_klines[0].data
+            if start < 0 or start >= len(data):
+                raise IndexError(f"start offset {start} out of range, size: {len(data)}")
+            start = data.times[start]
+        start_ns = to_nanoseconds(start)
+        if start_ns < self.start_ns:
+            raise ValueError(f"start '{from_nanoseconds(start_ns)}' precedes the first common bar '{self.start_time}'")
+        return from_nanoseconds(start_ns).to_pydatetime(warn=False)
+
+    def span(self) -> Tuple[int, int, int]:
+        """(start_ns, last_ns, end_ns), see `restore_span`"""
+        return self.start_ns, self.last_ns, self.end_ns
+
+    @writable
+    def restore_span(self, span: Tuple[int, int, int]):
+        self.start_ns, self.last_ns, self.end_ns = span
+        self.start_time = from_nanoseconds(self.start_ns).to_pydatetime(warn=False)
+
+    def cursors(self) -> np.ndarray:
+        return np.array([kline.cursor for kline in self.klines], dtype=np.int64)
+
+    def seek(self, cursors: Sequence[int]):
+        """Move klines to `cursors` (in the order of `klines`), resampled klines follow their source"""
+        assert len(cursors) == len(self.klines), ValueError("Length of klines and cursors must be equal")
+        for kline, cursor in zip(self.klines, cursors):
+            if kline.source is None:
+                kline.seek(int(cursor))
+        self._follow()
 
     def tick(self):
+        now = to_nanoseconds(self.clock.now)
         for kline in self.klines:
-            kline.tick(self.clock.now)
+            if kline.source is None:
+                kline.advance_to(now)
+        self._follow()
 
     @writable
     def add_kline(self, kline: KLine) -> None:
@@ -59,9 +164,12 @@ class KLineManager(Plugin):
             if line.timestep == kline.timestep:
                 raise ValueError(f"KLine '{kline.code}' with timestamp '{line.timestep}' already exists")
         
-        # save
+        # save, klines with market data go before resampled ones so the first kline of a code drives it
         self.klines.append(kline)
-        line_lst.append(kline)
+        if kline.source is None:
+            line_lst.insert(sum(line.source is None for line in line_lst), kline)
+        else:
+            line_lst.append(kline)
              
     def get_kline(self, code: str, timestep: Optional[timedelta] = None) -> KLine:
         line_lst = self.code_klines.get(code)
@@ -74,12 +182,37 @@ class KLineManager(Plugin):
                     return line
             raise ValueError(f"KLine '{code}' with timestamp '{timestep}' not found")
         
+    def windows(self, n: int, columns: Optional[Union[str, Sequence[str]]] = None) -> List[Union[np.ndarray, Dict[str, np.ndarray]]]:
+        """`KLine.window` of every kline, in the order of `klines`"""
+        return [kline.window(n, columns) for kline in self.klines]
+
+    def build_timeline(self) -> np.ndarray:
+        """Sorted unique bar datetimes (int64 nanoseconds) of all klines"""
+        return np.unique(np.concatenate([kline.data.times for kline in self.klines]))
+
     def calc_latest_start_time(self) -> datetime:
-        latest = pd.Timestamp(year=1970, month=1, day=1)
-        for klines in self.code_klines.values():
-            kline = klines[0]
-            tm = kline.dataframe.iloc[0]['datetime']
-            if tm > latest:
-                latest = tm
-        return datetime.fromisoformat(str(latest))
-    
\ No newline at end of file
+        return self.start_time
+
+    @writable
+    def _update_span(self):
+        drivers = [klines[0] for klines in self.code_klines.values()]
+        self.start_ns = max(int(kline.data.times[0]) for kline in drivers)
+        self.last_ns = min(int(kline.data.times[-1]) for kline in drivers)
+        self.start_time = from_nanoseconds(self.start_ns).to_pydatetime(warn=False)
+        self.terminals = np.array([len(kline) - 1 for kline in self.klines], dtype=np.int64)
+        self.end_ns = self.last_ns
+
+    def _update_timeline(self, timeline: Optional[np.ndarray] = None):
+        # only the event clock steps over the timeline
+        clock = self.clock
+        if clock.mode != "event":
+            return
+        clock.set_timeline(self.build_timeline() if timeline is None else timeline)
+
+    def _resample(self):
+        for kline in self.resampled_klines:
+            kline.resample(self.get_kline(kline.code, kline.source))
+
+    def _follow(self):
+        for kline in self.resampled_klines:
+            kline.follow(self.get_kline(kline.code, kline.source).cursor)
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Any, Dict
 import pandas as pd
-from tradegym.engine.core import TObject, ConfigDict
+from .data import KLineData
 
 
 
@@ -8,10 +8,47 @@ __all__ = ["Quote"]
 
 
 
-class Quote(TObject):
+class Quote(object):
+    """
+    Lightweight read-only view of one kline row, columns are resolved by precomputed index.
+    """
 
-    model_config = ConfigDict(extra='allow')
+    __slots__ = ("_data", "_index")
+
+    def __init__(self, data: KLineData, index: int):
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_index", index)
 
     @property
     def datetime(self) -> pd.Timestamp:
-        return self._containers["datetime"]
+        return pd.Timestamp(self._data.datetimes[self._index])
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    def __getattr__(self, key: str) -> Any:
+        idx = self._data.column_index.get(key)
+        if idx is None:
+            raise AttributeError(f"Quote has no column '{key}'")
+        return self._data.arrays[idx][self._index]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "datetime":
+            return self.datetime
+        return self._data.arrays[self._data.column_index[key]][self._index]
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError(f"Cannot modify read-only attribute '{key}'")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data.column_index
+
+    def __repr__(self) -> str:
+        return f"Quote({self.serialize()})"
+
+    def keys(self):
+        return list(self._data.columns)
+
+    def serialize(self) -> Dict:
+        return {col: self[col] for col in self._data.columns}
@@ -0,0 +1,100 @@
+from typing import Dict, Hashable, Optional, Tuple, Union, Callable, List, Any
+import weakref
+import pandas as pd
+from .data import KLineData
+
+
+__all__ = ["MarketDataRegistry", "MARKET_DATA"]
+
+
+# (code, timestep, source chunk)
+MarketDataKey = Tuple[str, float, Hashable]
+MarketDataSource = Union[pd.DataFrame, KLineData, Callable[[], Union[pd.DataFrame, KLineData]]]
+
+
+
+class MarketDataRegistry(object):
+    """
+    Process-wide store of converted market data keyed by (code, timestep, source chunk).
+    Every chunk is normalized and converted once, klines of any number of engines reference the same
+    read-only `KLineData`, so later activations are a dictionary lookup.
+
+    A chunk is any hashable naming the source data, e.g. a file path or a dataset chunk index.
+    Without one, a dataframe is keyed by its identity and dropped when the dataframe is collected.
+    Such a frame is expected not to change in place, its length and first and last datetimes are
+    checked on lookup and a changed frame is converted again.
+    """
+
+    def __init__(self):
+        self._datas: Dict[MarketDataKey, KLineData] = {}
+        # fingerprints of identity keyed dataframes
+        self._fingerprints: Dict[MarketDataKey, Tuple[Any, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._datas)
+
+    def __contains__(self, key: MarketDataKey) -> bool:
+        return key in self._datas
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for data in self._datas.values() for arr in data.arrays)
+
+    def keys(self) -> List[MarketDataKey]:
+        return list(self._datas.keys())
+
+    def get(self, code: str, timestep: float, chunk: Hashable) -> Optional[KLineData]:
+        return self._datas.get((code, timestep, chunk), None)
+
+    def load(self, code: str, timestep: float, source: Optional[MarketDataSource] = None, chunk: Optional[Hashable] = None) -> KLineData:
+        """Registered data of the chunk, converted from `source` (a dataframe, `KLineData` or a loader of either) on first use"""
+        assert chunk is not None or isinstance(source, pd.DataFrame), ValueError(f"A chunk key is required for market data of '{code}' not given as a dataframe")
+        tracked = chunk is None
+        if tracked:
+            chunk = ("dataframe", id(source))
+
+        key = (code, timestep, chunk)
+        data = self._datas.get(key, None)
+        fingerprint = self.fingerprint(source) if tracked else None
+        if data is not None and self._fingerprints.get(key, None) == fingerprint:
+            return data
+
+        assert source is not None, KeyError(f"Market data of '{code}' ({timestep}) chunk '{chunk}' is not loaded")
+        if callable(source) and not isinstance(source, (pd.DataFrame, KLineData)):
+            source = source()
+        if isinstance(source, pd.DataFrame):
+            if tracked:
+                if data is None:
+                    weakref.finalize(source, self.remove, code, timestep, chunk)
+                self._fingerprints[key] = fingerprint
+            source = KLineData.from_dataframe(self.normalize_dataframe(source))
+        self._datas[key] = source
+        return source
+
+    def remove(self, code: str, timestep: float, chunk: Hashable) -> Optional[KLineData]:
+        self._fingerprints.pop((code, timestep, chunk), None)
+        return self._datas.pop((code, timestep, chunk), None)
+
+    def clear(self):
+        self._datas.clear()
+        self._fingerprints.clear()
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> Tuple[Any, ...]:
+        """Length and first and last raw datetimes of a dataframe"""
+        columns = [i for i, col in enumerate(df.columns) if str(col).rsplit('.', 1)[-1] == 'datetime']
+        if len(df) == 0 or len(columns) == 0:
+            return (len(df),)
+        datetimes = df.iloc[:, columns[0]]
+        return (len(df), datetimes.iloc[0], datetimes.iloc[-1])
+
+    @staticmethod
+    def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+        """Sorted copy with parsed datetimes and unprefixed column names, `df` is left untouched"""
+        df = df.rename(columns=lambda col: str(col).rsplit('.', 1)[-1])
+        df = df.assign(datetime=pd.to_datetime(df['datetime']))
+        return df.sort_values('datetime', ascending=True, kind='stable')
+
+
+
+MARKET_DATA = MarketDataRegistry()
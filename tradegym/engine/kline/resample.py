@@ -0,0 +1,101 @@
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from .data import KLineData
+
+
+__all__ = ["Resampler", "BarBuilder"]
+
+
+
+class Resampler(object):
+    """
+    OHLCV bars of one timestep derived from tick data in a vectorized pre-pass.
+
+    bars:      completed bars labeled by their start datetime, in the layout of published minute data
+               (datetime, open, high, low, close, volume, open_oi, close_oi)
+    partials:  per tick, the bar it belongs to as it stands at that tick, nothing after the tick is included
+    bar_index: per tick, the index of its bar
+
+    Bar volume is the sum of the increments of the cumulative tick volume, negative increments
+    (volume reset on a new trading day) count as zero.
+    """
+
+    __slots__ = ("timestep", "bars", "partials", "bar_index")
+
+    def __init__(
+        self,
+        source: KLineData,
+        timestep: float,
+        price_key: str = "last_price",
+        volume_key: str = "volume",
+        open_interest_key: str = "open_interest",
+    ):
+        assert len(source) > 0, ValueError("Can not resample empty kline data")
+        self.timestep = timestep
+        step = int(round(timestep * 1e9))
+        labels = source.times // step * step
+
+        # bar of each tick
+        first = np.empty(len(labels), dtype=np.bool_)
+        first[0] = True
+        np.not_equal(labels[1:], labels[:-1], out=first[1:])
+        starts = np.flatnonzero(first)
+        bar_index = np.cumsum(first) - 1
+        ends = np.append(starts[1:] - 1, len(labels) - 1)
+
+        # running values inside each bar
+        price = source.column(price_key).astype(np.float64)
+        groups = pd.Series(price).groupby(bar_index, sort=False)
+        columns = {
+            "datetime": labels.view("datetime64[ns]"),
+            "open": price[starts][bar_index],
+            "high": groups.cummax().to_numpy(),
+            "low": groups.cummin().to_numpy(),
+            "close": price,
+        }
+        if volume_key in source.column_index:
+            increments = np.diff(source.column(volume_key).astype(np.float64), prepend=np.nan)
+            increments[0] = 0.0
+            np.maximum(increments, 0.0, out=increments)
+            total = np.cumsum(increments)
+            columns["volume"] = total - (total - increments)[starts][bar_index]
+        if open_interest_key in source.column_index:
+            open_interest = source.column(open_interest_key)
+            columns["open_oi"] = open_interest[starts][bar_index]
+            columns["close_oi"] = open_interest
+
+        self.partials = KLineData(list(columns.keys()), list(columns.values()))
+        self.bars = KLineData(self.partials.columns, [arr[ends] for arr in self.partials.arrays])
+        self.bar_index: np.ndarray = bar_index
+        self.bar_index.flags.writeable = False
+
+
+
+class BarBuilder(object):
+    """
+    Live bars of a `Resampler` following a tick cursor. Bars before the current one are complete,
+    the current bar holds only the ticks up to the cursor, so no tick after the clock leaks in.
+    Updating costs one row copy per tick.
+    """
+
+    __slots__ = ("resampler", "data", "row", "_arrays")
+
+    def __init__(self, resampler: Resampler):
+        self.resampler = resampler
+        # writable copies behind the read-only views of `data`
+        self._arrays: List[np.ndarray] = [arr.copy() for arr in resampler.bars.arrays]
+        self.data = KLineData(resampler.bars.columns, [arr.view() for arr in self._arrays])
+        self.row: Optional[int] = None
+
+    def update(self, tick_cursor: int) -> int:
+        """Rebuild the bar of the tick at `tick_cursor` and return its index"""
+        resampler = self.resampler
+        row = int(resampler.bar_index[tick_cursor])
+        if self.row is not None and self.row != row:
+            for arr, bars in zip(self._arrays, resampler.bars.arrays):
+                arr[self.row] = bars[self.row]
+        for arr, partials in zip(self._arrays, resampler.partials.arrays):
+            arr[row] = partials[tick_cursor]
+        self.row = row
+        return row
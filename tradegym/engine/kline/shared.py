@@ -0,0 +1,69 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from tradegym.engine.utility import open_shared_memory
+from .data import KLineData
+from .kline import KLine
+
+
+__all__ = ["SharedKLineData"]
+
+
+# (column, dtype, shape, shared memory name) per column
+SharedKLineHandle = List[Tuple[str, str, Tuple[int, ...], str]]
+
+
+
+class SharedKLineData(object):
+    """
+    Kline market data copied once into shared memory blocks, one block per column.
+    The picklable `handle` lets other processes attach the arrays zero-copy.
+    """
+
+    def __init__(self, data: KLineData):
+        self.handle: SharedKLineHandle = []
+        self._blocks: List[shared_memory.SharedMemory] = []
+        try:
+            for column, arr in zip(data.columns, data.arrays):
+                if arr.dtype.hasobject:
+                    raise TypeError(f"Can not share object column '{column}' of dtype {arr.dtype}")
+                block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+                self.handle.append((column, arr.dtype.str, arr.shape, block.name))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "SharedKLineData":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def from_dataframe(df: pd.DataFrame) -> "SharedKLineData":
+        return SharedKLineData(KLineData.from_dataframe(KLine.normalize_dataframe(df)))
+
+    @staticmethod
+    def attach(handle: SharedKLineHandle) -> KLineData:
+        columns, arrays, blocks = [], [], []
+        for column, dtype, shape, name in handle:
+            block = open_shared_memory(name)
+            blocks.append(block)
+            columns.append(column)
+            arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+        return KLineData(columns, arrays, buffers=blocks)
+
+    @staticmethod
+    def attach_all(handles: Sequence[SharedKLineHandle]) -> List[KLineData]:
+        return [SharedKLineData.attach(handle) for handle in handles]
+
+    def close(self):
+        """Release the shared memory blocks, attached arrays in other processes must not be used afterwards"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
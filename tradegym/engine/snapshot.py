@@ -0,0 +1,61 @@
+from typing import Dict, List, Tuple
+from datetime import datetime
+import numpy as np
+
+
+__all__ = ["EngineSnapshot"]
+
+
+
+class EngineSnapshot(object):
+    """
+    Mutable state of a `TradeEngine` at one moment: clock, episode span and kline cursors, wallet scalars,
+    opened positions as `Portfolio.OPENED_DTYPE` records and a copy of the ledger rows. Market data is not copied.
+
+    Closed positions and close records are history rather than state and are not kept,
+    a restored portfolio holds the positions opened at the snapshot.
+    """
+
+    __slots__ = (
+        "now", "span", "cursors", "cash", "margin", "unrealized_pnls",
+        "position_ids", "position_codes", "positions", "ledger_codes", "ledger",
+    )
+
+    def __init__(
+        self,
+        now: datetime,
+        span: Tuple[int, int, int],
+        cursors: np.ndarray,
+        cash: float,
+        margin: float,
+        unrealized_pnls: Dict[str, float],
+        position_ids: List[str],
+        position_codes: List[str],
+        positions: np.ndarray,
+        ledger_codes: List[str],
+        ledger: Dict[str, np.ndarray],
+    ):
+        self.now = now
+        # (start_ns, last_ns, end_ns) of `KLineManager`
+        self.span = span
+        self.cursors = cursors
+        self.cash = cash
+        self.margin = margin
+        self.unrealized_pnls = unrealized_pnls
+        self.position_ids = position_ids
+        self.position_codes = position_codes
+        self.positions = positions
+        self.ledger_codes = ledger_codes
+        self.ledger = ledger
+
+    def __len__(self) -> int:
+        return len(self.position_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the arrays held, excluding python object overhead"""
+        return self.cursors.nbytes + self.positions.nbytes + sum(arr.nbytes for arr in self.ledger.values())
+
+    @property
+    def ledger_size(self) -> int:
+        return len(self.ledger["datetime"])
@@ -0,0 +1 @@
+from .order import *
\ No newline at end of file
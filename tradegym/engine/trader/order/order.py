@@ -0,0 +1,15 @@
+from typing import Optional, Literal
+from tradegym.engine.core import TObject, Field
+
+
+__all__ = ["Order"]
+
+
+
+class Order(TObject):
+    code: str = Field()
+    type: Literal["open", "close"] = Field()
+    side: Literal["long", "short"] = Field()
+    price: float = Field()
+    # None closes the whole position of code and side
+    volume: Optional[int] = Field(None)
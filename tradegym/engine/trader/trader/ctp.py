@@ -1,6 +1,9 @@
-from typing import Optional, Tuple
-from tradegym.engine.core import Field, Formula
-from .trader import Trader, TradeInfo
+from typing import Optional, Tuple, Sequence, Dict
+from tradegym.engine.core import Field
+from tradegym.engine.contract import CommisionInfo, SIDE_CODES, TYPE_CODES
+from tradegym.engine.utility import to_nanoseconds
+from tradegym.engine.trader.order import Order
+from .trader import Trader, TradeInfo, BatchTradeInfo
 
 
 __all__ = ["CTPTrader"]
@@ -11,20 +14,122 @@ class CTPTrader(Trader):
 
     last_price_key: str = Field()
     slippage: Optional[float] = Field(None)
-    
+
     def try_open(self, code: str, side: str, price: float, volume: int) -> TradeInfo:
+        return self._check_open(code, side, price, volume)
+
+    def try_close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> TradeInfo:
+        return self._check_close(code, side, price, volume)
+
+    def open(self, code: str, side: str, price: float, volume: int) -> TradeInfo:
+        # check
+        info = self.try_open(code, side, price, volume)
+        if not info.success:
+            return info
+        return self._apply_open(info)
+
+    def close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> TradeInfo:
+        # check
+        info = self.try_close(code, side, price, volume)
+        if not info.success:
+            return info
+        return self._apply_close(info)
+
+    def try_submit_batch(self, orders: Sequence[Order]) -> BatchTradeInfo:
+        """Validate all orders against the same tick, the batch fails as a whole on the first invalid order"""
+        now = self.clock.now
+        last_prices: Dict[str, float] = {}
+        consumed: Dict[str, int] = {}
+        infos = []
+        required = 0.0
+        for i, order in enumerate(orders):
+            # one last price lookup per code
+            last_price = last_prices.get(order.code, None)
+            if last_price is None:
+                last_price = last_prices[order.code] = self.get_last_price(order.code)
+
+            if order.type == "open":
+                info = self._check_open(order.code, order.side, order.price, order.volume, last_price=last_price, check_cash=False)
+                if info.success:
+                    required += info.margin + info.commissions[0].total_fee
+            elif order.type == "close":
+                info = self._check_close(order.code, order.side, order.price, order.volume, last_price=last_price, consumed=consumed)
+                if info.success:
+                    for pos_id, pos_volume in zip(info.positions, info.volumes):
+                        consumed[pos_id] = consumed.get(pos_id, 0) + pos_volume
+                    # released margin funds the batch, realized losses drain it
+                    required += sum(c.total_fee for c in info.commissions) - info.margin - self._realized_pnl(info)
+            else:
+                raise ValueError(f"Invalid order type '{order.type}'")
+
+            infos.append(info)
+            if not info.success:
+                return BatchTradeInfo.trusted(date=now, success=False, error=f"Order {i} failed: {info.error}", infos=infos)
+
+        # one wallet check for the combined cost, margin released and pnl realized by closes fund opens
+        if required > 0 and not self.account.wallet.has_enough_available_cash(required):
+            return BatchTradeInfo.trusted(
+                date=now, success=False, infos=infos,
+                error=f"Not enough available cash, avalable cash: {self.account.wallet.cash}, required: {required}",
+            )
+        return BatchTradeInfo.trusted(date=now, success=True, infos=infos)
+
+    def submit_batch(self, orders: Sequence[Order]) -> BatchTradeInfo:
+        # check
+        batch = self.try_submit_batch(orders)
+        if not batch.success:
+            return batch
+
+        # apply fills in one pass
+        infos = []
+        margin = commission = 0.0
+        for info in batch.infos:
+            if info.type == "open":
+                info = self._apply_open(info)
+                margin += info.margin
+            else:
+                info = self._apply_close(info)
+                margin -= info.margin
+            commission += sum(c.total_fee for c in info.commissions)
+            infos.append(info)
+        return batch.model_copy(update={"infos": infos, "margin": margin, "commission": commission})
+
+    def get_last_price(self, code: str) -> float:
+        return self.kline.get_kline(code).quote[self.last_price_key]
+
+    def get_slippage_price(self, code: str, type: str, side: str, last_price: Optional[float] = None) -> float:
+        return self.contract.get_contract(code).kernel.slippage_price(
+            self.get_last_price(code) if last_price is None else last_price,
+            TYPE_CODES[type],
+            SIDE_CODES[side],
+            0 if self.slippage is None else self.slippage,
+        )
+
+    def _check_open(
+        self,
+        code: str,
+        side: str,
+        price: float,
+        volume: int,
+        last_price: Optional[float] = None,
+        check_cash: bool = True,
+    ) -> TradeInfo:
         trade_args = {"date": self.clock.now, "code": code, "type": "open", "side": side, "price": price, "volume": volume}
         trade_args["volumes"] = [volume]
 
+        # check volume
+        if volume is None or volume <= 0:
+            return TradeInfo.trusted(success=False, error=f"Open volume must be a positive integer, got {volume}", **trade_args)
+
         # check slipage price
-        slippage_price = trade_args["slippage_price"] = self.get_slippage_price(code, "open", side)
+        slippage_price = trade_args["slippage_price"] = self.get_slippage_price(code, "open", side, last_price)
         if not ((price >= slippage_price) if side == "long" else (price <= slippage_price)):
-            return TradeInfo(
-                success=False, 
+            return TradeInfo.trusted(
+                success=False,
                 error=f"Current open price '{price}' is outside the allowed slippage price '{slippage_price}'",
                 **trade_args
             )
-        
+
         # check commision
         contract = self.contract.get_contract(code)
         commission = contract.commission(
@@ -36,124 +141,149 @@ class CTPTrader(Trader):
             side=side
         )
         trade_args["commissions"] = [commission]
-        
+
         # wallet
-        margin = trade_args["margin"] = contract.calculate_margin(price, volume)
+        margin = trade_args["margin"] = contract.kernel.margin(price, volume)
         total_cost = commission.total_fee + margin
-        if not self.account.wallet.has_enough_available_cash(total_cost):
-            return TradeInfo(
+        if check_cash and not self.account.wallet.has_enough_available_cash(total_cost):
+            return TradeInfo.trusted(
                 success=False,
                 error=f"Not enough available cash, avalable cash: {self.account.wallet.cash}, required: {total_cost}",
                 **trade_args
             )
 
-        return TradeInfo(success=True, **trade_args)
+        return TradeInfo.trusted(success=True, **trade_args)
 
-    def try_close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> TradeInfo:
-        trade_args = {"date": self.clock.now, "code": code, "type": "open", "side": side, "price": price, "volume": volume}
+    def _check_close(
+        self,
+        code: str,
+        side: str,
+        price: float,
+        volume: Optional[int] = None,
+        last_price: Optional[float] = None,
+        consumed: Optional[Dict[str, int]] = None,
+    ) -> TradeInfo:
+        """`consumed` is volume per position already taken by previous orders of a batch"""
+        trade_args = {"date": self.clock.now, "code": code, "type": "close", "side": side, "price": price, "volume": volume}
 
         # check volume
-        positions = self.account.portfolio.query(code=code, side=side, status="opened")
-        total_volume = sum([p.current_volume for p in positions])
+        positions = []
+        for position in self.account.portfolio.get_opened_positions(code, side):
+            pos_volume = position.current_volume - (0 if consumed is None else consumed.get(position.id, 0))
+            if pos_volume > 0:
+                positions.append((position, pos_volume))
+        total_volume = sum([pos_volume for _, pos_volume in positions])
         if volume is None:
             volume = trade_args["volume"] = total_volume
-        if total_volume < volume:
-            return TradeInfo(
-                success=False, 
-                error=f"Current close price '{price}' is outside the allowed slippage price '{slippage_price}'"
+        if volume <= 0 or total_volume < volume:
+            return TradeInfo.trusted(
+                success=False,
+                error=f"Not enough opened volume to close, current volume: {total_volume}, required: {volume}",
                 **trade_args
             )
 
         # check slipage price
-        slippage_price = self.get_slippage_price(code, "close", side)
+        slippage_price = trade_args["slippage_price"] = self.get_slippage_price(code, "close", side, last_price)
         if not ((price >= slippage_price) if side == "short" else (price <= slippage_price)):
-            return TradeInfo(
-                success=False, 
-                error=f"Current close price '{price}' is outside the allowed slippage price '{slippage_price}'"
+            return TradeInfo.trusted(
+                success=False,
+                error=f"Current close price '{price}' is outside the allowed slippage price '{slippage_price}'",
                 **trade_args
             )
-        
-        # check commision
+
+        # close positions first in first out
         contract = self.contract.get_contract(code)
-        trade_args["commisions"] = []
-        trade_args["positions"] = []
-        trade_args["volumes"] = []
-        for position in positions:
-            if total_volume == 0:
+        margin = contract.kernel.margin
+        selected, volumes = [], []
+        release_margin = 0.0
+        remain_volume = volume
+        for position, pos_volume in positions:
+            if remain_volume == 0:
                 break
-            pos_volume = min(total_volume, position.current_volume)
-            total_volume -= pos_volume
-            commision = contract.commission(
-                engine=self.engine,
-                contract=contract,
-                volume=pos_volume,
-                price=price,
-                type="close",
-                side=side
-            )
-            trade_args["commisions"].append(commision)
-            trade_args["positions"].append(position.id)
-            trade_args["volumes"].append(pos_volume)
-        
-        return TradeInfo(success=True, **trade_args)
-        
-    def open(self, code: str, side: str, price: float, volume: int) -> TradeInfo:
-        # check
-        info = self.try_open(code, side, price, volume)
-        if not info.success:
-            return info
-        trade_args = info.serialize()
+            pos_volume = min(remain_volume, pos_volume)
+            remain_volume -= pos_volume
+            release_margin += margin(position.price, pos_volume)
+            selected.append(position)
+            volumes.append(pos_volume)
 
-        # apply portfolio
+        # check commision of all closed positions at once
+        exchange_fees, broker_fees = contract.commission.batch(
+            contract, price, volumes, "close", [position.date for position in selected], self.clock.now, side,
+            engine=self.engine, positions=selected,
+        )
+        trade_args["commissions"] = [
+            CommisionInfo.trusted(exchange_fee=exchange_fee, broker_fee=broker_fee)
+            for exchange_fee, broker_fee in zip(exchange_fees.tolist(), broker_fees.tolist())
+        ]
+        trade_args["positions"] = [position.id for position in selected]
+        trade_args["volumes"] = volumes
+        trade_args["margin"] = release_margin
+
+        return TradeInfo.trusted(success=True, **trade_args)
+
+    def _realized_pnl(self, info: TradeInfo) -> float:
+        """Realized pnl of a checked close before it is applied"""
+        kernel = self.contract.get_contract(info.code).kernel
+        side = SIDE_CODES[info.side]
+        portfolio = self.account.portfolio
+        return sum(
+            kernel.realized_pnl(portfolio.get_position(pos_id).price, info.price, pos_volume, side)
+            for pos_id, pos_volume in zip(info.positions, info.volumes)
+        )
+
+    def _apply_open(self, info: TradeInfo) -> TradeInfo:
+        commission = info.commissions[0].total_fee
+
+        # apply ledger and portfolio
+        ledger_id = self.account.ledger.append(
+            to_nanoseconds(info.date), info.code, info.side, "open", info.price, info.volume,
+            commission=commission, margin=info.margin
+        )
         pos_id = self.account.portfolio.open(
-            code=code, side=side, price=price, volume=volume, 
-            commission=info.commissions[0].total_fee, margin=info.margin, date=info.date
+            code=info.code, side=info.side, price=info.price, volume=info.volume,
+            commission=commission, margin=info.margin, date=info.date, ledger_id=ledger_id
         )
-        trade_args["positions"] = [pos_id]
 
         # apply wallet
-        self.account.wallet.allocate_margin(margin=info.margin, commision=info.commissions[0].total_fee)
-        return TradeInfo.deserialize(trade_args)
+        self.account.wallet.allocate_margin(margin=info.margin, commision=commission)
+        return info.model_copy(update={"positions": [pos_id]})
 
-    def close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> float:
-        # check
-        info = self.try_close(code, side, price, volume)
-        if not info.success:
-            return info
+    def _apply_close(self, info: TradeInfo) -> TradeInfo:
         assert info.positions is not None, ValueError("Invalid trade info, positions is None")
         assert info.commissions is not None, ValueError("Invalid trade info, commissions is None")
         assert info.volumes is not None, ValueError("Invalid trade info, volumes is None")
-        trade_args = info.serialize()
 
-        contract = self.contract.get_contract(code)
-        
+        kernel = self.contract.get_contract(info.code).kernel
+        side = SIDE_CODES[info.side]
+        portfolio = self.account.portfolio
+        ledger = self.account.ledger
+        now_ns = to_nanoseconds(info.date)
+
         # apply portfolio
-        trade_args["closes"] = []
+        closes = []
         total_release_margin = total_realized_pnl = total_commision = 0.0
-        for position, commision, pos_volume in zip(info.positions, info.commissions, info.volumes):
-            released_margin = Formula.contract_margin(position.price, pos_volume, contract.multiplier, contract.margin_rate)
-            realized_pnl = Formula.position_realized_pnl(position.price, price, pos_volume, side, contract.multiplier)
-            close_id = self.account.portfolio.close(
-                position.id, price=price, volume=pos_volume, commision=commision.total_fee, 
+        for pos_id, commision, pos_volume in zip(info.positions, info.commissions, info.volumes):
+            position = portfolio.get_position(pos_id)
+            if pos_volume == position.current_volume:
+                # release the rest to avoid rounding residue
+                released_margin = position.position_margin
+            else:
+                released_margin = kernel.margin(position.price, pos_volume)
+            realized_pnl = kernel.realized_pnl(position.price, info.price, pos_volume, side)
+            close_id = portfolio.close(
+                pos_id, price=info.price, volume=pos_volume, commission=commision.total_fee,
                 realized_pnl=realized_pnl, released_margin=released_margin, date=info.date
             )
-            trade_args["closes"].append(close_id)
-            total_release_margin += realized_pnl
+            ledger.append(
+                now_ns, info.code, info.side, "close", info.price, pos_volume, commission=commision.total_fee, margin=released_margin,
+                realized_pnl=realized_pnl, position=-1 if position.ledger_id is None else position.ledger_id
+            )
+            closes.append(close_id)
+            total_release_margin += released_margin
             total_realized_pnl += realized_pnl
             total_commision += commision.total_fee
 
         # apply wallet
-        self.account.wallet.release_margin(margin=info.margin, pnl=total_realized_pnl, commision=total_commision)
-        
-        return TradeInfo(**trade_args)
-
-
-    def get_slippage_price(self, code: str, type: str, side: str) -> float:
-        return Formula.trade_slippage_price(
-            slippage=0 if self.slippage is None else self.slippage,
-            last_price=self.kline.get_kline(code).quote[self.last_price_key],
-            type=type,
-            side=side,
-            tick_size=self.contract.get_contract(code).tick_size
-        )
+        self.account.wallet.release_margin(margin=total_release_margin, pnl=total_realized_pnl, commision=total_commision)
 
+        return info.model_copy(update={"closes": closes, "margin": total_release_margin})
@@ -1,4 +1,4 @@
-from typing import Optional, Sequence, List, ClassVar
+from typing import Optional, Sequence, List, ClassVar, Callable
 from datetime import datetime
 from abc import ABC, abstractmethod
 from tradegym.engine.core import Plugin, TObject, Field
@@ -6,9 +6,10 @@ from tradegym.engine.contract import ContractManager, CommisionInfo
 from tradegym.engine.kline import KLineManager
 from tradegym.engine.account import Account
 from tradegym.engine.utility import Clock
+from tradegym.engine.trader.order import Order
 
 
-__all__ = ["Trader", "TradeInfo"]
+__all__ = ["Trader", "TradeInfo", "BatchTradeInfo"]
 
 
 class TradeInfo(TObject):
@@ -28,6 +29,18 @@ class TradeInfo(TObject):
     positions: Optional[List[str]] = Field(None)
     closes: Optional[List[str]] = Field(None)
 
+
+
+class BatchTradeInfo(TObject):
+    date: datetime = Field()
+    success: bool = Field()
+    error: Optional[str] = Field(None)
+    # trade info per order, up to the first failed order
+    infos: List[TradeInfo] = Field(default_factory=list)
+    # margin allocated by opens minus margin released by closes
+    margin: float = Field(0.0)
+    commission: float = Field(0.0)
+
     
 
 class Trader(Plugin, ABC):
@@ -69,4 +82,37 @@ class Trader(Plugin, ABC):
     @abstractmethod
     def close(self, code: str, side: str, price: float, volume: Optional[int] = None) -> TradeInfo:
         pass
+
+    def try_submit_batch(self, orders: Sequence[Order]) -> BatchTradeInfo:
+        """
+        Check orders one by one with `try_open` and `try_close` up to the first invalid order.
+        Each order is checked against the current state, override it to check them as one batch.
+        """
+        return self._run_batch(orders, self.try_open, self.try_close)
+
+    def submit_batch(self, orders: Sequence[Order]) -> BatchTradeInfo:
+        """
+        Fill orders one by one with `open` and `close` up to the first failed order, earlier fills are kept.
+        Override it to fill all or none of the orders.
+        """
+        return self._run_batch(orders, self.open, self.close)
+
+    def _run_batch(self, orders: Sequence[Order], open: Callable, close: Callable) -> BatchTradeInfo:
+        now = self.clock.now
+        infos = []
+        margin = commission = 0.0
+        for i, order in enumerate(orders):
+            if order.type == "open":
+                info = open(order.code, order.side, order.price, order.volume)
+            elif order.type == "close":
+                info = close(order.code, order.side, order.price, order.volume)
+            else:
+                raise ValueError(f"Invalid order type '{order.type}'")
+
+            infos.append(info)
+            if not info.success:
+                return BatchTradeInfo.trusted(date=now, success=False, error=f"Order {i} failed: {info.error}", infos=infos)
+            margin += info.margin if order.type == "open" else -info.margin
+            commission += sum(c.total_fee for c in info.commissions or [])
+        return BatchTradeInfo.trusted(date=now, success=True, infos=infos, margin=margin, commission=commission)
     
@@ -1 +1,3 @@
-from .clock import *
\ No newline at end of file
+from .clock import *
+from .shared import *
+from .timestamp import *
@@ -1,6 +1,8 @@
-from typing import Optional, ClassVar
+from typing import Optional, ClassVar, Literal, Union
 from datetime import datetime, timedelta
+import numpy as np
 from tradegym.engine.core import Plugin, Field, writable
+from .timestamp import to_nanoseconds, from_nanoseconds
 
 
 __all__ = ['Clock']
@@ -8,17 +10,47 @@ __all__ = ['Clock']
 
 
 class Clock(Plugin):
+    """
+    fixed: every tick advances `step`
+    event: every tick jumps to the next datetime of `timeline` (the bar datetimes of all klines),
+           at most `max_skip` at once, and advances `step` past the end of the timeline
+    """
+
     Name: ClassVar[str] = 'clock'
 
     now: datetime = Field(datetime.now())
     step: timedelta = Field(timedelta(milliseconds=500))
+    mode: Literal["fixed", "event"] = Field("fixed")
+    max_skip: Optional[timedelta] = Field(None)
+    # sorted unique int64 nanoseconds, set by KLineManager on activate in event mode
+    timeline: Optional[np.ndarray] = Field(None, exclude=True)
 
     @writable
     def set_now(self, now: datetime) -> None:
         self.now = now
 
+    @writable
+    def set_timeline(self, timeline: Optional[np.ndarray]) -> None:
+        self.timeline = timeline
+
     @writable
     def tick(self) -> datetime:
-        self.now += self.step
+        if self.mode == "event":
+            self.now = from_nanoseconds(int(self.next_times(to_nanoseconds(self.now)))).to_pydatetime(warn=False)
+        else:
+            self.now += self.step
         return self.now
-    
+
+    def next_times(self, now_ns: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """Nanoseconds of the next tick after `now_ns`, vectorized over arrays of clocks"""
+        step_ns = self.step // timedelta(microseconds=1) * 1000
+        if self.mode != "event":
+            return now_ns + step_ns
+
+        timeline = self.timeline
+        assert timeline is not None, RuntimeError("Timeline of event clock is not built, activate klines first")
+        idx = np.searchsorted(timeline, now_ns, side='right')
+        nxt = np.where(idx < len(timeline), timeline[np.minimum(idx, len(timeline) - 1)], now_ns + step_ns)
+        if self.max_skip is not None:
+            nxt = np.minimum(nxt, now_ns + self.max_skip // timedelta(microseconds=1) * 1000)
+        return nxt
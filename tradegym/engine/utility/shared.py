@@ -0,0 +1,16 @@
+import sys
+from multiprocessing import shared_memory
+
+
+__all__ = ["open_shared_memory"]
+
+
+def open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach an existing shared memory block without taking over its lifetime.
+    Before python 3.13 the block stays registered with the resource tracker, which is shared
+    with the creating process as long as the attaching process is its child.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
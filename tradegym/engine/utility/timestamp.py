@@ -0,0 +1,29 @@
+from typing import Union
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+
+__all__ = ["to_nanoseconds", "from_nanoseconds"]
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_nanoseconds(value: Union[datetime, pd.Timestamp, np.datetime64, str, int]) -> int:
+    """Convert a naive datetime-like value to int64 nanoseconds since epoch"""
+    if isinstance(value, pd.Timestamp):
+        return value.value
+    if isinstance(value, datetime):
+        return (value - _EPOCH) // _MICROSECOND * 1000
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[ns]").astype(np.int64))
+    return pd.Timestamp(value).value
+
+
+def from_nanoseconds(value: int) -> pd.Timestamp:
+    return pd.Timestamp(int(value))
+
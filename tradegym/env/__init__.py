@@ -1,3 +1,8 @@
 from .action import *
+from .encoder import *
 from .env import *
-from .obs import *
\ No newline at end of file
+from .obs import *
+from .recorder import *
+from .runner import *
+from .sampler import *
+from .vector import *
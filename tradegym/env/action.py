@@ -1,18 +1,19 @@
 from typing import Optional, Dict, Type, List, ClassVar
 import gymnasium as gym
-from tradegym.engine import TObject, TradeEngine, Field, TradeInfo
+from tradegym.engine import TObject, TradeEngine, Field, TradeInfo, Order, BatchTradeInfo
 
 
-__all__ = ['Action', 'ActionSpace', 'ActionResult', 'OpenAction', 'CloseAction', 'NoOpAction']
+__all__ = ['Action', 'ActionSpace', 'ActionResult', 'OpenAction', 'CloseAction', 'BatchAction', 'NoOpAction']
 
 
 class ActionResult(TObject):
     error: Optional[str] = Field(None)
     trade_info: Optional[TradeInfo] = Field(None)
+    batch_info: Optional[BatchTradeInfo] = Field(None)
 
     @property
     def success(self) -> bool:
-        return self._error is None
+        return self.error is None
 
 
 
@@ -35,9 +36,9 @@ class Action(TObject):
         try:
             trade_info = self.execute(engine)
         except Exception as e:
-            return ActionResult(error=str(e))
+            return ActionResult.trusted(error=str(e))
 
-        return ActionResult(trade_info=trade_info)
+        return ActionResult.trusted(trade_info=trade_info)
     
     def execute(self, engine: TradeEngine) -> Optional[TradeInfo]:
         pass
@@ -81,6 +82,20 @@ class CloseAction(TradeAction):
         return engine.close(self.code, self.side, self.price, self.volume)
 
 
+class BatchAction(Action):
+    Name: ClassVar[str] = 'batch'
+
+    orders: List[Order] = Field()
+
+    def __call__(self, engine: TradeEngine) -> ActionResult:
+        try:
+            batch_info = engine.submit_batch(self.orders)
+        except Exception as e:
+            return ActionResult.trusted(error=str(e))
+
+        return ActionResult.trusted(batch_info=batch_info)
+
+
 class NoOpAction(Action):
     Name: ClassVar[str] = 'noop'
 
@@ -0,0 +1,137 @@
+from typing import Optional, Dict, Any, Tuple, List, Sequence, Union
+import numpy as np
+import gymnasium as gym
+from tradegym.engine import TradeEngine, KLine, SIDE_CODES, to_nanoseconds
+from .env import TradeEnv
+from .obs import Observation
+
+
+__all__ = ['ObservationEncoder', 'EncodeObservation']
+
+
+
+class ObservationEncoder(object):
+    """
+    Fixed shape numpy observation of a `TradeEngine`, laid out like `TradeVectorEnv` observations
+    plus `window`, the last `window` rows of `columns` of every kline (source klines by default).
+    Windows shorter than `window` at the start of the data are padded with their first row.
+
+    Values are written into buffers allocated once, `encode` returns the same arrays every call.
+    """
+
+    SIDES = ("long", "short")
+
+    def __init__(
+        self,
+        engine: TradeEngine,
+        window: int = 1,
+        columns: Sequence[str] = ("last_price",),
+        klines: Optional[Sequence[KLine]] = None,
+    ):
+        assert window > 0, ValueError(f"Window size must be positive, got {window}")
+        self.engine = engine
+        self.window = window
+        self.columns: List[str] = list(columns)
+        self.codes: List[str] = list(engine.kline.code_klines.keys())
+        self.klines: List[KLine] = engine.kline.source_klines if klines is None else list(klines)
+        self._code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self._last_price_key: str = getattr(engine.trader, "last_price_key", "last_price")
+
+        num_codes, num_sides = len(self.codes), len(self.SIDES)
+        self.space = gym.spaces.Dict({
+            "datetime": gym.spaces.Box(low=0, high=np.iinfo(np.int64).max, shape=(), dtype=np.int64),
+            "last_price": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(num_codes,), dtype=np.float64),
+            "position": gym.spaces.Box(low=0.0, high=np.inf, shape=(num_codes, num_sides), dtype=np.float64),
+            "avg_price": gym.spaces.Box(low=0.0, high=np.inf, shape=(num_codes, num_sides), dtype=np.float64),
+            "cash": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(), dtype=np.float64),
+            "margin": gym.spaces.Box(low=0.0, high=np.inf, shape=(), dtype=np.float64),
+            "unrealized_pnl": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(num_codes,), dtype=np.float64),
+            "success": gym.spaces.Discrete(2),
+            "window": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(len(self.klines), window, len(self.columns)), dtype=np.float64),
+        })
+        self.buffers: Dict[str, np.ndarray] = self.allocate()
+
+    def allocate(self, num_envs: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zeroed buffers of one observation, or of `num_envs` observations stacked on a leading axis"""
+        prefix = () if num_envs is None else (num_envs,)
+        return {
+            key: np.zeros(prefix + space.shape, dtype=space.dtype)
+            for key, space in self.space.spaces.items()
+        }
+
+    def encode(
+        self,
+        observation: Optional[Observation] = None,
+        out: Optional[Dict[str, np.ndarray]] = None,
+        index: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Write the current engine state into `out` (own buffers by default), at row `index` of batched buffers"""
+        out = self.buffers if out is None else out
+        idx = () if index is None else index
+        engine = self.engine
+        code_index = self._code_index
+
+        # market
+        out["datetime"][idx] = to_nanoseconds(engine.clock.now)
+        last_price = out["last_price"][idx]
+        for c, code in enumerate(self.codes):
+            last_price[c] = engine.kline.get_kline(code).quote[self._last_price_key]
+
+        # positions
+        position, avg_price = out["position"][idx], out["avg_price"][idx]
+        position[...] = 0.0
+        avg_price[...] = 0.0
+        for net in engine.account.portfolio.book.positions.values():
+            c, s = code_index[net.code], SIDE_CODES[net.side]
+            position[c, s] = net.volume
+            avg_price[c, s] = net.avg_price
+
+        # wallet
+        wallet = engine.account.wallet
+        out["cash"][idx] = wallet.cash
+        out["margin"][idx] = wallet.margin
+        unrealized_pnl = out["unrealized_pnl"][idx]
+        unrealized_pnl[...] = 0.0
+        for code, pnl in wallet.unrealized_pnls.items():
+            c = code_index.get(code, None)
+            if c is not None:
+                unrealized_pnl[c] = pnl
+        out["success"][idx] = 1 if observation is None or observation.success else 0
+
+        # klines
+        window = out["window"][idx]
+        size = self.window
+        for k, kline in enumerate(self.klines):
+            for j, column in enumerate(self.columns):
+                values = kline.window(size, column)
+                n = len(values)
+                window[k, size - n:, j] = values
+                if n < size:
+                    window[k, :size - n, j] = values[0]
+        return out
+
+
+
+class EncodeObservation(gym.Wrapper):
+    """
+    `TradeEnv` returning `ObservationEncoder` arrays, the `Observation` of each step is kept in info['observation'].
+    With `copy=False` the same buffers are returned every step.
+    """
+
+    def __init__(self, env: TradeEnv, copy: bool = True, **kwargs):
+        super().__init__(env)
+        self.copy = copy
+        self.encoder = ObservationEncoder(env.engine, **kwargs)
+        self.observation_space = self.encoder.space
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
+        obs, info = self.env.reset(seed=seed, options=options)
+        return self._encode(obs), dict(info, observation=obs)
+
+    def step(self, action: Union[Any, Dict]) -> Tuple[Dict[str, np.ndarray], float, bool, bool, Dict]:
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        return self._encode(obs), reward, terminated, truncated, dict(info, observation=obs)
+
+    def _encode(self, obs: Observation) -> Dict[str, np.ndarray]:
+        encoded = self.encoder.encode(obs)
+        return {k: v.copy() for k, v in encoded.items()} if self.copy else encoded
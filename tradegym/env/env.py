@@ -32,11 +32,13 @@ class TradeEnv(TObject, gym.Env):
 
     def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[Observation, Dict]:
         # activate
-        if options is not None:
+        options = {} if options is None else dict(options)
+        start, length = options.pop("start", None), options.pop("length", None)
+        if len(options) > 0:
             self.activate(**options)
 
         # reset
-        self.engine.reset()
+        self.engine.reset(start, length)
 
         return Observation(), {}
 
@@ -55,7 +57,12 @@ class TradeEnv(TObject, gym.Env):
         self.engine.tick()
 
         # return
-        observation = Observation.deserialize(result.serialize())
+        if result.batch_info is not None:
+            observation = Observation.trusted(batch_info=result.batch_info)
+        elif result.trade_info is None:
+            observation = Observation.trusted()
+        else:
+            observation = Observation.trusted(trade_info=result.trade_info)
         return observation, 0.0, self.engine.terminated, False, {}
 
     @staticmethod
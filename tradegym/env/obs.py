@@ -1,5 +1,5 @@
 from typing import Optional
-from tradegym.engine import TradeInfo, TObject, Field
+from tradegym.engine import TradeInfo, BatchTradeInfo, TObject, Field
 import gymnasium as gym
 
 
@@ -8,14 +8,17 @@ __all__ = ['Observation', 'ObservationSpace']
 
 class Observation(TObject):
     trade_info: Optional[TradeInfo] = Field(None)
+    batch_info: Optional[BatchTradeInfo] = Field(None)
 
     @property
     def success(self) -> bool:
-        return True if self.trade_info is None else self.trade_info.success
+        info = self.trade_info if self.batch_info is None else self.batch_info
+        return True if info is None else info.success
 
     @property
     def error(self) -> Optional[str]:
-        return None if self.trade_info is None else self.trade_info.error
+        info = self.trade_info if self.batch_info is None else self.batch_info
+        return None if info is None else info.error
 
 
 
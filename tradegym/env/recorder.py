@@ -0,0 +1,296 @@
+from typing import Optional, Dict, Any, Tuple, List, Union, Type, get_args, get_origin
+import os
+import pickle
+import yaml
+import numpy as np
+import pandas as pd
+import gymnasium as gym
+from tradegym.engine import TradeEngine, TObject, TradeInfo, Wallet, EngineSnapshot, SIDE_CODES, to_nanoseconds
+from .action import Action, TradeAction
+from .env import TradeEnv
+from .obs import Observation
+
+
+__all__ = ['EpisodeRecorder', 'EpisodeReplayer', 'make_record_dtype']
+
+
+# action column, reset records hold the state an episode starts from
+RECORD_ACTIONS = ("reset", "noop", "open", "close", "batch")
+# actions re-run on seek, any other record is checkpointed
+REPLAY_ACTIONS = ("noop", "open", "close")
+
+RECORDS_FILE = "records.bin"
+SCHEMA_FILE = "schema.npy"
+CHECKPOINTS_FILE = "checkpoints.pkl"
+META_FILE = "meta.yaml"
+
+
+
+def _numeric_fields(cls: Type[TObject]) -> List[Tuple[str, Any]]:
+    """Scalar bool and number fields of a model, numbers as float64 so missing values are NaN"""
+    fields = []
+    for name, info in cls.model_fields.items():
+        annotation = info.annotation
+        types = [t for t in get_args(annotation) if t is not type(None)] if get_origin(annotation) is Union else [annotation]
+        if types == [bool]:
+            fields.append((name, np.bool_))
+        elif len(types) == 1 and types[0] in (int, float):
+            fields.append((name, np.float64))
+    return fields
+
+
+TRADE_FIELDS = _numeric_fields(TradeInfo)
+WALLET_FIELDS = _numeric_fields(Wallet)
+
+
+def make_record_dtype(num_codes: int, num_klines: int) -> np.dtype:
+    """
+    One step of an episode: the action, the numeric `TradeInfo` fields of its fill (trade_*),
+    the numeric `Wallet` fields (wallet_*), unrealized pnl per code and kline cursors after the step.
+    """
+    return np.dtype(
+        [
+            ("episode", np.int64),
+            ("step", np.int64),
+            ("datetime", np.int64),
+            ("action", np.int8),
+            ("code", np.int16),
+            ("side", np.int8),
+            ("price", np.float64),
+            ("volume", np.float64),
+        ]
+        + [(f"trade_{name}", dtype) for name, dtype in TRADE_FIELDS]
+        + [("trade_commission", np.float64)]
+        + [(f"wallet_{name}", dtype) for name, dtype in WALLET_FIELDS]
+        + [
+            ("unrealized_pnl", np.float64, (num_codes,)),
+            ("cursors", np.int64, (num_klines,)),
+            ("reward", np.float64),
+            ("terminated", np.bool_),
+        ]
+    )
+
+
+
+class EpisodeRecorder(gym.Wrapper):
+    """
+    Records every reset and step of a `TradeEnv` as one fixed-width record appended to a memory-mapped log
+    in the directory `path`, see `make_record_dtype`. Engine snapshots are written every `checkpoint_every`
+    records and after resets and batch actions (whose orders are not kept in the records),
+    so `EpisodeReplayer` can rebuild the engine at any record.
+    """
+
+    def __init__(self, env: TradeEnv, path: str, capacity: int = 4096, checkpoint_every: int = 256):
+        super().__init__(env)
+        assert capacity > 0 and checkpoint_every > 0, ValueError("capacity and checkpoint_every must be positive")
+        engine: TradeEngine = env.unwrapped.engine
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.codes: List[str] = list(engine.kline.code_klines.keys())
+        self.dtype = make_record_dtype(len(self.codes), len(engine.kline.klines))
+        self.size = 0
+        self.episode = -1
+        self.step_count = 0
+        self._code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self._row = np.zeros((), dtype=self.dtype)
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, SCHEMA_FILE), np.zeros(0, dtype=self.dtype), allow_pickle=False)
+        with open(os.path.join(path, RECORDS_FILE), "wb") as f:
+            f.truncate(capacity * self.dtype.itemsize)
+        self._records: Optional[np.memmap] = np.memmap(os.path.join(path, RECORDS_FILE), dtype=self.dtype, mode="r+", shape=(capacity,))
+        self._checkpoints = open(os.path.join(path, CHECKPOINTS_FILE), "wb")
+        self._write_meta()
+
+    @property
+    def engine(self) -> TradeEngine:
+        return self.env.unwrapped.engine
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[Observation, Dict]:
+        obs, info = self.env.reset(seed=seed, options=options)
+        self.episode += 1
+        self.step_count = 0
+        self._record(None, obs, 0.0, False)
+        return obs, info
+
+    def step(self, action: Union[Action, Dict]) -> Tuple[Observation, float, bool, bool, Dict]:
+        if isinstance(action, dict):
+            action = Action.make(**action)
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self.step_count += 1
+        self._record(action, obs, reward, terminated)
+        return obs, reward, terminated, truncated, info
+
+    def flush(self):
+        self._records.flush()
+        self._checkpoints.flush()
+        self._write_meta()
+
+    def close(self):
+        if self._records is not None:
+            self.flush()
+            self._records = None
+            self._checkpoints.close()
+            # drop unused capacity
+            with open(os.path.join(self.path, RECORDS_FILE), "r+b") as f:
+                f.truncate(self.size * self.dtype.itemsize)
+        super().close()
+
+    def _record(self, action: Optional[Action], obs: Observation, reward: float, terminated: bool):
+        engine = self.engine
+        row = self._row
+        row[...] = np.zeros((), dtype=self.dtype)
+        row["episode"], row["step"] = self.episode, self.step_count
+        row["datetime"] = to_nanoseconds(engine.clock.now)
+        row["code"], row["side"] = -1, -1
+        row["price"] = row["volume"] = np.nan
+
+        # action
+        action_name = "reset" if action is None else action.name
+        row["action"] = RECORD_ACTIONS.index(action_name) if action_name in RECORD_ACTIONS else -1
+        if isinstance(action, TradeAction):
+            row["code"] = self._code_index.get(action.code, -1)
+            row["side"] = SIDE_CODES.get(action.side, -1)
+            row["price"] = action.price
+            row["volume"] = np.nan if action.volume is None else action.volume
+
+        # fill
+        for name, dtype in TRADE_FIELDS:
+            row[f"trade_{name}"] = np.nan if dtype is np.float64 else False
+        row["trade_commission"] = np.nan
+        if obs.trade_info is not None:
+            info = obs.trade_info
+            for name, _ in TRADE_FIELDS:
+                value = getattr(info, name)
+                if value is not None:
+                    row[f"trade_{name}"] = value
+            row["trade_commission"] = sum(c.total_fee for c in info.commissions or [])
+        elif obs.batch_info is not None:
+            row["trade_success"] = obs.batch_info.success
+            row["trade_margin"] = obs.batch_info.margin
+            row["trade_commission"] = obs.batch_info.commission
+        else:
+            row["trade_success"] = obs.success
+
+        # wallet and market
+        wallet = engine.account.wallet
+        for name, _ in WALLET_FIELDS:
+            row[f"wallet_{name}"] = getattr(wallet, name)
+        for code, pnl in wallet.unrealized_pnls.items():
+            c = self._code_index.get(code, None)
+            if c is not None:
+                row["unrealized_pnl"][c] = pnl
+        row["cursors"] = engine.kline.cursors()
+        row["reward"], row["terminated"] = reward, terminated
+
+        # append
+        if self.size >= len(self._records):
+            self._grow(2 * len(self._records))
+        self._records[self.size] = row
+        if action_name not in REPLAY_ACTIONS or self.size % self.checkpoint_every == 0:
+            pickle.dump((self.size, engine.snapshot()), self._checkpoints, protocol=pickle.HIGHEST_PROTOCOL)
+        self.size += 1
+
+    def _grow(self, capacity: int):
+        self._records.flush()
+        self._records = None
+        file = os.path.join(self.path, RECORDS_FILE)
+        with open(file, "r+b") as f:
+            f.truncate(capacity * self.dtype.itemsize)
+        self._records = np.memmap(file, dtype=self.dtype, mode="r+", shape=(capacity,))
+
+    def _write_meta(self):
+        engine = self.engine
+        meta = {
+            "size": self.size,
+            "codes": self.codes,
+            "klines": [[kline.code, kline.timestep] for kline in engine.kline.klines],
+            "checkpoint_every": self.checkpoint_every,
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            yaml.safe_dump(meta, f, sort_keys=False)
+
+
+
+class EpisodeReplayer(object):
+    """
+    Read side of an `EpisodeRecorder` log. Records are memory-mapped and exported without simulation,
+    `seek` rebuilds an engine at any record from the nearest checkpoint by re-running the recorded actions.
+    The engine must have the recorded klines activated on the same market data.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r") as f:
+            self.meta: Dict[str, Any] = yaml.safe_load(f)
+        self.codes: List[str] = self.meta["codes"]
+        self.dtype: np.dtype = np.load(os.path.join(path, SCHEMA_FILE), allow_pickle=False).dtype
+        size = self.meta["size"]
+        self.records: np.ndarray = np.memmap(os.path.join(path, RECORDS_FILE), dtype=self.dtype, mode="r", shape=(size,)) if size > 0 else np.zeros(0, dtype=self.dtype)
+
+        # checkpoints written past the last flushed record are ignored
+        indices: List[int] = []
+        self.checkpoints: List[EngineSnapshot] = []
+        with open(os.path.join(path, CHECKPOINTS_FILE), "rb") as f:
+            while True:
+                try:
+                    index, snapshot = pickle.load(f)
+                except EOFError:
+                    break
+                if index >= size:
+                    break
+                indices.append(index)
+                self.checkpoints.append(snapshot)
+        self.checkpoint_indices: np.ndarray = np.array(indices, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def num_episodes(self) -> int:
+        return int(self.records["episode"][-1]) + 1 if len(self.records) > 0 else 0
+
+    def episode(self, episode: int) -> np.ndarray:
+        """Records of one episode, starting with its reset record"""
+        lo, hi = np.searchsorted(self.records["episode"], [episode, episode + 1])
+        return self.records[lo:hi]
+
+    def to_numpy(self) -> np.ndarray:
+        return np.array(self.records)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Flat table, per code and per kline columns are named '<field>.<index>'"""
+        columns = {}
+        for name in self.dtype.names:
+            values = self.records[name]
+            if values.ndim == 1:
+                columns[name] = values
+            else:
+                for i in range(values.shape[1]):
+                    columns[f"{name}.{i}"] = values[:, i]
+        df = pd.DataFrame(columns)
+        df["datetime"] = df["datetime"].to_numpy().view("datetime64[ns]")
+        df["action"] = pd.Categorical.from_codes(df["action"], categories=RECORD_ACTIONS)
+        return df
+
+    def seek(self, engine: TradeEngine, index: int) -> TradeEngine:
+        """Set `engine` to its state after record `index`"""
+        if index < 0:
+            index += len(self.records)
+        if index < 0 or index >= len(self.records):
+            raise IndexError(f"record index {index} out of range, size: {len(self.records)}")
+
+        # records between the checkpoint and the index are replayable actions
+        c = int(np.searchsorted(self.checkpoint_indices, index, side="right")) - 1
+        start = int(self.checkpoint_indices[c])
+        engine.restore(self.checkpoints[c])
+        for record in self.records[start + 1:index + 1]:
+            action = RECORD_ACTIONS[record["action"]]
+            if action in ("open", "close"):
+                volume = None if np.isnan(record["volume"]) else int(record["volume"])
+                Action.make(
+                    name=action, code=self.codes[record["code"]], side=("long", "short")[record["side"]],
+                    price=float(record["price"]), volume=volume,
+                )(engine)
+            engine.tick()
+        return engine
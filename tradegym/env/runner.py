@@ -0,0 +1,262 @@
+from typing import Optional, Callable, Sequence, List, Tuple, Any, Union, Dict
+import os
+import time
+import queue
+import traceback
+import multiprocessing as mp
+import numpy as np
+from multiprocessing import shared_memory
+from tradegym.core import logging
+from tradegym.data import Data
+from tradegym.engine import SharedKLineData, open_shared_memory, to_nanoseconds
+from .action import Action
+from .env import TradeEnv
+from .obs import Observation
+
+
+__all__ = ['TradeEnvRunner', 'SharedRingBuffer', 'STEP_DTYPE']
+
+
+STEP_DTYPE = np.dtype([
+    ("episode", np.int64),
+    ("step", np.int64),
+    ("datetime", np.int64),
+    ("reward", np.float64),
+    ("terminated", np.bool_),
+    ("success", np.bool_),
+    ("cash", np.float64),
+    ("margin", np.float64),
+    ("unrealized_pnl", np.float64),
+])
+
+
+Policy = Callable[[TradeEnv, Observation], Union[Action, Dict]]
+
+
+
+class SharedRingBuffer(object):
+    """
+    Single producer, single consumer ring of fixed-width records in shared memory.
+    The header holds the write and read counters, records follow it.
+    """
+
+    HEADER_SIZE = 2 * np.dtype(np.int64).itemsize
+
+    def __init__(self, capacity: int, dtype: np.dtype, name: Optional[str] = None):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        if name is None:
+            self._block = shared_memory.SharedMemory(create=True, size=self.HEADER_SIZE + capacity * self.dtype.itemsize)
+            self._owner = True
+        else:
+            self._block = open_shared_memory(name)
+            self._owner = False
+        self._counters = np.ndarray(2, dtype=np.int64, buffer=self._block.buf)
+        self._records = np.ndarray(capacity, dtype=self.dtype, buffer=self._block.buf, offset=self.HEADER_SIZE)
+        if self._owner:
+            self._counters[:] = 0
+
+    @property
+    def handle(self) -> Tuple[int, np.dtype, str]:
+        return self.capacity, self.dtype, self._block.name
+
+    @staticmethod
+    def attach(handle: Tuple[int, np.dtype, str]) -> "SharedRingBuffer":
+        capacity, dtype, name = handle
+        return SharedRingBuffer(capacity, dtype, name=name)
+
+    def __len__(self) -> int:
+        return int(self._counters[0] - self._counters[1])
+
+    def put(self, record: Tuple, wait: float = 1e-4):
+        write = int(self._counters[0])
+        while write - int(self._counters[1]) >= self.capacity:
+            time.sleep(wait)
+        self._records[write % self.capacity] = record
+        # publish the record only after it is written
+        self._counters[0] = write + 1
+
+    def get(self) -> np.ndarray:
+        write, read = int(self._counters[0]), int(self._counters[1])
+        records = self._records[np.arange(read, write) % self.capacity].copy()
+        self._counters[1] = write
+        return records
+
+    def close(self):
+        self._counters = self._records = None
+        self._block.close()
+        if self._owner:
+            self._block.unlink()
+
+
+
+class TradeEnvRunner(object):
+    """
+    Runs episodes of `TradeEnv` over a pool of worker processes.
+
+    Market data lives once in shared memory and every worker attaches its klines zero-copy.
+    Each worker runs whole episodes with `policy(env, obs)` and streams one `STEP_DTYPE`
+    record per step back through its own shared ring buffer.
+    """
+
+    def __init__(
+        self,
+        env_fn: Callable[[], TradeEnv],
+        policy: Policy,
+        market: Sequence[SharedKLineData],
+        num_workers: Optional[int] = None,
+        capacity: int = 4096,
+        context: Optional[str] = None,
+        own_market: bool = False,
+    ):
+        self.env_fn = env_fn
+        self.policy = policy
+        self.market = list(market)
+        self.num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.capacity = capacity
+        self.own_market = own_market
+        self._ctx = mp.get_context(context)
+        self._rings: List[SharedRingBuffer] = []
+        self._workers: List[mp.Process] = []
+        self._tasks: Optional[mp.Queue] = None
+        self._errors: Optional[mp.Queue] = None
+        self._num_episodes = 0
+
+    @staticmethod
+    def from_published(input_path: str, indices: Sequence[int], env_fn: Callable[[], TradeEnv], policy: Policy, **kwargs) -> "TradeEnvRunner":
+        """Load one published chunk per kline into shared memory"""
+        market = []
+        try:
+            for index in indices:
+                market.append(SharedKLineData.from_dataframe(Data.load(input_path, index)))
+        except Exception:
+            for data in market:
+                data.close()
+            raise
+        return TradeEnvRunner(env_fn, policy, market, own_market=True, **kwargs)
+
+    def __enter__(self) -> "TradeEnvRunner":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def started(self) -> bool:
+        return len(self._workers) > 0
+
+    def start(self):
+        if self.started:
+            return
+        self._tasks = self._ctx.Queue()
+        self._errors = self._ctx.Queue()
+        handles = [data.handle for data in self.market]
+        for i in range(self.num_workers):
+            ring = SharedRingBuffer(self.capacity, STEP_DTYPE)
+            worker = self._ctx.Process(
+                target=_worker,
+                args=(i, self.env_fn, self.policy, handles, ring.handle, self._tasks, self._errors),
+                daemon=True,
+            )
+            worker.start()
+            self._rings.append(ring)
+            self._workers.append(worker)
+        logging.info(f"Started {self.num_workers} runner workers")
+
+    def run(
+        self,
+        num_episodes: int,
+        poll: float = 1e-3,
+        options: Optional[Union[Dict[str, Any], Sequence[Optional[Dict[str, Any]]]]] = None,
+    ) -> np.ndarray:
+        """
+        Run episodes and return their step records ordered by (episode, step).
+        `options` are passed to `env.reset` of every episode (e.g. start and length), or one per episode as a sequence.
+        """
+        if options is None or isinstance(options, dict):
+            options = [options] * num_episodes
+        assert len(options) == num_episodes, ValueError(f"Expect reset options of {num_episodes} episodes, got {len(options)}")
+        self.start()
+        first = self._num_episodes
+        self._num_episodes += num_episodes
+        for episode, episode_options in zip(range(first, first + num_episodes), options):
+            self._tasks.put((episode, episode_options))
+
+        chunks: List[np.ndarray] = []
+        finished = 0
+        while finished < num_episodes:
+            received = False
+            for ring in self._rings:
+                if len(ring) == 0:
+                    continue
+                records = ring.get()
+                finished += int(records["terminated"].sum())
+                chunks.append(records)
+                received = True
+            if not received:
+                self._check_workers()
+                time.sleep(poll)
+
+        records = np.concatenate(chunks) if len(chunks) > 0 else np.zeros(0, dtype=STEP_DTYPE)
+        return records[np.lexsort((records["step"], records["episode"]))]
+
+    def close(self):
+        if self.started:
+            for _ in self._workers:
+                self._tasks.put(None)
+            for worker in self._workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+            for ring in self._rings:
+                ring.close()
+            self._workers, self._rings = [], []
+        if self.own_market:
+            for data in self.market:
+                data.close()
+            self.market = []
+
+    def _check_workers(self):
+        try:
+            worker_id, error = self._errors.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            raise RuntimeError(f"Runner worker {worker_id} failed:\n{error}")
+        for i, worker in enumerate(self._workers):
+            if not worker.is_alive():
+                raise RuntimeError(f"Runner worker {i} exited unexpectedly with code {worker.exitcode}")
+
+
+
+def _worker(
+    worker_id: int,
+    env_fn: Callable[[], TradeEnv],
+    policy: Policy,
+    handles: Sequence[Any],
+    ring_handle: Tuple,
+    tasks: mp.Queue,
+    errors: mp.Queue,
+):
+    try:
+        env = env_fn()
+        env.engine.kline.attach(SharedKLineData.attach_all(handles))
+        ring = SharedRingBuffer.attach(ring_handle)
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            episode, options = task
+            obs, _ = env.reset(options=options)
+            step, done = 0, False
+            while not done:
+                obs, reward, terminated, truncated, _ = env.step(policy(env, obs))
+                done = terminated or truncated
+                wallet = env.engine.account.wallet
+                ring.put((
+                    episode, step, to_nanoseconds(env.engine.clock.now), reward, done,
+                    obs.success, wallet.cash, wallet.margin, wallet.unrealized_pnl,
+                ))
+                step += 1
+    except Exception:
+        errors.put((worker_id, traceback.format_exc()))
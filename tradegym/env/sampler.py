@@ -0,0 +1,95 @@
+from typing import Optional, Dict, Any, List, Sequence, Union
+import numpy as np
+import pandas as pd
+from tradegym.engine import TradeEngine, KLineData, MARKET_DATA
+from tradegym.data import Dataset
+
+
+__all__ = ['EpisodeSampler']
+
+
+
+class EpisodeSampler(object):
+    """
+    Random episodes over chunks of market data, drawn uniformly over all valid (chunk, start) pairs.
+
+    A chunk is the list of data of the source klines of `engine` (like the `dataframes` reset option),
+    or one chunk of a `Dataset` for engines with a single source kline. Valid start offsets (rows of the
+    first source kline) are computed once per chunk: the start is covered by every kline driving a code
+    and each of them has at least `min_length` bars left. `sample` returns reset options:
+
+        env.reset(options=sampler.sample(rng))
+
+    Data is left out of the options when the chunk is already activated on `engine`,
+    so resets within one chunk only seek the cursors.
+    """
+
+    def __init__(
+        self,
+        engine: TradeEngine,
+        chunks: Union[Sequence[Sequence[Union[pd.DataFrame, KLineData]]], Dataset],
+        length: Optional[int] = None,
+        min_length: Optional[int] = None,
+    ):
+        min_length = length if min_length is None else min_length
+        assert min_length is not None and min_length > 0, ValueError(f"Minimum episode length must be positive, got {min_length}")
+        klines = engine.kline.source_klines
+        self.engine = engine
+        self.length = length
+        self.min_length = min_length
+        self.dataset: Optional[Dataset] = chunks if isinstance(chunks, Dataset) else None
+        self.chunks: List[List[KLineData]] = []
+
+        if self.dataset is not None:
+            # rows of a single kline are its own coverage, no chunk needs to be loaded
+            assert len(klines) == 1, ValueError(f"Dataset chunks need an engine with one source kline, got {len(klines)}")
+            self.offsets: List[np.ndarray] = [np.arange(max(int(size) - min_length, 0), dtype=np.int64) for size in self.dataset.sizes]
+        else:
+            # kline of each source kline that drives its code
+            drivers = [i for i, kline in enumerate(klines) if engine.kline.get_kline(kline.code) is kline]
+            self.offsets = []
+            for datas in chunks:
+                assert len(datas) == len(klines), ValueError("Length of source klines and chunk datas must be equal")
+                datas = [
+                    data if isinstance(data, KLineData) else MARKET_DATA.load(kline.code, kline.timestep, data)
+                    for kline, data in zip(klines, datas)
+                ]
+                self.chunks.append(datas)
+                self.offsets.append(self._valid_offsets([datas[i] for i in drivers], datas[0], min_length))
+
+        self.counts: np.ndarray = np.array([len(offsets) for offsets in self.offsets], dtype=np.int64)
+        self._cumsum: np.ndarray = np.cumsum(self.counts)
+        assert self.num_starts > 0, ValueError(f"No chunk has an episode of at least {min_length} bars")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def num_starts(self) -> int:
+        return int(self._cumsum[-1]) if len(self._cumsum) > 0 else 0
+
+    def sample(self, rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+        rng = np.random.default_rng() if rng is None else rng
+        n = int(rng.integers(self.num_starts))
+        index = int(np.searchsorted(self._cumsum, n, side='right'))
+        offset = int(self.offsets[index][n - (self._cumsum[index] - self.counts[index])])
+        return self.options(index, offset)
+
+    def options(self, index: int, offset: int) -> Dict[str, Any]:
+        """Reset options of the episode of chunk `index` starting at row `offset`"""
+        options = {"start": offset, "length": self.length}
+        datas = [self.dataset[index]] if self.dataset is not None else self.chunks[index]
+        klines = self.engine.kline.source_klines
+        if any(kline.data is not data for kline, data in zip(klines, datas)):
+            options["dataframes"] = datas
+        return options
+
+    @staticmethod
+    def _valid_offsets(drivers: Sequence[KLineData], primary: KLineData, min_length: int) -> np.ndarray:
+        times = primary.times
+        latest = max(int(data.times[0]) for data in drivers)
+        valid = times >= latest
+        for data in drivers:
+            cursors = np.searchsorted(data.times, times, side='right') - 1
+            valid &= cursors + min_length <= len(data) - 1
+        return np.flatnonzero(valid)
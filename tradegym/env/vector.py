@@ -0,0 +1,237 @@
+from typing import Optional, Dict, Any, Tuple, Callable, List, Sequence, Hashable
+import numpy as np
+import gymnasium as gym
+from gymnasium.vector.utils import batch_space
+from tradegym.engine import TradeEngine, Clock, Formula, from_nanoseconds, to_nanoseconds
+from .action import Action
+
+
+__all__ = ['TradeVectorEnv']
+
+
+
+class TradeVectorEnv(gym.vector.VectorEnv):
+    """
+    Steps N engines in lockstep over shared, read-only kline arrays.
+
+    Clock, cursors, unrealized pnl and wallet equity of all episodes are advanced with numpy
+    operations, engines are only touched to execute trade actions. Call `sync(i)` before
+    inspecting `engines[i]` directly.
+
+    Batched actions are a dict of arrays: type (0 noop, 1 open, 2 close), code (index into
+    `codes`), side (0 long, 1 short), price and volume (0 closes the whole position).
+    Rewards are the change of equity (cash + margin + unrealized pnl) per step.
+    """
+
+    metadata: Dict[str, Any] = {"autoreset_mode": gym.vector.AutoresetMode.NEXT_STEP}
+
+    ACTION_TYPES = ("noop", "open", "close")
+    SIDES = ("long", "short")
+
+    def __init__(self, engine_fn: Callable[[], TradeEngine], num_envs: int, copy: bool = True):
+        self.num_envs = num_envs
+        self.copy = copy
+        self.engines: List[TradeEngine] = [engine_fn() for _ in range(num_envs)]
+
+        engine = self.engines[0]
+        self.codes: List[str] = list(engine.kline.code_klines.keys())
+        self._code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self._primary: np.ndarray = np.array([engine.kline.klines.index(engine.kline.get_kline(code)) for code in self.codes], dtype=np.int64)
+        self._multipliers: np.ndarray = np.array([engine.contract.get_contract(code).multiplier for code in self.codes], dtype=np.float64)
+        self._last_price_key: str = getattr(engine.trader, "last_price_key", "last_price")
+        self._clock: Clock = engine.clock
+
+        # spaces
+        num_codes = len(self.codes)
+        self.single_action_space = gym.spaces.Dict({
+            "type": gym.spaces.Discrete(len(self.ACTION_TYPES)),
+            "code": gym.spaces.Discrete(num_codes),
+            "side": gym.spaces.Discrete(len(self.SIDES)),
+            "price": gym.spaces.Box(low=0.0, high=np.inf, shape=(), dtype=np.float64),
+            "volume": gym.spaces.Box(low=0, high=np.iinfo(np.int32).max, shape=(), dtype=np.int64),
+        })
+        self.single_observation_space = gym.spaces.Dict({
+            "datetime": gym.spaces.Box(low=0, high=np.iinfo(np.int64).max, shape=(), dtype=np.int64),
+            "last_price": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(num_codes,), dtype=np.float64),
+            "position": gym.spaces.Box(low=0.0, high=np.inf, shape=(num_codes, len(self.SIDES)), dtype=np.float64),
+            "avg_price": gym.spaces.Box(low=0.0, high=np.inf, shape=(num_codes, len(self.SIDES)), dtype=np.float64),
+            "cash": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(), dtype=np.float64),
+            "margin": gym.spaces.Box(low=0.0, high=np.inf, shape=(), dtype=np.float64),
+            "unrealized_pnl": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(num_codes,), dtype=np.float64),
+            "success": gym.spaces.Discrete(2),
+        })
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # state
+        num_klines = len(engine.kline.klines)
+        self._times: List[np.ndarray] = []
+        self._prices: List[np.ndarray] = []
+        self._sizes: np.ndarray = np.zeros(num_klines, dtype=np.int64)
+        self._start_ns: int = 0
+        self._start_cursors: np.ndarray = np.zeros(num_klines, dtype=np.int64)
+        # episode start option and last cursor of the first kline of each code
+        self._start: Optional[Any] = None
+        self._length: Optional[int] = None
+        self._stops: np.ndarray = np.zeros(len(self.codes), dtype=np.int64)
+        self._now: np.ndarray = np.zeros(num_envs, dtype=np.int64)
+        self._cursors: np.ndarray = np.zeros((num_envs, num_klines), dtype=np.int64)
+        self._volumes: np.ndarray = np.zeros((num_envs, num_codes, len(self.SIDES)), dtype=np.float64)
+        self._costs: np.ndarray = np.zeros((num_envs, num_codes, len(self.SIDES)), dtype=np.float64)
+        self._last_prices: np.ndarray = np.zeros((num_envs, num_codes), dtype=np.float64)
+        self._unrealized: np.ndarray = np.zeros((num_envs, num_codes), dtype=np.float64)
+        self._cash: np.ndarray = np.zeros(num_envs, dtype=np.float64)
+        self._margin: np.ndarray = np.zeros(num_envs, dtype=np.float64)
+        self._equity: np.ndarray = np.zeros(num_envs, dtype=np.float64)
+        self._success: np.ndarray = np.ones(num_envs, dtype=np.int64)
+        self._terminated: np.ndarray = np.zeros(num_envs, dtype=np.bool_)
+        self._autoreset: np.ndarray = np.zeros(num_envs, dtype=np.bool_)
+
+    @property
+    def activated(self) -> bool:
+        return self.engines[0].activated
+
+    def activate(self, dataframes: Optional[Sequence[Any]] = None, chunks: Optional[Sequence[Hashable]] = None):
+        source = self.engines[0]
+        source.activate(dataframes, chunks)
+        for engine in self.engines[1:]:
+            engine.kline.share(source.kline)
+
+        klines = source.kline.klines
+        self._times = [kline.data.times for kline in klines]
+        self._sizes = np.array([len(kline) for kline in klines], dtype=np.int64)
+        self._prices = [klines[k].data.column(self._last_price_key) for k in self._primary]
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
+        super().reset(seed=seed, options=options)
+
+        # activate
+        options = {} if options is None else dict(options)
+        self._start, self._length = options.pop("start", None), options.pop("length", None)
+        if len(options) > 0:
+            self.activate(**options)
+
+        # reset
+        source = self.engines[0]
+        source.reset(self._start, self._length)
+        self._start_ns = to_nanoseconds(source.clock.now)
+        self._start_cursors = np.array([kline.cursor for kline in source.kline.klines], dtype=np.int64)
+        self._stops = source.kline.terminals[self._primary]
+        if self._length is not None:
+            np.minimum(self._stops, self._start_cursors[self._primary] + self._length, out=self._stops)
+        self._reset_envs(np.arange(self.num_envs))
+        self._autoreset[:] = False
+        self._update_marks()
+        self._equity[:] = self._calc_equity()
+
+        return self._observation(), {}
+
+    def step(self, actions: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray, Dict]:
+        types = np.asarray(actions["type"])
+        resets = self._autoreset.copy()
+        active = ~resets
+        self._success[:] = 1
+
+        # autoreset episodes terminated by the previous step
+        if resets.any():
+            self._reset_envs(np.flatnonzero(resets))
+
+        # run actions
+        for i in np.flatnonzero((types != 0) & active):
+            self._success[i] = self._execute(i, actions)
+
+        # tick clock and cursors
+        self._now[active] = self._clock.next_times(self._now[active])
+        for k, times in enumerate(self._times):
+            cursors = np.searchsorted(times, self._now, side='right') - 1
+            np.maximum(self._cursors[:, k], cursors, out=self._cursors[:, k])
+
+        # mark to market
+        self._update_marks()
+        equity = self._calc_equity()
+        rewards = np.where(active, equity - self._equity, 0.0)
+        self._equity[:] = equity
+
+        # terminate
+        terminated = (self._cursors[:, self._primary] >= self._stops).any(axis=1) & active
+        self._terminated[:] = terminated
+        self._autoreset[:] = terminated
+        truncated = np.zeros(self.num_envs, dtype=np.bool_)
+
+        return self._observation(), rewards, terminated, truncated, {}
+
+    def sync(self, index: int) -> TradeEngine:
+        """Write the vectorized state of an episode back into its engine"""
+        engine = self.engines[index]
+        engine.clock.set_now(from_nanoseconds(self._now[index]).to_pydatetime())
+        # resampled klines rebuild their live bar from the source cursor
+        engine.kline.seek(self._cursors[index])
+        for c, code in enumerate(self.codes):
+            engine.account.wallet.update_unrealized_pnl(code, float(self._unrealized[index, c]))
+        return engine
+
+    def _execute(self, index: int, actions: Dict[str, np.ndarray]) -> bool:
+        engine = self.sync(index)
+        name = self.ACTION_TYPES[int(actions["type"][index])]
+        volume = int(actions["volume"][index])
+        action = Action.make(
+            name=name,
+            code=self.codes[int(actions["code"][index])],
+            side=self.SIDES[int(actions["side"][index])],
+            price=float(actions["price"][index]),
+            volume=None if name == "close" and volume == 0 else volume,
+        )
+        result = action(engine)
+        self._load_account(index)
+        return result.error is None and (result.trade_info is None or result.trade_info.success)
+
+    def _reset_envs(self, indices: np.ndarray):
+        self._now[indices] = self._start_ns
+        self._cursors[indices] = self._start_cursors
+        for i in indices:
+            engine = self.engines[i]
+            engine.reset(self._start, self._length)
+            self._load_account(i)
+        self._unrealized[indices] = 0.0
+        self._terminated[indices] = False
+
+    def _load_account(self, index: int):
+        volumes, costs = self._volumes[index], self._costs[index]
+        volumes[:] = 0.0
+        costs[:] = 0.0
+        account = self.engines[index].account
+        for position in account.portfolio.book.positions.values():
+            c, s = self._code_index[position.code], self.SIDES.index(position.side)
+            volumes[c, s] = position.volume
+            costs[c, s] = position.cost
+        self._cash[index] = account.wallet.cash
+        self._margin[index] = account.wallet.margin
+
+    def _update_marks(self):
+        for c, (k, prices) in enumerate(zip(self._primary, self._prices)):
+            self._last_prices[:, c] = prices[self._cursors[:, k]]
+
+        avg_prices = self._avg_prices()
+        self._unrealized[:] = (
+            Formula.position_unrealized_pnl(avg_prices[:, :, 0], self._volumes[:, :, 0], "long", self._multipliers, self._last_prices) +
+            Formula.position_unrealized_pnl(avg_prices[:, :, 1], self._volumes[:, :, 1], "short", self._multipliers, self._last_prices)
+        )
+
+    def _avg_prices(self) -> np.ndarray:
+        return np.divide(self._costs, self._volumes, out=np.zeros_like(self._costs), where=self._volumes > 0)
+
+    def _calc_equity(self) -> np.ndarray:
+        return self._cash + self._margin + self._unrealized.sum(axis=1)
+
+    def _observation(self) -> Dict[str, np.ndarray]:
+        obs = {
+            "datetime": self._now,
+            "last_price": self._last_prices,
+            "position": self._volumes,
+            "avg_price": self._avg_prices(),
+            "cash": self._cash,
+            "margin": self._margin,
+            "unrealized_pnl": self._unrealized,
+            "success": self._success,
+        }
+        return {k: v.copy() for k, v in obs.items()} if self.copy else obs